@@ -0,0 +1,470 @@
+"""Archivo empaquetado de partidas terminadas: segmentos de solo agregar con índice de ancho fijo.
+
+Cada partida terminada queda en un archivo chico de data/ (cerrarArchivoPartida
+la mueve ahí). Con cientos de miles de partidas, abrir un archivo por partida
+domina la carga del historial. `python archive.py pack` copia las partidas de
+data/list.txt que todavía no están archivadas a un segmento nuevo de
+data/archive/:
+
+    seg-00000.log   las partidas tal cual (los bytes de cada data/<id>.txt), una tras otra
+    seg-00000.idx   MAGIC y una entrada ENTRY de ancho fijo por partida, ordenadas por id:
+                    id, posición y largo en el .log, puntaje, movimientos, victoria, válida y fecha
+
+Un segmento no se vuelve a modificar: su .idx se escribe al final (con rename)
+y es lo que lo marca como completo. El lector (Archive) abre ambos archivos
+con mmap; buscar una partida es una búsqueda binaria en el .idx de cada
+segmento, y la partida se entrega como memoryview del .log, sin copiarla
+(el detalle se decodifica recorriendo el mapa, copiando solo cada línea de
+movimiento).
+DetailScene lee de aquí el detalle y HistoryIndex el resumen de las partidas
+cuyo archivo ya no está en data/ (pack --remove).
+
+Uso:
+    python archive.py pack [--remove] [--segment-size 64]
+    python archive.py check [--limit 200]
+    python archive.py bench [--matches 50000]
+"""
+
+import argparse
+import mmap
+import os
+import random
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+from history_index import HistoryIndex, summarize_log
+from protocol import HistoryMove, decode_message
+
+MAGIC = b"MATCHIX1"
+ENTRY = struct.Struct("<16sQIiIBB2xd")  # id, posición, largo, puntaje, movimientos, victoria, válida, fecha
+ID_SIZE = 16
+SEGMENT_SIZE = 64 << 20  # Bytes de partidas por segmento
+FIRST_TURN = re.compile(rb"^8 \d+$", re.M)  # Donde empiezan los turnos, como en protocol.split_log
+
+def entry_key(match_id):
+    """Id como se guarda en el índice (rellenado con ceros), o None si no cabe"""
+    key = match_id.encode()
+    return key.ljust(ID_SIZE, b"\0") if len(key) <= ID_SIZE else None
+
+class Segment:
+    """Un segmento completo, con su .idx y su .log mapeados en memoria"""
+
+    def __init__(self, log_path, idx_path):
+        self.files = []
+        self.index = self.map(idx_path)
+        self.log = self.map(log_path)
+        if self.index[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{idx_path}: no es un índice de partidas")
+        self.count = (len(self.index) - len(MAGIC)) // ENTRY.size
+
+    def map(self, path):
+        f = open(path, "rb")
+        self.files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""  # mmap no acepta archivos vacíos
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def find(self, key):
+        """Entrada (tupla de ENTRY) con el id `key` (de entry_key), o None"""
+        index, size, base = self.index, ENTRY.size, len(MAGIC)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + mid * size
+            found = index[start:start + ID_SIZE]
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return ENTRY.unpack_from(index, start)
+        return None
+
+    def entries(self):
+        for n in range(self.count):
+            yield ENTRY.unpack_from(self.index, len(MAGIC) + n * ENTRY.size)
+
+    def record(self, entry):
+        """Bytes de la partida como memoryview del .log (hay que soltarla antes de cerrar el archivo)"""
+        offset, length = entry[1], entry[2]
+        return memoryview(self.log)[offset:offset + length]
+
+    def close(self):
+        for mapped in (getattr(self, "index", None), getattr(self, "log", None)):
+            if isinstance(mapped, mmap.mmap):
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass  # Queda una memoryview viva: el mapa se libera con ella
+        for f in self.files:
+            f.close()
+
+class Archive:
+    """Lector de data/archive/. Los segmentos nuevos se abren al buscar una partida que no está"""
+
+    def __init__(self, path=os.path.join("data", "archive")):
+        self.path = path
+        self.segments = []  # Del más viejo al más nuevo
+        self.loaded = set()
+
+    def refresh(self):
+        """Abrir los segmentos completos (con .idx) que no estaban abiertos; devuelve cuántos"""
+        try:
+            names = sorted(os.listdir(self.path))
+        except OSError:
+            return 0
+        opened = 0
+        for name in names:
+            if not name.endswith(".idx") or name in self.loaded:
+                continue
+            base = os.path.join(self.path, name[:-len(".idx")])
+            try:
+                self.segments.append(Segment(base + ".log", base + ".idx"))
+            except (OSError, ValueError) as e:
+                print(f"Aviso: no se pudo abrir el segmento {name} ({e})", file=sys.stderr)
+                continue
+            self.loaded.add(name)
+            opened += 1
+        return opened
+
+    def find(self, match_id):
+        """(segmento, entrada) de la partida, o None"""
+        key = entry_key(match_id)
+        if key is None:
+            return None
+        for _ in range(2):
+            # Una partida archivada más de una vez vale la del segmento más nuevo
+            for segment in reversed(self.segments):
+                entry = segment.find(key)
+                if entry is not None:
+                    return segment, entry
+            if not self.refresh():
+                return None
+        return None
+
+    def __contains__(self, match_id):
+        return self.find(match_id) is not None
+
+    def record(self, match_id):
+        """Bytes de la partida (memoryview sobre el mmap, sin copia), o None"""
+        found = self.find(match_id)
+        return found[0].record(found[1]) if found is not None else None
+
+    def summary(self, match_id):
+        """(jugador, victoria, puntaje, movimientos, válida, fecha, largo), o None"""
+        found = self.find(match_id)
+        if found is None:
+            return None
+        segment, (_, offset, length, score, moves, victory, valid, finished) = found
+        # El jugador es la segunda línea del registro
+        end = offset + length
+        first = segment.log.find(b"\n", offset, end)
+        second = segment.log.find(b"\n", first + 1, end) if first >= 0 else -1
+        player = segment.log[first + 1:second if second >= 0 else end] if first >= 0 else b""
+        return player.decode(errors="replace"), victory, score, moves, bool(valid), finished, length
+
+    def moves(self, match_id):
+        """Detalle de la partida como lo entrega listaHistorial (HistoryMove, el más reciente primero), o None.
+
+        Se recorre el registro sobre el mmap: solo se copian las líneas de movimientos para decodificarlas.
+        """
+        found = self.find(match_id)
+        if found is None:
+            return None
+        segment, entry = found
+        log, end = segment.log, entry[1] + entry[2]
+
+        # Como leerPartida: cada "8 n" cambia de jugador (el primero es el del jugador)
+        first = FIRST_TURN.search(log, entry[1], end)
+        position = first.start() if first is not None else end
+        moves = []
+        player = 0
+        while position < end:
+            newline = log.find(b"\n", position, end)
+            stop = newline if newline >= 0 else end
+            lead = log[position:position + 1]
+            if lead == b"8":
+                player ^= 1
+            elif lead == b"4" or lead == b"5":
+                try:
+                    moves.append(HistoryMove(decode_message(log[position:stop]), player))
+                except ValueError:
+                    pass
+            position = stop + 1
+        moves.reverse()
+        return moves
+
+    def entries(self):
+        """(id, entrada) de todas las partidas archivadas"""
+        self.refresh()
+        for segment in self.segments:
+            for entry in segment.entries():
+                yield entry[0].rstrip(b"\0").decode(), entry
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+        self.loaded = set()
+
+class SegmentWriter:
+    """Segmento nuevo: las partidas se agregan al .log y el .idx ordenado se escribe en commit()"""
+
+    def __init__(self, directory, number):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"seg-{number:05d}")
+        self.idx_path = base + ".idx"
+        self.log = open(base + ".log", "xb")  # Nunca se pisa un segmento que ya existe
+        self.size = 0
+        self.entries = []
+
+    def add(self, match_id, data, finished):
+        _, victory, score, moves, valid = summarize_log(data)
+        self.entries.append((entry_key(match_id), self.size, len(data), score, moves, victory, int(valid), finished))
+        self.log.write(data)
+        self.size += len(data)
+
+    def commit(self):
+        self.log.flush()
+        os.fsync(self.log.fileno())
+        self.log.close()
+
+        self.entries.sort()
+        partial = self.idx_path + ".tmp"
+        with open(partial, "wb") as f:
+            f.write(MAGIC)
+            f.writelines(ENTRY.pack(*entry) for entry in self.entries)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, self.idx_path)
+
+def listed_matches(data_dir):
+    """Ids de data/list.txt en orden, sin repetidos"""
+    try:
+        with open(os.path.join(data_dir, "list.txt"), "rb") as f:
+            lines = f.read().decode(errors="replace").split("\n")
+    except OSError:
+        return []
+    return list(dict.fromkeys(line.strip() for line in lines if line.strip()))
+
+def pack(data_dir="data", segment_size=SEGMENT_SIZE, remove=False):
+    """Archivar las partidas de list.txt que no lo están; devuelve (partidas, segmentos nuevos, borradas).
+
+    Con `remove` se borra de data/ toda partida listada que ya esté en un segmento completo,
+    también las archivadas en una pasada anterior.
+    """
+    archive_dir = os.path.join(data_dir, "archive")
+    archive = Archive(archive_dir)
+    # Ids archivados (una lectura de los índices, no una búsqueda por partida)
+    archived = {match_id for match_id, _ in archive.entries()}
+    listed = listed_matches(data_dir)
+    pending = [match_id for match_id in listed if entry_key(match_id) is not None and match_id not in archived]
+    archive.close()
+
+    # El número sigue al de cualquier seg-* en disco, también un .log sin .idx de una pasada cortada
+    try:
+        names = os.listdir(archive_dir)
+    except OSError:
+        names = []
+    numbers = [int(name[4:9]) for name in names if name.startswith("seg-") and name[4:9].isdigit()]
+    number = max(numbers, default=-1) + 1
+    writer = None
+    packed, segments = [], 0
+    for match_id in pending:
+        path = os.path.join(data_dir, f"{match_id}.txt")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+                finished = os.fstat(f.fileno()).st_mtime
+        except OSError:
+            continue  # Ni en data/ ni archivada: listaHistorial tampoco la muestra
+
+        if writer is None or (writer.entries and writer.size + len(data) > segment_size):
+            if writer is not None:
+                writer.commit()
+                segments += 1
+            writer = SegmentWriter(archive_dir, number)
+            number += 1
+        writer.add(match_id, data, finished)
+        archived.add(match_id)
+        packed.append(path)
+
+    if writer is not None:
+        writer.commit()
+        segments += 1
+
+    # Solo después de que los segmentos quedaron completos
+    removed = 0
+    if remove:
+        archive = Archive(archive_dir)
+        for match_id in listed:
+            if match_id not in archived:
+                continue
+            path = os.path.join(data_dir, f"{match_id}.txt")
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            record = archive.record(match_id)
+            same = record is not None and record == data
+            if record is not None:
+                record.release()
+            if not same:
+                # El archivo cambió después de archivarlo: no se pierde la versión nueva
+                print(f"Aviso: {path} no es igual a su copia archivada; no se borra", file=sys.stderr)
+                continue
+            os.remove(path)
+            removed += 1
+        archive.close()
+    return len(packed), segments, removed
+
+# Herramienta: empaquetar, comparar con listaHistorial y tiempos
+
+def pack_command(args):
+    start = time.perf_counter()
+    matches, segments, removed = pack(args.data, args.segment_size << 20, args.remove)
+    print(f"{matches} partidas archivadas en {segments} segmentos nuevos ({time.perf_counter() - start:.2f} s)")
+    if args.remove:
+        print(f"{removed} archivos de partidas archivadas borrados de {args.data}")
+    return 0
+
+def check(args):
+    """Cada partida archivada debe ser igual a su archivo y dar el mismo detalle que listaHistorial"""
+    from backend import BackendClient, BackendManager
+    from protocol import read_history, read_moves
+
+    archive = Archive(os.path.join(args.data, "archive"))
+    archived = [match_id for match_id, _ in archive.entries()]
+    if not archived:
+        print("No hay partidas archivadas (python archive.py pack)")
+        return 1
+
+    # listaHistorial lee data/ desde el directorio que lo contiene
+    executable = BackendManager(os.path.dirname(os.path.abspath(__file__))).build()
+    client = BackendClient([executable, "listaHistorial"], cwd=os.path.dirname(os.path.abspath(args.data)))
+    differences = 0
+    try:
+        client.submit(parser=read_history).result(client.timeout)
+        for match_id in archived[:args.limit]:
+            path = os.path.join(args.data, f"{match_id}.txt")
+            if os.path.exists(path):
+                with open(path, "rb") as f, archive.record(match_id) as view:
+                    if f.read() != view:
+                        differences += 1
+                        print(f"{match_id}: el registro no es igual a {path}")
+                        continue
+            else:
+                continue  # Sin el archivo listaHistorial no tiene el detalle
+
+            expected = client.submit(f"{match_id}\n", parser=read_moves).result(client.timeout)
+            # leerPartida cuenta también las filas del tablero que empiezan con 4 o 5: quedan al final
+            actual = archive.moves(match_id)
+            expected = [move.encode() for move in expected[:len(actual)]]
+            if expected != [move.encode() for move in actual]:
+                differences += 1
+                print(f"{match_id}: el detalle difiere de listaHistorial")
+    finally:
+        client.close()
+        archive.close()
+    print(f"{min(len(archived), args.limit)} partidas comparadas, {differences} diferencias")
+    return 1 if differences else 0
+
+def bench(args):
+    """Archivo sintético de `--matches` partidas: detalle desde el archivo contra abrir cada .txt"""
+    sources = [os.path.join(args.data, name) for name in sorted(os.listdir(args.data))
+               if name.endswith(".txt") and name != "list.txt"] if os.path.isdir(args.data) else []
+    if not sources:
+        print("No hay partidas en data/ para copiar (jugar una o usar simulate.py --keep)")
+        return 1
+    logs = []
+    for path in sources[:100]:
+        with open(path, "rb") as f:
+            logs.append(f.read())
+
+    workdir = tempfile.mkdtemp(prefix="archive-")
+    rng = random.Random(0)
+    try:
+        data_dir = os.path.join(workdir, "data")
+        os.makedirs(data_dir)
+        match_ids = [f"{n:06x}" for n in range(args.matches)]
+        with open(os.path.join(data_dir, "list.txt"), "w") as f:
+            for n, match_id in enumerate(match_ids):
+                with open(os.path.join(data_dir, f"{match_id}.txt"), "wb") as log:
+                    log.write(logs[n % len(logs)])
+                f.write(f"{match_id}\n")
+
+        results = {"matches": args.matches}
+        start = time.perf_counter()
+        results["segments"] = pack(data_dir, args.segment_size << 20)[1]
+        results["pack_s"] = round(time.perf_counter() - start, 3)
+
+        sample = [rng.choice(match_ids) for _ in range(args.lookups)]
+
+        def per_lookup(func):
+            start = time.perf_counter()
+            for match_id in sample:
+                func(match_id)
+            return round((time.perf_counter() - start) / len(sample) * 1e6, 2)
+
+        archive = Archive(os.path.join(data_dir, "archive"))
+        start = time.perf_counter()
+        archive.refresh()
+        results["open_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        results["record_us"] = per_lookup(lambda match_id: archive.record(match_id).release())
+        results["detail_us"] = per_lookup(archive.moves)
+
+        def read_file(match_id):
+            with open(os.path.join(data_dir, f"{match_id}.txt"), "rb") as f:
+                return f.read()
+        results["file_read_us"] = per_lookup(read_file)
+
+        # Resumen del historial sin los .txt: desde el archivo
+        start = time.perf_counter()
+        for name in match_ids:
+            os.remove(os.path.join(data_dir, f"{name}.txt"))
+        results["remove_s"] = round(time.perf_counter() - start, 3)
+        index = HistoryIndex(data_dir, archive=archive)
+        start = time.perf_counter()
+        rows = index.rows()
+        results["history_index_from_archive_s"] = round(time.perf_counter() - start, 3)
+        results["history_rows"] = len(rows)
+        index.close()
+        archive.close()
+
+        for key, value in results.items():
+            print(f"{key:<32}{value:>12}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivo empaquetado de partidas terminadas")
+    parser.add_argument("--data", default="data", help="directorio con list.txt y las partidas")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = commands.add_parser("pack", help="archivar las partidas nuevas de list.txt")
+    pack_parser.add_argument("--remove", action="store_true", help="borrar de data/ las partidas archivadas")
+    pack_parser.add_argument("--segment-size", type=int, default=SEGMENT_SIZE >> 20, help="MB por segmento")
+    pack_parser.set_defaults(handler=pack_command)
+
+    check_parser = commands.add_parser("check", help="comparar con los archivos y con listaHistorial")
+    check_parser.add_argument("--limit", type=int, default=200)
+    check_parser.set_defaults(handler=check)
+
+    bench_parser = commands.add_parser("bench", help="tiempos con un archivo sintético")
+    bench_parser.add_argument("--matches", type=int, default=50000)
+    bench_parser.add_argument("--lookups", type=int, default=2000)
+    bench_parser.add_argument("--segment-size", type=int, default=SEGMENT_SIZE >> 20, help="MB por segmento")
+    bench_parser.set_defaults(handler=bench)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
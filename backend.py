@@ -0,0 +1,532 @@
+"""Cliente del backend (main.exe) que no bloquea el hilo de dibujo.
+
+El proceso se lanza con `Popen`; un hilo lee su stdout (en binario, con el
+FrameReader de protocol.py) y resuelve, en orden, las respuestas pedidas con
+`submit`, que devuelve un Future. La escena revisa cada frame si su Future
+terminó (`done()`) en vez de esperar la respuesta.
+
+BackendManager compila main.exe una sola vez por contenido de las fuentes y
+deja procesos lanzados de antemano para el historial y la partida. Con
+engine="python" la partida la juega en el mismo proceso el motor de rules.py
+(EngineClient), con la misma interfaz y los mismos mensajes.
+
+Con record_dir cada proceso lanzado deja su traza (replay.TraceWriter) para
+reproducirla luego con replay.py.
+"""
+
+import glob
+import hashlib
+import io
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from protocol import BUFFER_SIZE, FrameReader, read_history, read_line, read_turn
+from replay import TraceWriter
+from rules import EngineExit, Match
+
+class BackendError(Exception):
+    """El backend terminó o no respondió a tiempo"""
+
+class BackendTimeout(BackendError):
+    pass
+
+class Timing:
+    """Tiempos (perf_counter) de un pedido: se deja en `future.timing`"""
+
+    __slots__ = ("sent", "written", "first_line", "done")
+
+    def __init__(self):
+        self.sent = time.perf_counter()
+        self.written = self.first_line = self.done = None
+
+    def ms(self, start, end):
+        return None if start is None or end is None else round((end - start) * 1000, 3)
+
+    def as_dict(self):
+        """Todo desde que se pidió: write hasta escribirlo, first_line hasta la primera línea y
+        total hasta leer la respuesta completa; read es lo que tomó leerla desde la primera línea.
+
+        El hilo lector puede leer la respuesta antes de que submit vuelva a correr y anote
+        `written`, así que los tiempos de lectura no se cuentan desde ahí.
+        """
+        return {"write_ms": self.ms(self.sent, self.written),
+                "first_line_ms": self.ms(self.sent, self.first_line),
+                "read_ms": self.ms(self.first_line, self.done),
+                "total_ms": self.ms(self.sent, self.done)}
+
+class BackendClient:
+
+    def __init__(self, args, timeout=5.0, on_exit=None, cwd=None, env=None, recorder=None):
+        """Lanzar el backend con `args`.
+
+        timeout: segundos que puede tardar una respuesta antes de darlo por colgado
+        on_exit: función que se llama (desde otro hilo) una vez si el backend termina
+        env: variables de entorno del proceso (por ejemplo SEMILLA), si no las del juego
+        recorder: TraceWriter donde grabar stdin y stdout, si hay
+        """
+        self.timeout = timeout
+        self.on_exit = on_exit
+        self.closed = False
+        self.dead = threading.Event()
+        self.returncode = None
+        self.exited = Future()  # Código de salida, cuando el proceso terminó
+        self.recorder = recorder
+
+        pipe = subprocess.PIPE
+        self.proc = subprocess.Popen(args, stdin=pipe, stdout=pipe, stderr=pipe, cwd=cwd, env=env,
+                                     bufsize=BUFFER_SIZE)
+        self.reader = FrameReader(self.proc.stdout, tap=self.tap)
+        self.first_line = None  # Cuándo llegó la primera línea del pedido que se está leyendo
+
+        # Pedidos en espera de respuesta, en el orden en que se enviaron: (future, parser, plazo)
+        self.pending = deque()
+        self.requests = threading.Condition()
+        self.stderr_tail = deque(maxlen=20)
+
+        threading.Thread(target=self.read_stdout, daemon=True).start()
+        threading.Thread(target=self.read_stderr, daemon=True).start()
+
+    def submit(self, text=None, parser=read_turn):
+        """Enviar `text` (str o bytes, si hay) y devolver un Future con la respuesta leída por `parser`"""
+        future = Future()
+        future.timing = timing = Timing()
+        with self.requests:
+            # Dentro del lock: fail() no puede vaciar la cola entre la revisión y el append
+            if self.dead.is_set():
+                future.set_exception(BackendError(self.describe_exit()))
+                return future
+            self.pending.append((future, parser, time.monotonic() + self.timeout))
+            self.requests.notify()
+
+        if text:
+            if isinstance(text, str):
+                text = text.encode()
+            if self.recorder is not None:
+                # Antes de escribir: la respuesta la graba el hilo lector
+                self.recorder.stdin(text)
+            try:
+                self.proc.stdin.write(text)
+                self.proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                self.fail(BackendError(f"No se pudo escribir al backend: {e}"))
+        timing.written = time.perf_counter()
+        return future
+
+    def tap(self, data):
+        """Cada lectura de stdout: marca la primera línea del pedido y la graba si hay traza"""
+        if self.first_line is None:
+            self.first_line = time.perf_counter()
+        if self.recorder is not None:
+            self.recorder.stdout(data)
+
+    def read_stdout(self):
+        """Hilo lector: resuelve los pedidos pendientes en orden con lo que llega por stdout"""
+        while True:
+            with self.requests:
+                while not self.pending and not self.dead.is_set():
+                    self.requests.wait()
+                if self.dead.is_set():
+                    return
+                future, parser, _ = self.pending[0]
+
+            self.first_line = None
+            try:
+                result = parser(self.reader)
+            except (EOFError, OSError, ValueError):
+                # Dar un momento al proceso para terminar y así informar su código de salida
+                try:
+                    self.proc.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    pass
+                self.fail(BackendError(self.describe_exit()))
+                return
+
+            future.timing.done = time.perf_counter()
+            future.timing.first_line = self.first_line or future.timing.done
+            with self.requests:
+                # Si venció el plazo, poll() ya falló el pedido y lo sacó de la cola
+                if self.pending and self.pending[0][0] is future:
+                    self.pending.popleft()
+            if not future.done():
+                future.set_result(result)
+
+    def read_stderr(self):
+        for line in self.proc.stderr:
+            self.stderr_tail.append(line.decode(errors="replace").rstrip())
+
+    def poll(self):
+        """Revisar (una vez por frame) si el backend murió o si una respuesta excedió su plazo"""
+        if self.dead.is_set():
+            return
+
+        if self.pending and time.monotonic() > self.pending[0][2]:
+            # La respuesta atrasada desordenaría las siguientes: se da el backend por perdido
+            self.fail(BackendTimeout(f"El backend no respondió en {self.timeout} s"))
+        elif self.proc.poll() is not None and not self.pending:
+            self.fail(BackendError(self.describe_exit()))
+
+    def describe_exit(self):
+        returncode = self.proc.poll()
+        message = "El proceso backend ha terminado inesperadamente"
+        if returncode is not None:
+            message += f" (código {returncode})"
+        if self.stderr_tail:
+            message += ": " + " | ".join(self.stderr_tail)
+        return message
+
+    def fail(self, error):
+        """Dar el backend por muerto: fallar los pedidos pendientes y avisar con on_exit"""
+        with self.requests:
+            if self.dead.is_set():
+                return
+            self.dead.set()
+            pending = list(self.pending)
+            self.pending.clear()
+            self.requests.notify_all()
+
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.returncode = self.proc.wait()
+        if self.recorder is not None:
+            self.recorder.exit(self.returncode)
+            self.recorder.close()
+
+        for future, _, _ in pending:
+            if not future.done():
+                future.set_exception(error)
+        self.exited.set_result(self.returncode)
+
+        if self.on_exit is not None and not self.closed:
+            self.on_exit(self, error)
+
+    def close(self, grace=0.5):
+        """Terminar el backend a propósito (sin llamar a on_exit), sin esperarlo.
+
+        Se cierra su stdin para que termine solo (tras un 777 todavía mueve la
+        partida a data/); un hilo le da `grace` segundos antes de matarlo.
+        Devuelve `exited`, el Future con el código de salida.
+        """
+        if self.closed:
+            return self.exited
+        self.closed = True
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        threading.Thread(target=self.finish, args=(grace,), daemon=True).start()
+        return self.exited
+
+    def finish(self, grace):
+        try:
+            self.proc.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            pass
+        self.fail(BackendError("Backend cerrado"))
+
+class EngineClient:
+    """Igual que BackendClient, pero la partida la juega rules.Match dentro del proceso.
+
+    `submit` procesa el turno en el momento y devuelve un Future ya resuelto:
+    la latencia de un turno es la de una llamada a función. Lo que escribe el
+    motor se lee con los mismos lectores de protocol.py que la salida de main.exe.
+    """
+
+    def __init__(self, config_name, timeout=5.0, on_exit=None, cwd=None, rand=None):
+        self.timeout = timeout
+        self.on_exit = on_exit
+        self.closed = False
+        self.dead = threading.Event()
+        self.returncode = None
+        self.exited = Future()
+        self.stderr_tail = deque(maxlen=20)
+        self.match = Match(config_name, cwd or ".", rand)
+        self.output = bytearray(self.match.take_output())
+
+    def submit(self, text=None, parser=read_turn):
+        """Enviar `text` (str o bytes, si hay) al motor y devolver un Future con la respuesta leída por `parser`"""
+        future = Future()
+        future.timing = timing = Timing()
+        if self.dead.is_set():
+            future.set_exception(BackendError(self.describe_exit()))
+            return future
+
+        if text:
+            if isinstance(text, str):
+                text = text.encode()
+            try:
+                self.output += self.match.feed(text)
+            except EngineExit:
+                self.fail(BackendError("No se pudo escribir al backend: el motor terminó"))
+                future.set_exception(BackendError(self.describe_exit()))
+                return future
+            except Exception as e:
+                self.stderr_tail.append(f"{type(e).__name__}: {e}")
+                self.fail(BackendError(self.describe_exit()))
+                future.set_exception(BackendError(self.describe_exit()))
+                return future
+
+        start = time.perf_counter()
+        reader = FrameReader(io.BytesIO(bytes(self.output)))
+        try:
+            result = parser(reader)
+        except (EOFError, ValueError):
+            # En el proceso real el pedido quedaría esperando hasta vencer su plazo
+            error = BackendError(self.describe_exit()) if self.match.returncode is not None \
+                else BackendTimeout("El motor no tiene una respuesta para este pedido")
+            self.fail(error)
+            future.set_exception(error)
+            return future
+
+        del self.output[:reader.stream.tell()]
+        # El motor responde al escribir: escribir es todo el turno y la lectura, solo decodificarlo
+        timing.written = timing.first_line = start
+        timing.done = time.perf_counter()
+        future.set_result(result)
+        return future
+
+    def poll(self):
+        """Avisar (con on_exit) si el motor terminó, como cuando el proceso de main.exe muere"""
+        if not self.dead.is_set() and self.match.returncode is not None:
+            self.fail(BackendError(self.describe_exit()))
+
+    def describe_exit(self):
+        message = "El motor de reglas ha terminado"
+        if self.match.returncode is not None:
+            message += f" (código {self.match.returncode})"
+        if self.stderr_tail:
+            message += ": " + " | ".join(self.stderr_tail)
+        return message
+
+    def fail(self, error):
+        if self.dead.is_set():
+            return
+        self.dead.set()
+        self.returncode = self.match.returncode
+        self.exited.set_result(self.returncode)
+        if self.on_exit is not None and not self.closed:
+            self.on_exit(self, error)
+
+    def close(self, grace=0.5):
+        """Cerrar la entrada del motor: termina como main.exe al recibir EOF (sin llamar a on_exit).
+
+        El motor termina en el momento: el Future `exited` que se devuelve ya está resuelto.
+        """
+        if self.closed:
+            return self.exited
+        self.closed = True
+        self.match.close()
+        self.fail(BackendError("Backend cerrado"))
+        return self.exited
+
+class BackendManager:
+    """Compila main.exe con caché por contenido y mantiene procesos precalentados.
+
+    La compilación corre en segundo plano al iniciar el juego. El binario se
+    guarda en build/ con el hash de main.c y TDAS/* en el nombre, así que solo
+    se vuelve a compilar si cambian las fuentes. Mientras se arma el tablero
+    queda un proceso de partida esperando el nombre de su configuración
+    (`iniciarJuego -`). El `listaHistorial` (que lee todas las partidas) solo
+    se lanza cuando el detalle de una partida lo necesita, y se reutiliza
+    mientras data/list.txt no cambie.
+    """
+
+    build_dir = "build"
+    suffix = ".exe"
+
+    def __init__(self, root=".", timeout=5.0, engine="c", record_dir=None):
+        self.root = root
+        self.timeout = timeout
+        self.engine = engine  # "c" (main.exe) o "python" (rules.py) para las partidas
+        self.record_dir = record_dir  # Directorio de trazas (replay.py), si se graban las sesiones
+        self.traces = itertools.count(1)
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="backend")
+        self.build_future = None
+        self.prebuilt = False  # Si se usa un main.exe existente en vez de uno compilado de las fuentes
+        self.history = None  # (firma de data/list.txt, Future de (cliente, filas)) del listaHistorial en uso
+        self.warm_match = None  # Future del cliente
+        self.timings = []  # (evento, ms)
+        self.lock = threading.Lock()
+
+    def record(self, event, start):
+        with self.lock:
+            self.timings.append((event, (time.perf_counter() - start) * 1000))
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def source_hash(self):
+        """Hash de main.c y de todo TDAS/, que identifica el binario compilado"""
+        digest = hashlib.sha256()
+        files = [self.path("main.c")] + sorted(glob.glob(self.path("TDAS", "*")))
+        for name in files:
+            digest.update(os.path.relpath(name, self.root).encode())
+            with open(name, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:16]
+
+    def build(self):
+        """Compilar (o reutilizar) el binario de las fuentes actuales; devuelve su ruta"""
+        start = time.perf_counter()
+        target = os.path.abspath(self.path(self.build_dir, f"main-{self.source_hash()}{self.suffix}"))
+        if os.path.exists(target):
+            self.record("build (caché)", start)
+            return target
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        sources = sorted(glob.glob(self.path("TDAS", "*.c"))) + [self.path("main.c")]
+        partial = f"{target}.{os.getpid()}.tmp"
+        try:
+            subprocess.run(["gcc", *sources, "-o", partial], capture_output=True, text=True, check=True)
+        except OSError as e:
+            # Sin gcc se usa el main.exe que ya exista
+            fallback = os.path.abspath(self.path("main.exe"))
+            if os.path.exists(fallback):
+                print(f"Aviso: no se pudo compilar el backend ({e}); se usa {fallback}", file=sys.stderr)
+                self.prebuilt = True
+                self.record("build (main.exe existente)", start)
+                return fallback
+            raise
+        except subprocess.CalledProcessError as e:
+            # Un error de compilación no se tapa con un main.exe viejo: las fuentes no coincidirían
+            print(e.stderr, file=sys.stderr)
+            raise
+        os.replace(partial, target)
+        self.record("build (gcc)", start)
+        return target
+
+    def start(self):
+        """Compilar en segundo plano"""
+        self.build_future = self.executor.submit(self.build)
+
+    def executable(self):
+        if self.build_future is None:
+            self.build_future = self.executor.submit(self.build)
+        return self.build_future.result()
+
+    def spawn(self, name, *args, files=()):
+        """Lanzar main.exe con `args`; `files` son los archivos que lee al empezar (para la traza)"""
+        start = time.perf_counter()
+        args = [self.executable(), *args]
+        env = recorder = None
+        if self.record_dir is not None:
+            # La semilla del bot queda en la traza para repetir la partida
+            env = dict(os.environ, SEMILLA=str(int.from_bytes(os.urandom(4), "little")))
+            os.makedirs(self.record_dir, exist_ok=True)
+            trace = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self.traces):03d}-{args[1]}.trace.gz"
+            recorder = TraceWriter(os.path.join(self.record_dir, trace), args, env)
+            for file in files:
+                recorder.snapshot(self.root, file)
+        client = BackendClient(args, timeout=self.timeout, cwd=self.root, env=env, recorder=recorder)
+        self.record(f"spawn {name}", start)
+        return client
+
+    def history_files(self):
+        """data/list.txt y las partidas que lista: lo que lee listaHistorial al empezar"""
+        files = [os.path.join("data", "list.txt")]
+        try:
+            with open(self.path("data", "list.txt")) as f:
+                files += [os.path.join("data", f"{line.strip()}.txt") for line in f if line.strip()]
+        except OSError:
+            pass
+        return files
+
+    def list_signature(self):
+        """Cambia cuando termina una partida; un historial precalentado antes queda viejo"""
+        try:
+            stat = os.stat(self.path("data", "list.txt"))
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def spawn_history(self):
+        start = time.perf_counter()
+        files = self.history_files() if self.record_dir is not None else ()
+        client = self.spawn("listaHistorial", "listaHistorial", files=files)
+        try:
+            rows = client.submit(parser=read_history).result(self.timeout)
+        except Exception:
+            client.close()
+            raise
+        self.record("listaHistorial listo", start)
+        return client, rows
+
+    def history_future(self):
+        """Future del cliente de listaHistorial y sus filas.
+
+        El proceso se lanza la primera vez que se pide y se comparte: las escenas
+        no lo cierran. Solo se reemplaza si terminó una partida (cambió
+        data/list.txt y el proceso no la conoce) o si murió.
+        """
+        signature = self.list_signature()
+        if self.history is not None:
+            loaded, future = self.history
+            dead = future.done() and (future.exception() is not None or future.result()[0].dead.is_set())
+            if loaded == signature and not dead:
+                return future
+            future.add_done_callback(close_client)
+        self.history = (signature, self.executor.submit(self.spawn_history))
+        return self.history[1]
+
+    def spawn_match(self):
+        # Un main.exe ya compilado (sin gcc) puede no entender "iniciarJuego -": se lanza al tener la configuración
+        self.executable()
+        if self.prebuilt:
+            return None
+        return self.spawn("partida", "iniciarJuego", "-")
+
+    def prewarm_match(self):
+        """Lanzar el proceso de la partida antes de tener la configuración (desde SetupScene)"""
+        if self.warm_match is None and self.engine == "c":
+            self.warm_match = self.executor.submit(self.spawn_match)
+
+    def take_match(self, config_name, on_exit=None):
+        """Cliente de una partida con la configuración `cache/<config_name>` y el Future de su saludo"""
+        start = time.perf_counter()
+        if self.engine == "python":
+            client = EngineClient(config_name, self.timeout, on_exit, cwd=self.root)
+            self.record("motor Python", start)
+            return client, client.submit(parser=read_line)
+
+        warm, self.warm_match = self.warm_match, None
+        client = warm.result() if warm is not None else None
+        config = os.path.join("cache", config_name)
+        if client is not None and not client.dead.is_set():
+            text = f"{config_name}\n"
+            if client.recorder is not None:
+                client.recorder.snapshot(self.root, config)
+        else:
+            client = self.spawn("partida", "iniciarJuego", config_name, files=[config])
+            text = None
+        self.record("espera partida", start)
+
+        client.on_exit = on_exit
+        greeting = client.submit(text, parser=read_line)
+        return client, greeting
+
+    def shutdown(self):
+        """Cerrar el listaHistorial y el proceso de partida precalentado que no se usó"""
+        if self.history is not None:
+            self.history[1].add_done_callback(close_client)
+            self.history = None
+        if self.warm_match is not None:
+            self.warm_match.add_done_callback(lambda future: future.exception() or future.result() is None
+                                              or future.result().close())
+            self.warm_match = None
+        self.executor.shutdown(wait=False)
+
+    def report(self):
+        """Tiempos de compilación, lanzamiento y espera del backend"""
+        with self.lock:
+            timings = list(self.timings)
+        return "\n".join(f"{event:<28}{ms:>9.1f} ms" for event, ms in timings)
+
+def close_client(future):
+    """Callback para cerrar el cliente de un listaHistorial que ya no se usará"""
+    if future.exception() is None:
+        future.result()[0].close()
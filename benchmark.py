@@ -0,0 +1,356 @@
+"""Benchmark de rendimiento por escena, sin ventana ni audio.
+
+Recorre las escenas del juego con los drivers "dummy" de SDL, les envía una
+entrada scripteada (movimientos del mouse, clics, teclas y scroll) y reporta
+en JSON, para cada escena, los percentiles del tiempo por frame, las
+asignaciones de memoria de Python por frame y la cantidad de blits sobre la
+pantalla.
+
+Las asignaciones se miden con tracemalloc en una pasada aparte (no medida):
+alloc_blocks_per_frame es la cantidad de bloques nuevos que siguen vivos al
+terminar el frame (diferencia de conteos entre dos snapshots), y
+alloc_peak_kb_per_frame el pico de memoria del frame sobre la que había al
+empezarlo, que incluye lo temporal que ya se liberó.
+
+Uso:
+    python benchmark.py [--frames N] [--rows N] [--turns N] [--scenes menu,intro,...]
+                        [--output resultados.json] [--baseline base.json]
+
+El benchmark corre en un directorio temporal (con enlaces a assets/, TDAS/,
+main.c y build/) para no tocar cache/ ni data/ del proyecto. El backend sale
+del caché de build/ o se compila ahí; sin gcc se usa main.exe si existe y, si
+no, se omiten las escenas que lo necesitan.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+import game
+from backend import BackendManager
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SCENES = ["menu", "intro", "setup", "match", "history", "victory"]
+BACKEND_SCENES = {"match", "history"}
+
+class CountingSurface(pg.Surface):
+    """Pantalla que cuenta cuántas superficies se le dibujan encima"""
+
+    blit_count = 0
+
+    def blit(self, *args, **kwargs):
+        self.blit_count += 1
+        return super().blit(*args, **kwargs)
+
+    def blits(self, blit_sequence, doreturn=1):
+        blit_sequence = list(blit_sequence)
+        self.blit_count += len(blit_sequence)
+        return super().blits(blit_sequence, doreturn)
+
+def post_motion(pos):
+    pg.event.post(pg.event.Event(pg.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+
+def post_click(pos):
+    post_motion(pos)
+    pg.event.post(pg.event.Event(pg.MOUSEBUTTONDOWN, pos=pos, button=1))
+    pg.event.post(pg.event.Event(pg.MOUSEBUTTONUP, pos=pos, button=1))
+
+def post_key(key):
+    pg.event.post(pg.event.Event(pg.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+
+def sweep(rect, frame, step=7):
+    """Recorrer un rectángulo en zigzag, un punto por frame"""
+    rect = pg.Rect(rect)
+    columns = max(1, rect.width // step)
+    rows = max(1, rect.height // step)
+    row, column = divmod(frame % (columns * rows), columns)
+    if row % 2:
+        column = columns - 1 - column
+    return (rect.x + column * step, rect.y + row * step)
+
+def grid_rect(grid):
+    return (grid.start_pos.x, grid.start_pos.y, grid.grid_width, grid.grid_height)
+
+def percentile(values, p):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(p / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+def prepare_workdir():
+    """Crear el directorio de trabajo temporal; devuelve (ruta, hay_backend)"""
+    workdir = tempfile.mkdtemp(prefix="bytewave-bench-")
+    # build/ se comparte con el proyecto: es un caché por contenido de las fuentes
+    os.makedirs(os.path.join(ROOT, BackendManager.build_dir), exist_ok=True)
+    for name in ("assets", "TDAS", "main.c", BackendManager.build_dir):
+        src = os.path.join(ROOT, name)
+        if not os.path.exists(src):
+            continue
+        try:
+            os.symlink(src, os.path.join(workdir, name))
+        except OSError:
+            if os.path.isdir(src):
+                shutil.copytree(src, os.path.join(workdir, name))
+            else:
+                shutil.copy(src, workdir)
+
+    os.makedirs(os.path.join(workdir, "data"))
+    open(os.path.join(workdir, "data", "list.txt"), "w").close()
+
+    # Sin gcc, BackendManager recurre a un main.exe ya compilado
+    if os.path.exists(os.path.join(ROOT, "main.exe")):
+        shutil.copy(os.path.join(ROOT, "main.exe"), workdir)
+    try:
+        BackendManager(workdir).build()
+        backend = True
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Aviso: no se pudo compilar main.exe ({e}); se omiten match e history", file=sys.stderr)
+        backend = False
+
+    return workdir, backend
+
+class Benchmark:
+    def __init__(self, frames, warmup, rows, turns):
+        self.frames = frames
+        self.warmup = warmup
+        self.rows = rows
+        self.turns = turns
+
+        self.game = game.Game(win_size=(game.WIDTH, game.HEIGHT), name="benchmark")
+        self.engine = game.Engine(self.game)
+        self.game.setup()
+        # Las escenas se miden con los assets ya cargados
+        self.game.assets.wait()
+        self.screen = self.engine.screen
+        self.counting_screen = CountingSurface((game.WIDTH, game.HEIGHT))
+
+    def step(self, screen):
+        self.game.update(screen)
+        self.game.dirty_rects = []
+        self.game.full_redraw = False
+
+    def run_scene(self, name):
+        """Preparar una escena y medirla; devuelve el diccionario de resultados"""
+        script = getattr(self, f"enter_{name}")()
+
+        for frame in range(self.warmup):
+            script(frame)
+            self.step(self.screen)
+
+        # Pasada medida: tiempo por frame sobre la pantalla real
+        times = []
+        for frame in range(self.warmup, self.warmup + self.frames):
+            script(frame)
+            start = time.perf_counter()
+            self.step(self.screen)
+            times.append((time.perf_counter() - start) * 1000)
+
+        # Pasada instrumentada (no medida): asignaciones y blits por frame
+        blocks = []
+        peaks = []
+        screen = self.counting_screen
+        screen.blit_count = 0
+        tracemalloc.start()
+        for frame in range(self.warmup + self.frames, self.warmup + 2 * self.frames):
+            script(frame)
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            self.step(screen)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            peaks.append((peak - current) / 1024)
+            blocks.append(sum(stat.count_diff for stat in after.compare_to(before, "lineno") if stat.count_diff > 0))
+        tracemalloc.stop()
+
+        times.sort()
+        blocks.sort()
+        peaks.sort()
+        return {
+            "scene": type(self.game.current_scene).__name__,
+            "frames": self.frames,
+            "p50_ms": round(percentile(times, 50), 3),
+            "p95_ms": round(percentile(times, 95), 3),
+            "p99_ms": round(percentile(times, 99), 3),
+            "mean_ms": round(sum(times) / len(times), 3),
+            "max_ms": round(times[-1], 3),
+            "alloc_blocks_per_frame": round(sum(blocks) / len(blocks), 2),
+            "alloc_blocks_p95": percentile(blocks, 95),
+            "alloc_peak_kb_per_frame": round(sum(peaks) / len(peaks), 2),
+            "alloc_peak_kb_p95": round(percentile(peaks, 95), 2),
+            "blits_per_frame": round(screen.blit_count / self.frames, 2),
+        }
+
+    # Cada enter_<escena> deja el juego en la escena y devuelve el script de entrada por frame
+
+    def enter_menu(self):
+        self.game.goto_scene("menu")
+        return lambda frame: post_motion(sweep((0, 0, game.WIDTH, game.HEIGHT), frame, step=23))
+
+    def enter_intro(self):
+        self.game.goto_scene("intro")
+        return lambda frame: None
+
+    def enter_setup(self):
+        self.game.goto_scene("setup")
+        scene = self.game.current_scene
+        randomize = scene.ui.buttons["randomize"]["rect"].center
+
+        def script(frame):
+            if frame == 0:
+                post_click(randomize)
+            else:
+                # La cuadrícula conoce su posición después del primer frame dibujado
+                post_motion(sweep(grid_rect(scene.grid), frame))
+        return script
+
+    def enter_match(self):
+        # Llegar a la partida como un jugador: barcos aleatorios y "Comenzar"
+        self.game.goto_scene("setup")
+        setup = self.game.current_scene
+        post_click(setup.ui.buttons["randomize"]["rect"].center)
+        self.step(self.screen)
+        post_click(setup.ui.buttons["start"]["rect"].center)
+        self.step(self.screen)
+
+        # Poblar el tablero enemigo jugando algunos turnos (no se mide)
+        scene = self.game.scenes["match"]
+        cells = [(i, j) for i in range(scene.gridA.size[0]) for j in range(scene.gridA.size[1])]
+        random.shuffle(cells)
+        for i, j in cells[:self.turns]:
+            if self.game.current_scene is not scene:
+                break
+            post_click(scene.gridA.screen_rect(i, j).center)
+            self.step(self.screen)
+            post_key(pg.K_SPACE)
+            self.step(self.screen)
+            # La respuesta llega en segundo plano: seguir dibujando hasta aplicarla
+            deadline = time.perf_counter() + game.BACKEND_TIMEOUT
+            while scene.pending_turn is not None and time.perf_counter() < deadline:
+                self.step(self.screen)
+
+        rect = grid_rect(scene.gridA)
+        return lambda frame: post_motion(sweep(rect, frame))
+
+    def enter_history(self):
+        self.game.goto_scene("history")
+        scene = self.game.current_scene
+
+        # Filas sintéticas con el mismo formato que entrega listaHistorial
+        rows = [[f"{i:05x}", f"jugador{i % 97}", "Si" if i % 3 else "No", random.randint(0, 5000)]
+                for i in range(self.rows)]
+        rows.sort(key=lambda x: x[3], reverse=True)
+        scene.table_data = rows
+        scene.table.set_rows(rows)
+        table_rect = scene.table.rect
+
+        def script(frame):
+            # Bajar hasta el final y volver a subir, con el mouse sobre las filas
+            direction = -1 if (frame // 200) % 2 == 0 else 1
+            pg.event.post(pg.event.Event(pg.MOUSEWHEEL, x=0, y=direction, flipped=False))
+            post_motion(sweep(table_rect, frame, step=13))
+        return script
+
+    def enter_victory(self):
+        self.game.goto_scene("victory")
+        return lambda frame: None
+
+    def close(self):
+        scene = self.game.current_scene
+        backend = getattr(scene, "backend", None)
+        if backend is not None:
+            backend.close()
+        self.game.backends.shutdown()
+        pg.quit()
+
+def compare(results, baseline):
+    """Agregar a cada escena la variación de p50/p95 respecto a un resultado anterior"""
+    for name, result in results["scenes"].items():
+        base = baseline.get("scenes", {}).get(name)
+        if not base or "p50_ms" not in base or "p50_ms" not in result:
+            continue
+        result["baseline"] = {
+            key: {"before": base[key], "change_pct": round((result[key] - base[key]) / base[key] * 100, 1)}
+            for key in ("p50_ms", "p95_ms", "p99_ms") if base.get(key)
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tiempo por frame de cada escena (sin ventana)")
+    parser.add_argument("--frames", type=int, default=600, help="frames medidos por escena")
+    parser.add_argument("--warmup", type=int, default=60, help="frames previos sin medir")
+    parser.add_argument("--rows", type=int, default=10000, help="filas sintéticas del historial")
+    parser.add_argument("--turns", type=int, default=30, help="turnos jugados antes de medir la partida")
+    parser.add_argument("--scenes", default=",".join(SCENES), help="escenas a medir, separadas por coma")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="archivo JSON de salida (por defecto, la salida estándar)")
+    parser.add_argument("--baseline", help="resultado JSON anterior con el que comparar")
+    args = parser.parse_args()
+
+    scenes = [name for name in args.scenes.split(",") if name]
+    unknown = [name for name in scenes if name not in SCENES]
+    if unknown:
+        parser.error(f"escenas desconocidas: {', '.join(unknown)}")
+
+    random.seed(args.seed)
+    cwd = os.getcwd()
+    workdir, backend = prepare_workdir()
+    os.chdir(workdir)
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pg.version.ver,
+            "numpy": game.np is not None,
+            "platform": platform.platform(),
+            "video_driver": os.environ["SDL_VIDEODRIVER"],
+            "frames": args.frames,
+            "warmup": args.warmup,
+            "rows": args.rows,
+            "turns": args.turns,
+            "backend": backend,
+        },
+        "scenes": {},
+    }
+
+    bench = Benchmark(args.frames, args.warmup, args.rows, args.turns)
+    try:
+        for name in scenes:
+            if name in BACKEND_SCENES and not backend:
+                results["scenes"][name] = {"skipped": "main.exe no disponible"}
+                continue
+            results["scenes"][name] = bench.run_scene(name)
+            print(f"{name}: p50 {results['scenes'][name]['p50_ms']} ms", file=sys.stderr)
+    finally:
+        bench.close()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results["assets"] = bench.game.assets.load_timings()
+    results["backend"] = [{"event": event, "ms": round(ms, 2)} for event, ms in bench.game.backends.timings]
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,80 @@ import pygame as pg
 import uuid
 import os
 import shutil
+import sqlite3
 import subprocess
 import random
 import math
 import sys
+import time
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: el sistema de partículas usa `array` sin él
+    np = None
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow es opcional: sin él de un GIF solo se carga el primer frame
+    Image = None
+
+from backend import BackendError, BackendManager, BackendTimeout
+from archive import Archive
+from history_index import HistoryIndex
+from telemetry import DEFAULT_PATH as METRICS_PATH, TurnMetrics
+from protocol import (ATTACK, DEFEAT, END, OBJECT, OBJECT_NAMES, STATE, TORPEDO, VICTORY,
+                      Attack, UseObject, encode_config, encode_turn, read_moves)
 
 WIDTH = 1280
 HEIGHT = 720
 
 DEV = False
 
+# Pasos de simulación por segundo; las animaciones avanzan con el tiempo, no con los frames dibujados
+TICK_RATE = 60
+MAX_FRAME_TIME = 0.25  # Segundos de atraso que se recuperan como máximo en un frame
+
+# Ciclo horneado del fondo de olas (0 = animación normal)
+WAVE_CYCLE_FRAMES = 0
+WAVE_CYCLE_STEP = 6  # Frames que se muestra cada paso horneado
+WAVE_CYCLE_MB = 256  # Memoria máxima del ciclo
+
+# Fondo de mar animado (sea.gif) en vez de las olas; se activa con --sea
+SEA_FILE = "assets/anim/sea.gif"
+SEA_MAX_MB = 256  # Memoria máxima de los frames decodificados; si no alcanza se saltan frames
+
 GRID_SIZE = (10, 10)
 
+BACKEND_TIMEOUT = 5.0  # Segundos que puede tardar el backend en responder un turno
+BACKEND_DIED = pg.USEREVENT + 1  # Evento que se publica cuando el backend termina inesperadamente
+MATCH_SAVED = pg.USEREVENT + 2  # El backend de una partida terminada salió: ya está en data/list.txt
+
+def post_event(event_type, **attributes):
+    """Publicar un evento desde otro hilo (se descarta si pygame ya se cerró)"""
+    try:
+        pg.event.post(pg.event.Event(event_type, **attributes))
+    except pg.error:
+        pass
+
+def merge_rects(rects):
+    """Unir los rectángulos que se solapan para presentar la menor cantidad de regiones"""
+    merged = []
+    for rect in rects:
+        rect = pg.Rect(rect)
+        i = 0
+        while i < len(merged):
+            if merged[i].colliderect(rect):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
+
 class Grid:
 
     cell_color = (10, 70, 135)
@@ -36,30 +98,87 @@ class Grid:
         
         # Add state grid to track cell states (hit/miss)
         self.state_grid = [[0 for _ in range(self.size[1])] for _ in range(self.size[0])]
+
+        # Capas del tablero cacheadas: solo se reconstruyen al invalidarse
+        self.layers = {}
+        self.dirty_layers = set()
+        self.frame_surface = None
+        self.last_overlay_state = None
+
+    def invalidate(self, *names):
+        """Marcar capas para reconstruir en el próximo frame (todas si no se indica ninguna)"""
+        self.dirty_layers.update(names or self.layers.keys())
+
+    def get_layer(self, name, builder):
+        """Devolver la capa `name`, reconstruyéndola con `builder` solo si está sucia"""
+        surf = self.layers.get(name)
+        if surf is not None and name not in self.dirty_layers:
+            return surf
+
+        if surf is None:
+            surf = pg.Surface((self.grid_width, self.grid_height), pg.SRCALPHA)
+            self.layers[name] = surf
+        else:
+            surf.fill((0, 0, 0, 0))
+
+        builder(surf)
+        self.dirty_layers.discard(name)
+        return surf
+
+    def frame_rect(self):
+        """Rectángulo en pantalla que ocupa la cuadrícula con su marco"""
+        x = int(self.start_pos.x) - 10
+        y = int(self.start_pos.y) - 10
+        return pg.Rect(x, y, self.grid_width + 20, self.grid_height + 20)
+
+    def cell_rect(self, i, j):
+        """Rectángulo de la celda (i, j) relativo a la cuadrícula"""
+        w = self.cell_size + self.margin
+        s = self.cell_size
+        return pg.Rect(i * w, j * w, s, s)
+
+    def screen_rect(self, i, j):
+        """Rectángulo de la celda (i, j) en coordenadas de pantalla"""
+        return self.cell_rect(i, j).move(int(self.start_pos.x), int(self.start_pos.y))
+
+    def cell_at(self, pos):
+        """Celda bajo una posición de pantalla, o None si cae fuera o en un margen"""
+        w = self.cell_size + self.margin
+        x = math.floor(pos[0] - self.start_pos.x)
+        y = math.floor(pos[1] - self.start_pos.y)
+        if x < 0 or y < 0:
+            return None
+
+        i, dx = divmod(x, w)
+        j, dy = divmod(y, w)
+        if i >= self.size[0] or j >= self.size[1] or dx >= self.cell_size or dy >= self.cell_size:
+            return None
+        return (i, j)
         
     def mark_cell(self, x, y, value):
         """Mark a cell as hit or miss and update visual representation"""
         self.state_grid[y][x] = value
+        self.invalidate("state")
         
         # Play sound if it's a hit (negative value indicates hit)
         if value < 0:
-            destroy_sound = self.scene.game.assets.audio["sfx"]["destroy"]
-            destroy_sound.play()
+            self.scene.game.sfx.play("destroy")
         
     def draw_grid_frame(self, screen):
-        frame_surface = pg.Surface((self.grid_width + 20, self.grid_height + 20), pg.SRCALPHA)
-        frame_color = (0, 0, 0, 80)
-        frame_rect = pg.Rect(0, 0, self.grid_width + 20, self.grid_height + 20)
-        pg.draw.rect(frame_surface, frame_color, frame_rect, border_radius=15)
-        screen.blit(frame_surface, (self.start_pos.x - 10, self.start_pos.y - 10))
+        if self.frame_surface is None:
+            self.frame_surface = pg.Surface((self.grid_width + 20, self.grid_height + 20), pg.SRCALPHA)
+            frame_color = (0, 0, 0, 80)
+            frame_rect = pg.Rect(0, 0, self.grid_width + 20, self.grid_height + 20)
+            pg.draw.rect(self.frame_surface, frame_color, frame_rect, border_radius=15)
+        screen.blit(self.frame_surface, (self.start_pos.x - 10, self.start_pos.y - 10))
     
-    def draw_boat(self, screen, boat, is_preview=False):
+    def draw_boat(self, screen, boat, is_preview=False, offset=(0, 0)):
         
         padding = 4
 
         x0, y0 = boat['pos']
-        x = x0 * (self.cell_size + self.margin) + padding
-        y = y0 * (self.cell_size + self.margin) + padding
+        x = x0 * (self.cell_size + self.margin) + padding + offset[0]
+        y = y0 * (self.cell_size + self.margin) + padding + offset[1]
 
         long = boat['size'] * (self.cell_size + self.margin) - padding * 2 - self.margin
         short = self.cell_size - padding * 2
@@ -75,24 +194,27 @@ class Grid:
         
         # Dibujar la superficie del barco en la pantalla
         screen.blit(boat_surf, boat_rect)
-    
-    def draw_cell(self, screen, i, j):
-        w = self.cell_size + self.margin
-        s = self.cell_size
-        rect = pg.Rect(i * w, j * w, s, s)
-        mouse_pos = pg.mouse.get_pos() - self.start_pos
-        color = self.hover_color if rect.collidepoint(mouse_pos) else self.cell_color
-        pg.draw.rect(screen, color, rect, border_radius=5)
-        return rect
+
+    def draw_cells(self, surf):
+        """Capa estática con todas las celdas"""
+        n, m = self.size
+        for i in range(n):
+            for j in range(m):
+                pg.draw.rect(surf, self.cell_color, self.cell_rect(i, j), border_radius=5)
+
+    def draw_boats(self, surf):
+        """Capa con los barcos colocados"""
+        for boat in self.boats:
+            if boat['pos'] is not None:
+                self.draw_boat(surf, boat)
     
     def draw(self, surf):
-        # Draw hit/miss indicators on the grid
+        """Capa de impactos (hit/miss)"""
         n, m = self.size
+        broken_img = None
         for i in range(n):
             for j in range(m):
-                w = self.cell_size + self.margin
-                s = self.cell_size
-                rect = pg.Rect(i * w, j * w, s, s)
+                rect = self.cell_rect(i, j)
                 
                 # Draw darker box for misses (value = 99)
                 if self.state_grid[i][j] == 99:
@@ -100,10 +222,26 @@ class Grid:
                 
                 # Draw broken image for hits (negative values)
                 if self.state_grid[i][j] < 0:
-                    broken_img = self.scene.game.assets.images["broken"]
-                    broken_img = pg.transform.smoothscale(broken_img, (s, s))
+                    if broken_img is None:
+                        broken_img = self.scene.game.assets.get_scaled("broken", rect.size)
                     surf.blit(broken_img, rect)
 
+    def draw_cell(self, screen, i, j):
+        """Overlay de la celda bajo el mouse (se dibuja debajo de los barcos)"""
+        pg.draw.rect(screen, self.hover_color, self.screen_rect(i, j), border_radius=5)
+
+    def draw_overlay(self, screen, hover_cell):
+        """Marcadores que cambian cada frame, dibujados sobre las capas cacheadas"""
+        pass
+
+    def draw_fog(self, screen):
+        """Niebla sobre las casillas sin revelar (solo en la cuadrícula enemiga)"""
+        pass
+
+    def overlay_state(self, hover_cell):
+        """Estado visible de los overlays; si cambia, la cuadrícula se reporta como sucia"""
+        return hover_cell
+
     def update(self, screen, center_x, center_y):
 
         self.preview_pos = None
@@ -115,21 +253,24 @@ class Grid:
         # Dibujar el marco de la cuadrícula primero (detrás de la cuadrícula)
         self.draw_grid_frame(screen)
 
-        grid_surf = pg.Surface((self.grid_width, self.grid_height), pg.SRCALPHA)
+        layers_changed = bool(self.dirty_layers)
+        screen.blit(self.get_layer("cells", self.draw_cells), self.start_pos)
 
-        n, m = self.size
-        # Dibujar celdas
-        for i in range(n):
-            for j in range(m):
-                self.draw_cell(grid_surf, i, j)
+        hover_cell = self.cell_at(self.scene.game.event_manager.mouse_pos)
+        if hover_cell is not None:
+            self.draw_cell(screen, *hover_cell)
 
-        # Dibujar barcos después de la cuadrícula
-        for boat in self.boats:
-            if boat['pos'] is not None:
-                self.draw_boat(grid_surf, boat)
+        # Dibujar barcos e impactos después de las celdas
+        screen.blit(self.get_layer("boats", self.draw_boats), self.start_pos)
+        screen.blit(self.get_layer("state", self.draw), self.start_pos)
+
+        self.draw_fog(screen)
+        self.draw_overlay(screen, hover_cell)
 
-        self.draw(grid_surf)
-        screen.blit(grid_surf, self.start_pos)
+        overlay_state = self.overlay_state(hover_cell)
+        if layers_changed or overlay_state != self.last_overlay_state:
+            self.scene.game.mark_dirty(self.frame_rect())
+        self.last_overlay_state = overlay_state
 
 class SetupGrid(Grid):
     
@@ -139,61 +280,72 @@ class SetupGrid(Grid):
     def add_boat(self, boat):
         boat['id'] = len(self.boats) + 1
         self.boats.append(boat)
+        self.invalidate("boats")
         self.preview_boat = None
         self.preview_pos = None
 
+    def clear_boats(self):
+        self.boats = []
+        self.invalidate("boats")
+
     def preview(self, boat):
         self.preview_boat = boat
         if 'direction' not in self.preview_boat:
             self.preview_boat['direction'] = 'h'  # Por defecto horizontal si no está establecido
 
-    def draw_cell(self, screen, i, j):
-        rect = super().draw_cell(screen, i, j)
+    def draw_overlay(self, screen, hover_cell):
+        if not self.preview_boat or hover_cell is None:
+            return
 
-        mouse_pos = pg.mouse.get_pos() - self.start_pos
-        w = self.cell_size + self.margin
-        s = self.cell_size
-        rect = pg.Rect(i * w, j * w, s, s)
+        i, j = hover_cell
 
-        if self.preview_boat and rect.collidepoint(mouse_pos):
-            # Verificar si el barco excedería los límites de la cuadrícula
-            boat_size = self.preview_boat['size']
-            direction = self.preview_boat.get('direction', 'h')
+        # Verificar si el barco excedería los límites de la cuadrícula
+        boat_size = self.preview_boat['size']
+        direction = self.preview_boat.get('direction', 'h')
+        
+        # Verificar si el barco cabe en la dirección actual, si no, probar la otra dirección
+        if direction == 'h' and i + boat_size > self.size[0]:
+            direction = 'v'
+        elif direction == 'v' and j + boat_size > self.size[1]:
+            direction = 'h'
+        self.preview_boat['direction'] = direction
             
-            # Verificar si el barco cabe en la dirección actual, si no, probar la otra dirección
-            if direction == 'h' and i + boat_size > self.size[0]:
-                direction = 'v'
-            elif direction == 'v' and j + boat_size > self.size[1]:
-                direction = 'h'
-            self.preview_boat['direction'] = direction
-                
-            # Establecer posición de vista previa si el barco cabe en cualquier dirección
-            if (direction == 'h' and i + boat_size <= self.size[0]) or \
-               (direction == 'v' and j + boat_size <= self.size[1]):
-                self.preview_boat['direction'] = direction
-                self.preview_pos = (i, j)
-
-    def draw(self, grid_surf):
-         # Dibujar barco de vista previa si tenemos una posición
-        if self.preview_boat and self.preview_pos:
+        # Establecer posición de vista previa si el barco cabe en cualquier dirección
+        if (direction == 'h' and i + boat_size <= self.size[0]) or \
+           (direction == 'v' and j + boat_size <= self.size[1]):
+            self.preview_pos = (i, j)
+
+        # Dibujar barco de vista previa si tenemos una posición
+        if self.preview_pos:
             preview_boat = self.preview_boat.copy()
             preview_boat['pos'] = self.preview_pos
-            # Asegurar que la dirección esté establecida
-            if 'direction' not in preview_boat:
-                preview_boat['direction'] = 'h'
-            self.draw_boat(grid_surf, preview_boat, is_preview=True)
+            offset = (int(self.start_pos.x), int(self.start_pos.y))
+            self.draw_boat(screen, preview_boat, is_preview=True, offset=offset)
+
+    def overlay_state(self, hover_cell):
+        boat = self.preview_boat
+        return (hover_cell, self.preview_pos, boat and (boat['size'], boat['direction']))
 
 class EnemyGrid(Grid):
 
+    fog_count = 40  # Nubes sobre el tablero
+    fog_alpha = 120
+    fog_speed = (0.04, 0.12)  # Deriva de cada nube, en px por paso de simulación
+    fog_threshold = 2  # px que debe avanzar la niebla para recomponer la capa
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.selected_target = None
-        self.target_img = self.scene.game.assets.images["target"]
+
+        # Nubes de niebla; se crean cuando el asset termina de cargarse
+        self.fog_clouds = None
+        self.fog_layer = None
+        self.fog_frame = 0
 
         target_size = int(self.cell_size * 0.8)
         dim = (target_size, target_size)
-        self.target_img = pg.transform.smoothscale(self.target_img, dim)
+        self.target_img = self.scene.game.assets.get_scaled("target", dim)
 
         self.state_grid = [[0 for _ in range(self.size[1])] for _ in range(self.size[0])]
         
@@ -201,6 +353,8 @@ class EnemyGrid(Grid):
         self.selected_object = None
         # Orientación manual para torpedo (6: horizontal, 7: vertical)
         self.torpedo_orientation = 6
+        # Tamaño de cada barco enemigo por id (el bot copia los del jugador): para saber cuándo se hunde
+        self.boat_sizes = {}
 
     def set_selected_object(self, object_name):
         self.selected_object = object_name    
@@ -220,52 +374,103 @@ class EnemyGrid(Grid):
 
     def handle_click(self, pos):
         # Convertir posición del mouse a índices de celda de la cuadrícula
-        mouse_vec = pg.Vector2(pos) - self.start_pos
-        for i in range(self.size[0]):
-            for j in range(self.size[1]):
-                w = self.cell_size + self.margin
-                s = self.cell_size
-                rect = pg.Rect(i * w, j * w, s, s)
-                if rect.collidepoint(mouse_vec):
-                    self.selected_target = (i, j)
-                    return
+        cell = self.cell_at(pos)
+        if cell is not None:
+            self.selected_target = cell
 
     def clear_target(self):
         self.selected_target = None
 
-    def draw_state(self, screen, x, y):
-
-        screen_middle = pg.Vector2(x, y)
-        grid_middle = pg.Vector2(self.grid_width // 2, self.grid_height // 2)
-        self.start_pos = screen_middle - grid_middle
-
-        # Draw the grid frame first (behind the grid)
-        self.draw_grid_frame(screen)
+    def init_fog(self):
+        """Repartir nubes de la hoja fog-cloud sobre el tablero, con tamaño y velocidad al azar"""
+        sprites = []
+        for cloud in self.scene.game.assets.fog:
+            # Las nubes de la hoja son verticales; acostadas derivan mejor a lo ancho
+            cloud = pg.transform.rotate(cloud, 90)
+            width = int(self.cell_size * random.uniform(1.6, 2.6))
+            height = max(1, int(width * cloud.get_height() / cloud.get_width()))
+            sprite = pg.transform.smoothscale(cloud, (width, height))
+            sprite.set_alpha(self.fog_alpha)
+            sprites.append(sprite)
+
+        self.fog_clouds = []
+        for _ in range(self.fog_count):
+            sprite = random.choice(sprites)
+            self.fog_clouds.append({
+                "sprite": sprite,
+                "x": random.uniform(0, self.grid_width + sprite.get_width()),
+                "y": random.uniform(-sprite.get_height() / 2, self.grid_height - sprite.get_height() / 2),
+                "speed": random.uniform(*self.fog_speed),
+            })
+        self.fog_max_speed = max(cloud["speed"] for cloud in self.fog_clouds)
+        self.invalidate("fog")
+
+    def draw_fog_layer(self, surf):
+        """Capa de niebla: las nubes en su posición actual, sin tapar las casillas reveladas"""
+        self.fog_frame = self.scene.game.frame
+        for cloud in self.fog_clouds:
+            sprite = cloud["sprite"]
+            span = self.grid_width + sprite.get_width()
+            x = (cloud["x"] + cloud["speed"] * self.fog_frame) % span - sprite.get_width()
+            surf.blit(sprite, (int(x), int(cloud["y"])))
 
-        grid_surf = pg.Surface((self.grid_width, self.grid_height), pg.SRCALPHA)
+        n, m = self.size
+        clear = (0, 0, 0, 0)
+        for i in range(n):
+            for j in range(m):
+                if self.state_grid[i][j] != 0:
+                    surf.fill(clear, self.cell_rect(i, j).inflate(self.margin * 2, self.margin * 2))
 
+    def draw_fog(self, screen):
+        if self.fog_clouds is None:
+            if not self.scene.game.assets.ready("fog"):
+                return
+            self.init_fog()
+
+        # La capa cacheada solo se recompone al revelar casillas o cuando la niebla avanzó lo suficiente
+        if (self.scene.game.frame - self.fog_frame) * self.fog_max_speed >= self.fog_threshold:
+            self.invalidate("fog")
+        if "fog" in self.dirty_layers:
+            self.scene.game.mark_dirty(self.frame_rect())
+            # Con RLE el blit se salta lo transparente, pero modificarla es caro:
+            # se compone en la capa normal y se codifica una copia
+            self.fog_layer = self.get_layer("fog", self.draw_fog_layer).copy()
+            self.fog_layer.set_alpha(255, pg.RLEACCEL)
+
+        screen.blit(self.fog_layer, self.start_pos)
+
+    def draw_revealed(self, surf):
+        """Capa con las casillas reveladas del enemigo"""
         n, m = self.size
-        # Dibujar celdas
+        broken_img = None
         for i in range(n):
             for j in range(m):
-                w = self.cell_size + self.margin
-                s = self.cell_size
-                rect = pg.Rect(i * w, j * w, s, s)
+                rect = self.cell_rect(i, j)
                 
                 if self.state_grid[i][j] == 99:
-                    pg.draw.rect(grid_surf, (10, 70, 135), rect)
+                    pg.draw.rect(surf, (10, 70, 135), rect)
 
                 if self.state_grid[i][j] < 0:
                     # dibujar imagen de roto
-                    broken_img = self.scene.game.assets.images["broken"]
-                    broken_img = pg.transform.smoothscale(broken_img, (s, s))
-                    grid_surf.blit(broken_img, rect)
+                    if broken_img is None:
+                        broken_img = self.scene.game.assets.get_scaled("broken", rect.size)
+                    surf.blit(broken_img, rect)
+
+    def draw_state(self, screen, x, y):
+
+        screen_middle = pg.Vector2(x, y)
+        grid_middle = pg.Vector2(self.grid_width // 2, self.grid_height // 2)
+        self.start_pos = screen_middle - grid_middle
+
+        # Draw the grid frame first (behind the grid)
+        self.draw_grid_frame(screen)
+
+        screen.blit(self.get_layer("revealed", self.draw_revealed), self.start_pos)
 
         # Dibujar objetos colocados
-        self.draw_placed_objects(grid_surf)
-        screen.blit(grid_surf, self.start_pos)
+        self.draw_placed_objects(screen)
 
-    def draw_placed_objects(self, grid_surf):
+    def draw_placed_objects(self, screen):
         """Dibujar objetos que han sido colocados en la cuadrícula"""
         if not hasattr(self.scene, 'placed_objects'):
             return
@@ -274,124 +479,106 @@ class EnemyGrid(Grid):
             x, y = obj['x'], obj['y']
             object_name = obj['object_name']
             
-            # Calcular posición en la superficie de la cuadrícula
-            w = self.cell_size + self.margin
-            s = self.cell_size
-            rect = pg.Rect(x * w, y * w, s, s)
+            # Calcular posición de la celda en pantalla
+            rect = self.screen_rect(x, y)
             
             # Obtener imagen del objeto
-            obj_img = self.scene.game.assets.images[object_name]
             obj_size = int(self.cell_size * 0.6)
-            scaled_obj = pg.transform.smoothscale(obj_img, (obj_size, obj_size))
+            scaled_obj = self.scene.game.assets.get_scaled(object_name, (obj_size, obj_size))
             
             # Centrar la imagen del objeto en la celda
             obj_rect = scaled_obj.get_rect(center=rect.center)
-            grid_surf.blit(scaled_obj, obj_rect)
+            screen.blit(scaled_obj, obj_rect)
 
             if object_name == 'torpedo':
-
-                orientation = obj['orientation']
-
-                circle_radius = 3
-                circle_color = (255, 0, 0)
-                max_i = self.size[0] - 1
-                max_j = self.size[1] - 1
-                # Horizontal
-                if orientation == 6:
-                    if x == 0:  # left border, points right
-                        circle_x = rect.right - circle_radius - 2
-                        circle_y = rect.centery
-                        pg.draw.circle(grid_surf, circle_color, (circle_x, circle_y), circle_radius)
-                    elif x == max_i:  # right border, points left
-                        circle_x = rect.left + circle_radius + 2
-                        circle_y = rect.centery
-                        pg.draw.circle(grid_surf, circle_color, (circle_x, circle_y), circle_radius)
-                # Vertical
-                elif orientation == 7:
-                    if y == 0:  # top border, points down
-                        circle_x = rect.centerx
-                        circle_y = rect.bottom - circle_radius - 2
-                        pg.draw.circle(grid_surf, circle_color, (circle_x, circle_y), circle_radius)
-                    elif y == max_j:  # bottom border, points up
-                        circle_x = rect.centerx
-                        circle_y = rect.top + circle_radius + 2
-                        pg.draw.circle(grid_surf, circle_color, (circle_x, circle_y), circle_radius)
+                self.draw_torpedo_direction(screen, rect, x, y, obj['orientation'])
+
+    def draw_torpedo_direction(self, screen, rect, i, j, orientation):
+        """Dibujar el círculo que indica hacia dónde avanza el torpedo"""
+        circle_radius = 3
+        circle_color = (255, 0, 0)
+        max_i = self.size[0] - 1
+        max_j = self.size[1] - 1
+        # Horizontal
+        if orientation == 6:
+            if i == 0:  # left border, points right
+                circle_x = rect.right - circle_radius - 2
+                circle_y = rect.centery
+                pg.draw.circle(screen, circle_color, (circle_x, circle_y), circle_radius)
+            elif i == max_i:  # right border, points left
+                circle_x = rect.left + circle_radius + 2
+                circle_y = rect.centery
+                pg.draw.circle(screen, circle_color, (circle_x, circle_y), circle_radius)
+        # Vertical
+        elif orientation == 7:
+            if j == 0:  # top border, points down
+                circle_x = rect.centerx
+                circle_y = rect.bottom - circle_radius - 2
+                pg.draw.circle(screen, circle_color, (circle_x, circle_y), circle_radius)
+            elif j == max_j:  # bottom border, points up
+                circle_x = rect.centerx
+                circle_y = rect.top + circle_radius + 2
+                pg.draw.circle(screen, circle_color, (circle_x, circle_y), circle_radius)
 
     def update_cell(self, x, y, value):
+        hit = value < 0 and self.state_grid[x][y] != value
         self.state_grid[x][y] = value
+        self.invalidate("state", "revealed", "fog")
 
         if value < 0:
             # reproducir sonido de destrucción
-            destroy_sound = self.scene.game.assets.audio["sfx"]["destroy"]
-            destroy_sound.play()
+            self.scene.game.sfx.play("destroy")
 
-    def draw_cell(self, screen, i, j):
-        super().draw_cell(screen, i, j)
-        
+        if hit:
+            particles = self.scene.particles
+            center = self.screen_rect(x, y).center
+            particles.burst(*center, 25, 2.5, 30, self.scene.hit_colors)
+
+            # Hundido: todas las casillas del barco quedaron impactadas
+            cells = [(i, j) for i, column in enumerate(self.state_grid) for j, v in enumerate(column) if v == value]
+            if len(cells) == self.boat_sizes.get(-value):
+                for i, j in cells:
+                    particles.burst(*self.screen_rect(i, j).center, 30, 3.5, 45, self.scene.sink_colors)
+
+    def draw_overlay(self, screen, hover_cell):
         # Dibujar marcador de objetivo seleccionado
-        if self.selected_target == (i, j):
-            w = self.cell_size + self.margin
-            s = self.cell_size
-            rect = pg.Rect(i * w, j * w, s, s)
+        if self.selected_target is not None:
+            rect = self.screen_rect(*self.selected_target)
 
             # Centrar la imagen del objetivo en la celda
             img_rect = self.target_img.get_rect(center=rect.center)
             screen.blit(self.target_img, img_rect)
         
         # Dibujar marcador de objeto seleccionado solo en la posición del mouse
-        if self.selected_object:
-            w = self.cell_size + self.margin
-            s = self.cell_size
-            rect = pg.Rect(i * w, j * w, s, s)
+        if self.selected_object and hover_cell is not None:
+            i, j = hover_cell
+            rect = self.screen_rect(i, j)
+
+            # Obtener imagen del objeto seleccionado
+            obj_size = int(self.cell_size * 0.6)
+            scaled_obj = self.scene.game.assets.get_scaled(self.selected_object, (obj_size, obj_size))
             
-            # Verificar si el mouse está sobre esta celda
-            mouse_pos = pg.mouse.get_pos() - self.start_pos
-            if rect.collidepoint(mouse_pos):
-                # Obtener imagen del objeto seleccionado
-                obj_img = self.scene.game.assets.images[self.selected_object]
-                obj_size = int(self.cell_size * 0.6)
-                scaled_obj = pg.transform.smoothscale(obj_img, (obj_size, obj_size))
-                
-                # Centrar la imagen del objeto en la celda
-                obj_rect = scaled_obj.get_rect(center=rect.center)
-                screen.blit(scaled_obj, obj_rect)
+            # Centrar la imagen del objeto en la celda
+            obj_rect = scaled_obj.get_rect(center=rect.center)
+            screen.blit(scaled_obj, obj_rect)
 
-                # Dibujar círculo de orientación para torpedo en preview
-                if self.selected_object == 'torpedo':
-                    # Solo mostrar orientación si la posición es válida para torpedo
-                    if self.is_valid_torpedo_position(i, j):
-                        circle_radius = 3
-                        circle_color = (255, 0, 0)
+            # Dibujar círculo de orientación para torpedo en preview
+            # Solo mostrar orientación si la posición es válida para torpedo
+            if self.selected_object == 'torpedo' and self.is_valid_torpedo_position(i, j):
+                max_i = self.size[0] - 1
+                max_j = self.size[1] - 1
 
+                if i in [1, max_i - 1]:
+                    self.torpedo_orientation = 7
 
-                        max_i = self.size[0] - 1
-                        max_j = self.size[1] - 1
+                elif j in [1, max_j - 1]:
+                    self.torpedo_orientation = 6
 
-                        if i in [1, max_i - 1]:
-                            self.torpedo_orientation = 7
+                self.draw_torpedo_direction(screen, rect, i, j, self.torpedo_orientation)
 
-                        elif j in [1, max_j - 1]:
-                            self.torpedo_orientation = 6
-                        
-                        if self.torpedo_orientation == 6:  # Horizontal
-                            if i == 0:  # left border, points right
-                                circle_x = rect.right - circle_radius - 2
-                                circle_y = rect.centery
-                                pg.draw.circle(screen, circle_color, (circle_x, circle_y), circle_radius)
-                            elif i == max_i:  # right border, points left
-                                circle_x = rect.left + circle_radius + 2
-                                circle_y = rect.centery
-                                pg.draw.circle(screen, circle_color, (circle_x, circle_y), circle_radius)
-                        # Vertical
-                        elif self.torpedo_orientation == 7:
-                            if j == 0:  # top border, points down
-                                circle_x = rect.centerx
-                                circle_y = rect.bottom - circle_radius - 2
-                                pg.draw.circle(screen, circle_color, (circle_x, circle_y), circle_radius)
-                            elif j == max_j:  # bottom border, points up
-                                circle_x = rect.centerx
-                                circle_y = rect.top + circle_radius + 2
-                                pg.draw.circle(screen, circle_color, (circle_x, circle_y), circle_radius)
+    def overlay_state(self, hover_cell):
+        placed = len(getattr(self.scene, 'placed_objects', ()))
+        return (hover_cell, self.selected_target, self.selected_object, self.torpedo_orientation, placed)
 
 class ObjectPanel:
 
@@ -408,6 +595,7 @@ class ObjectPanel:
             'spyglass': {'id': 2, 'quantity': 1, 'image': assets.images["spyglass"], 'info': "Catalejo\nPuede ver una casilla adicional"},
             'torpedo': {'id': 3, 'quantity': 1, 'image': assets.images["torpedo"], 'info': "Torpedo\nEs lanzado en línea recta desde el borde para destruir la primera casilla que encuentre\nUso: Pulsa R para rotar"}
         }
+        self.last_quantities = None
         self.setup()
 
     def set_items(self, items):
@@ -422,6 +610,13 @@ class ObjectPanel:
         # Método base para manejar clics - puede ser sobrescrito por subclases
         pass
 
+    def report_dirty(self, x, y):
+        """Reportar el panel como región sucia cuando cambian las cantidades"""
+        quantities = tuple(item['quantity'] for item in self.items.values())
+        if quantities != self.last_quantities:
+            self.game.mark_dirty(pg.Rect(x, y, self.width, self.height))
+        self.last_quantities = quantities
+
     def update(self, screen, x, y):
         self.panel_x = x
         self.panel_y = y
@@ -458,18 +653,18 @@ class ObjectPanel:
 
             # Dibujar cantidad de usos restantes
             if item['quantity'] > 0:
-                font = pg.font.Font(None, 20)
-                quantity_text = font.render(str(item['quantity']), True, (255, 255, 255))
+                quantity_text = self.game.assets.render_text(str(item['quantity']), 20, (255, 255, 255))
                 # Posicionar en la esquina superior derecha de la caja
                 text_x = box_rect.right - quantity_text.get_width() - 5
                 text_y = box_rect.top + 5
                 surf.blit(quantity_text, (text_x, text_y))
 
-            mouse_relative_pos = pg.Vector2(pg.mouse.get_pos()) - pg.Vector2(x, y)
+            mouse_relative_pos = pg.Vector2(self.game.event_manager.mouse_pos) - pg.Vector2(x, y)
             if box_rect.collidepoint(mouse_relative_pos):
                 self.game.info_box.add_message(f"{item['info']}")
         
         screen.blit(surf, (x, y))
+        self.report_dirty(x, y)
 
 class SetupObjectPanel(ObjectPanel):
     def __init__(self, game, width, height):
@@ -488,21 +683,21 @@ class SetupObjectPanel(ObjectPanel):
         # Dibujar botón menos
         minus_rect = pg.Rect(x, y, w // 3, h)
         pg.draw.rect(screen, (7, 41, 77), minus_rect)
-        font = pg.font.Font(None, 20)
+        render_text = self.game.assets.render_text
 
-        minus_text = font.render("-", True, (255, 255, 255))
+        minus_text = render_text("-", 20, (255, 255, 255))
         minus_text_rect = minus_text.get_rect(center=minus_rect.center)
         screen.blit(minus_text, minus_text_rect)
         
         # Dibujar cantidad
-        quantity_text = font.render(str(quantity), True, (255, 255, 255))
+        quantity_text = render_text(str(quantity), 20, (255, 255, 255))
         q_rect = quantity_text.get_rect(center=selector_rect.center)
         screen.blit(quantity_text, q_rect)
         
         # Dibujar botón más
         plus_rect = pg.Rect(x + w - w // 3, y, w // 3, h)
         pg.draw.rect(screen, (7, 41, 77), plus_rect)
-        plus_text = font.render("+", True, (255, 255, 255))
+        plus_text = render_text("+", 20, (255, 255, 255))
         plus_text_rect = plus_text.get_rect(center=plus_rect.center)
         screen.blit(plus_text, plus_text_rect)
         
@@ -522,17 +717,14 @@ class SetupObjectPanel(ObjectPanel):
             if rects['minus'].collidepoint(local_pos):
                 if self.items[item_name]['quantity'] > 0:
                     self.items[item_name]['quantity'] -= 1
-                    hover_audio = self.game.assets.audio["sfx"]["hover"]
-                    hover_audio.play()
+                    self.game.sfx.play("hover")
                 else:
-                    deny_audio = self.game.assets.audio["sfx"]["deny"]
-                    deny_audio.play()
+                    self.game.sfx.play("deny")
                 return True  
                     
             elif rects['plus'].collidepoint(local_pos):
                 self.items[item_name]['quantity'] += 1
-                hover_audio = self.game.assets.audio["sfx"]["hover"]
-                hover_audio.play()
+                self.game.sfx.play("hover")
                 return True  
         
         return False 
@@ -571,7 +763,7 @@ class SetupObjectPanel(ObjectPanel):
             # Dibujar imagen del elemento
             surf.blit(item['surface'], (item_x, item_y))
 
-            mouse_relative_pos = pg.Vector2(pg.mouse.get_pos()) - pg.Vector2(x, y)
+            mouse_relative_pos = pg.Vector2(self.game.event_manager.mouse_pos) - pg.Vector2(x, y)
             if box_rect.collidepoint(mouse_relative_pos):
                 self.game.info_box.add_message(f"{item['info']}")
             
@@ -582,12 +774,190 @@ class SetupObjectPanel(ObjectPanel):
             self.draw_quantity_selector(surf, selector_pos, selector_size, item['quantity'], item_name)
         
         screen.blit(surf, (x, y))
+        self.report_dirty(x, y)
+
+class VirtualTable:
+    """Tabla con scroll que solo dibuja las filas visibles.
+
+    La ventana visible se calcula a partir de `scroll_y` sin recorrer las filas,
+    cada fila se pre-renderiza en una superficie de un pool pequeño que se recicla
+    al hacer scroll, y los clics se resuelven con aritmética sobre el índice.
+    """
+
+    bg_color = (10, 70, 135)
+    header_color = (13, 82, 154)
+    button_color = (13, 82, 154)
+    button_hover_color = (10, 100, 180)
+    button_size = (80, 30)
+
+    def __init__(self, game, rect, headers, column_widths, row_height, header_height=50,
+                 empty_text="No hay datos disponibles", button_text=None):
+        self.game = game
+        self.rect = pg.Rect(rect)
+        self.headers = headers
+        self.column_widths = column_widths
+        self.row_height = row_height
+        self.header_height = header_height
+        self.empty_text = empty_text
+        self.button_text = button_text  # Botón en la última columna de cada fila (opcional)
+
+        self.rows = []
+        self.scroll_y = 0
+        self.max_scroll_y = 0
+        self.scroll_speed = 20
+        self.last_state = None
+
+        # Área de datos (dentro de la tabla, bajo el encabezado)
+        self.data_rect = pg.Rect(self.rect.x + 10, self.rect.y + header_height + 10,
+                                 self.rect.width - 20, self.rect.height - header_height - 20)
+        self.data_surface = pg.Surface(self.data_rect.size)
+
+        # Pool de superficies de fila: (índice, hover) -> superficie
+        self.row_pool = OrderedDict()
+        self.pool_size = self.data_rect.height // row_height + 4
+
+    def set_rows(self, rows):
+        self.rows = rows
+        self.row_pool.clear()
+        if rows:
+            data_height = len(rows) * self.row_height
+            available_height = self.rect.height - self.header_height
+            self.max_scroll_y = max(0, data_height - available_height + 100)
+        else:
+            self.max_scroll_y = 0
+        self.scroll_y = min(self.scroll_y, self.max_scroll_y)
+
+    def handle_scroll(self, direction):
+        if direction > 0:  # Scroll hacia arriba
+            self.scroll_y = max(0, self.scroll_y - self.scroll_speed)
+        else:  # Scroll hacia abajo
+            self.scroll_y = min(self.max_scroll_y, self.scroll_y + self.scroll_speed)
+
+    def visible_range(self):
+        """Índices [first, last) de las filas dibujadas: las que empiezan dentro del área de datos"""
+        # La fila i se dibuja en y = (i + 1) * row_height - scroll_y
+        first = max(0, -(-self.scroll_y // self.row_height) - 1)
+        last = min(len(self.rows), (self.data_rect.height + self.scroll_y) // self.row_height)
+        return first, max(first, last)
+
+    def row_y(self, index):
+        return (index + 1) * self.row_height - self.scroll_y
+
+    def button_rect(self, index):
+        """Rectángulo del botón de la fila en coordenadas del área de datos"""
+        return pg.Rect(sum(self.column_widths[:-1]) + 20, self.row_y(index) + 5, *self.button_size)
+
+    def row_at(self, pos):
+        """Índice de la fila visible bajo una posición de pantalla, o None"""
+        if not self.data_rect.collidepoint(pos):
+            return None
+        index = (pos[1] - self.data_rect.y + self.scroll_y) // self.row_height - 1
+        first, last = self.visible_range()
+        return index if first <= index < last else None
+
+    def button_at(self, pos):
+        """Índice de la fila cuyo botón está bajo una posición de pantalla, o None"""
+        index = self.row_at(pos)
+        if index is None or self.button_text is None:
+            return None
+        local_pos = (pos[0] - self.data_rect.x, pos[1] - self.data_rect.y)
+        return index if self.button_rect(index).collidepoint(local_pos) else None
+
+    def get_row_surface(self, index, hovered):
+        key = (index, hovered)
+        surface = self.row_pool.get(key)
+        if surface is not None:
+            self.row_pool.move_to_end(key)
+            return surface
+
+        # Reciclar la superficie de la fila usada hace más tiempo
+        if len(self.row_pool) >= self.pool_size:
+            _, surface = self.row_pool.popitem(last=False)
+        else:
+            surface = pg.Surface((self.data_rect.width, self.row_height))
+        self.draw_row(surface, index, hovered)
+        self.row_pool[key] = surface
+        return surface
+
+    def draw_row(self, surface, index, hovered):
+        surface.fill(self.bg_color)
+        render_text = self.game.assets.render_text
+        x_offset = 20
+        for col_idx, cell_data in enumerate(self.rows[index]):
+            text = render_text(str(cell_data), 24, (255, 255, 255))
+            surface.blit(text, text.get_rect(midleft=(x_offset, self.row_height // 2)))
+            x_offset += self.column_widths[col_idx]
+
+        if self.button_text is not None:
+            button_rect = pg.Rect(sum(self.column_widths[:-1]) + 20, 5, *self.button_size)
+            color = self.button_hover_color if hovered else self.button_color
+            pg.draw.rect(surface, color, button_rect, border_radius=5)
+            text = render_text(self.button_text, 24, (255, 255, 255))
+            surface.blit(text, text.get_rect(center=button_rect.center))
+
+    def draw(self, screen):
+        # Dibujar fondo de la tabla y del encabezado
+        pg.draw.rect(screen, self.bg_color, self.rect, border_radius=10)
+        header_rect = pg.Rect(self.rect.x, self.rect.y, self.rect.width, self.header_height)
+        pg.draw.rect(screen, self.header_color, header_rect, border_radius=10)
+
+        # Dibujar encabezados
+        x_offset = self.rect.x + 20
+        for i, header in enumerate(self.headers):
+            text = self.game.assets.render_text(header, 28, (255, 255, 255))
+            screen.blit(text, text.get_rect(midleft=(x_offset, self.rect.y + self.header_height // 2)))
+            x_offset += self.column_widths[i]
+
+        # Dibujar línea separadora
+        separator_y = self.rect.y + self.header_height
+        pg.draw.line(screen, (255, 255, 255), (self.rect.x, separator_y), (self.rect.right, separator_y), 2)
+
+        data_surface = self.data_surface
+        data_surface.fill(self.bg_color)
+        if not self.rows:
+            no_data_text = self.game.assets.render_text(self.empty_text, 32, (255, 255, 255))
+            data_surface.blit(no_data_text, no_data_text.get_rect(center=data_surface.get_rect().center))
+        else:
+            hovered = self.button_at(self.game.event_manager.mouse_pos)
+            first, last = self.visible_range()
+            data_surface.blits([(self.get_row_surface(i, i == hovered), (0, self.row_y(i)))
+                                for i in range(first, last)], doreturn=False)
+
+        screen.blit(data_surface, self.data_rect)
+
+        if self.max_scroll_y > 0:
+            self.draw_scroll_indicator(screen)
+
+    def draw_scroll_indicator(self, screen):
+        """Dibujar el indicador de scroll en el lado derecho de la tabla"""
+        indicator_width = 8
+        indicator_x = self.rect.right - indicator_width - 5
+
+        # Calcular la altura y posición del indicador
+        total_height = len(self.rows) * self.row_height
+        visible_height = self.rect.height - self.header_height
+        indicator_height = max(20, (visible_height / total_height) * visible_height)
+
+        scroll_ratio = self.scroll_y / self.max_scroll_y if self.max_scroll_y > 0 else 0
+        indicator_y = self.rect.y + self.header_height + 10 + (scroll_ratio * (visible_height - indicator_height))
+
+        indicator_rect = pg.Rect(indicator_x, indicator_y, indicator_width, indicator_height)
+        pg.draw.rect(screen, (255, 255, 255, 150), indicator_rect, border_radius=4)
+
+    def report_dirty(self):
+        """Reportar la tabla como región sucia al hacer scroll o mover el mouse sobre ella"""
+        mouse_pos = self.game.event_manager.mouse_pos
+        state = (self.scroll_y, mouse_pos if self.rect.collidepoint(mouse_pos) else None)
+        if state != self.last_state:
+            self.game.mark_dirty(self.rect)
+        self.last_state = state
 
 class Scene:
 
     buttons = {}
     ui = None
     handle_click = None
+    reports_dirty_rects = False  # Si la escena reporta sus regiones sucias en vez de pedir un flip completo
 
     def __init__(self, game):
         self.game = game
@@ -595,6 +965,10 @@ class Scene:
     def setup(self):
         pass
 
+    def step(self):
+        """Avanzar la animación un paso de simulación (1 / TICK_RATE segundos)"""
+        pass
+
     def update(self, screen):
         pass
         
@@ -616,7 +990,35 @@ class Scene:
         # Blit the frame surface onto the screen
         screen.blit(frame_surface, (0, 0))
 
+class LoadingScene(Scene):
+    """Pantalla de progreso mientras se cargan los assets que necesita el menú"""
+
+    bar_size = (400, 16)
+
+    def setup(self, next_scene="menu"):
+        self.next_scene = next_scene
+
+    def update(self, screen):
+        assets = self.game.assets
+        if assets.ready(*assets.menu_assets):
+            self.game.goto_scene(self.next_scene)
+            return
+
+        text = assets.render_text("Cargando...", 40, (255, 255, 255))
+        screen.blit(text, text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 30)))
+
+        bar = pg.Rect((0, 0), self.bar_size)
+        bar.center = (WIDTH // 2, HEIGHT // 2 + 20)
+        pg.draw.rect(screen, (10, 70, 135), bar, border_radius=8)
+        fill = bar.copy()
+        fill.width = int(bar.width * assets.progress())
+        if fill.width:
+            pg.draw.rect(screen, (255, 255, 255), fill, border_radius=8)
+
 class MenuScene(Scene):
+
+    reports_dirty_rects = True
+
     def setup(self):
         self.ui = UIManager(self.game)
 
@@ -634,7 +1036,7 @@ class MenuScene(Scene):
         title_img = self.game.assets.images["title"]
         title_width = 400
         title_height = int(title_width * title_img.get_height() / title_img.get_width())
-        scaled_title = pg.transform.smoothscale(title_img, (title_width, title_height))
+        scaled_title = self.game.assets.get_scaled("title", (title_width, title_height))
         
         title_x = (WIDTH - title_width) // 2
         title_y = HEIGHT // 4 - title_height // 2
@@ -649,6 +1051,10 @@ class MenuScene(Scene):
 class TextScene(Scene):
     """Base class for scenes with typewriter text effects"""
 
+    def __init__(self, game):
+        super().__init__(game)
+        self.layouts = {}  # Párrafos ya envueltos por (texto, fuente, ancho)
+
     def setup(self):
         # Variables for the effect typewriter
         self.current_paragraph = 0
@@ -664,34 +1070,59 @@ class TextScene(Scene):
         self.text_box_y = HEIGHT - self.text_box_height - 100
         
         # Configuración del texto
-        self.font = pg.font.Font(None, 24)
+        self.font = self.game.assets.get_font(24)
         self.line_height = 30
         self.max_chars_per_line = 80
 
+        # Capa con las líneas ya escritas; solo crece mientras avanza el texto
+        self.text_layer = None
+        self.text_layer_cursor = None
+
         self.start()
 
     def wrap_text(self, text, max_width):
         """Envolver texto para que quepa en el ancho especificado"""
-        words = text.split(' ')
+        font = self.font
+        space_width = font.size(' ')[0]
         lines = []
         current_line = []
-        
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            test_width = self.font.size(test_line)[0]
-            
+        current_width = 0
+
+        for word in text.split(' '):
+            word_width = font.size(word)[0]
+            test_width = current_width + space_width + word_width if current_line else word_width
+
+            # La suma de anchos es exacta salvo por kerning; cerca del borde se mide la línea completa
+            if current_line and abs(test_width - max_width) <= 2:
+                test_width = font.size(' '.join(current_line + [word]))[0]
+
             if test_width <= max_width:
                 current_line.append(word)
+                current_width = test_width
             else:
                 if current_line:
                     lines.append(' '.join(current_line))
                 current_line = [word]
-        
+                current_width = word_width
+
         if current_line:
             lines.append(' '.join(current_line))
-        
+
         return lines
 
+    def layout(self, paragraph):
+        """Líneas envueltas de un párrafo y su total de caracteres, calculados una sola vez"""
+        max_width = self.text_box_width - 60
+        key = (paragraph, id(self.font), max_width)
+        layout = self.layouts.get(key)
+        if layout is None:
+            lines = self.wrap_text(paragraph, max_width) if paragraph else []
+            layout = self.layouts[key] = {
+                'lines': lines,
+                'total_chars': sum(len(line) for line in lines),
+            }
+        return layout
+
     def update_typewriter(self, texts):
         """Actualizar el efecto typewriter"""
         if self.finished_typing:
@@ -707,8 +1138,7 @@ class TextScene(Scene):
                     self.current_char = 0
                 else:
                     # Calcular el número total de caracteres en el párrafo actual
-                    lines = self.wrap_text(paragraph, self.text_box_width - 60)
-                    total_chars = sum(len(line) for line in lines)
+                    total_chars = self.layout(paragraph)['total_chars']
                     
                     if self.current_char < total_chars:
                         self.current_char += 1
@@ -726,52 +1156,65 @@ class TextScene(Scene):
         box_rect = pg.Rect(self.text_box_x, self.text_box_y, self.text_box_width, self.text_box_height)
         pg.draw.rect(screen, (10, 70, 135), box_rect, border_radius=10)
         
-        # Crear superficie para el texto con transparencia
-        text_surface = pg.Surface((self.text_box_width - 40, self.text_box_height - 40), pg.SRCALPHA)
-        
-        current_y = 0
-        
-        # Dibujar párrafos completos
-        for i in range(self.current_paragraph):
-            if i < len(texts):
-                paragraph = texts[i]
-                if paragraph == "":  # Línea vacía
-                    current_y += self.line_height // 2
-                else:
-                    lines = self.wrap_text(paragraph, self.text_box_width - 60)
-                    for line in lines:
-                        text = self.font.render(line, True, (255, 255, 255))
-                        text_surface.blit(text, (0, current_y))
-                        current_y += self.line_height
-        
-        # Dibujar párrafo actual con efecto typewriter
-        if self.current_paragraph < len(texts):
-            paragraph = texts[self.current_paragraph]
-            if paragraph == "":  # Línea vacía
-                current_y += self.line_height // 2
-            else:
-                lines = self.wrap_text(paragraph, self.text_box_width - 60)
-                chars_processed = 0
-                
-                for line in lines:
-                    # Calcular cuántos caracteres de esta línea mostrar
-                    line_length = len(line)
-                    chars_to_show = max(0, min(line_length, self.current_char - chars_processed))
-                    
-                    if chars_to_show > 0:
-                        display_text = line[:chars_to_show]
-                        text = self.font.render(display_text, True, (255, 255, 255))
-                        text_surface.blit(text, (0, current_y))
-                    
-                    chars_processed += line_length
-                    current_y += self.line_height
-        
-        # Dibujar la superficie de texto en el box
+        text_surface, current_y = self.update_text_layer(texts)
         screen.blit(text_surface, (self.text_box_x + 20, self.text_box_y + 20))
 
+        # Dibujar solo la línea que se está escribiendo (la siguiente a las de la capa)
+        paragraph, line, _ = self.text_layer_cursor
+        if paragraph == self.current_paragraph and paragraph < len(texts):
+            lines = self.layout(texts[paragraph])['lines']
+            if line < len(lines):
+                chars_to_show = self.current_char - sum(len(l) for l in lines[:line])
+                if chars_to_show > 0:
+                    text = self.font.render(lines[line][:chars_to_show], True, (255, 255, 255))
+                    screen.blit(text, (self.text_box_x + 20, self.text_box_y + 20 + current_y))
+
+    def update_text_layer(self, texts):
+        """Agregar a la capa de texto las líneas que terminaron de escribirse.
+
+        Devuelve la capa y la altura donde empieza la línea en curso.
+        """
+        size = (self.text_box_width - 40, self.text_box_height - 40)
+        # (párrafo, línea, y) de la próxima línea a dibujar en la capa
+        cursor = self.text_layer_cursor
+        if (self.text_layer is None or self.text_layer.get_size() != size
+                or cursor is None or cursor[0] > self.current_paragraph):
+            self.text_layer = pg.Surface(size, pg.SRCALPHA)
+            cursor = (0, 0, 0)
+
+        paragraph, line, current_y = cursor
+        while paragraph < len(texts) and paragraph <= self.current_paragraph:
+            if texts[paragraph] == "":  # Línea vacía
+                if paragraph == self.current_paragraph:
+                    break
+                current_y += self.line_height // 2
+                paragraph, line = paragraph + 1, 0
+                continue
+
+            lines = self.layout(texts[paragraph])['lines']
+            if paragraph == self.current_paragraph:
+                # En el párrafo actual solo entran las líneas ya completas
+                written = sum(len(l) for l in lines[:line + 1])
+                if line >= len(lines) or written > self.current_char:
+                    break
+            elif line >= len(lines):
+                paragraph, line = paragraph + 1, 0
+                continue
+
+            text = self.game.assets.render_text(lines[line], 24, (255, 255, 255))
+            self.text_layer.blit(text, (0, current_y))
+            current_y += self.line_height
+            line += 1
+
+        self.text_layer_cursor = (paragraph, line, current_y)
+        return self.text_layer, current_y
+
     def set_current_image(self, index):
         pass
 
+    def step(self):
+        self.update_typewriter(self.get_texts())
+
     def handle_click(self, pos):
         # Si hacemos clic en cualquier lugar, acelerar o completar el texto
         if not self.finished_typing:
@@ -789,6 +1232,8 @@ class TextScene(Scene):
 
 class IntroScene(TextScene):
 
+    reports_dirty_rects = True
+
     def start(self):
 
         self.text_box_width = (WIDTH // 2) - 50  # Half screen width minus margin
@@ -817,6 +1262,8 @@ class IntroScene(TextScene):
         self.current_image = None
         self.image_alpha = 0  # Para efecto de fade in/out
         self.ended = False
+        self.last_text_state = None
+        self.last_image_state = None
         
         # Diccionario con imágenes y sus rangos de frames para mostrar
         # Formato: "nombre_imagen": (frame_inicio, frame_fin)
@@ -894,13 +1341,13 @@ class IntroScene(TextScene):
         display_width = int(img.get_width() * scale_factor)
         display_height = int(img.get_height() * scale_factor)
         
-        # Escalar imagen
-        scaled_img = pg.transform.smoothscale(img, (display_width, display_height))
+        # Escalar imagen (cacheada en el AssetManager)
+        img_surface = self.game.assets.get_scaled(self.current_image, (display_width, display_height))
         
-        # Crear superficie con transparencia
-        img_surface = pg.Surface((display_width, display_height), pg.SRCALPHA)
-        img_surface.set_alpha(self.image_alpha)
-        img_surface.blit(scaled_img, (0, 0))
+        # Aplicar transparencia solo mientras dura el fade
+        if self.image_alpha < 255:
+            img_surface = img_surface.copy()
+            img_surface.set_alpha(self.image_alpha)
         
         # Posición centrada en el lado derecho
         center_x = 3 * WIDTH // 4
@@ -913,9 +1360,7 @@ class IntroScene(TextScene):
         # Dibujar la imagen
         screen.blit(img_surface, (x, y))
 
-    def update(self, screen):
-        self.draw_frame(screen)
-        
+    def step(self):
         # Actualizar efecto typewriter
         self.update_typewriter(self.get_texts())
         
@@ -924,6 +1369,9 @@ class IntroScene(TextScene):
         
         # Actualizar transparencia de imagen
         self.update_image_alpha()
+
+    def update(self, screen):
+        self.draw_frame(screen)
         
         # Dibujar imagen explicativa
         self.draw_explicative_image(screen)
@@ -934,224 +1382,135 @@ class IntroScene(TextScene):
         # Dibujar UI
         self.ui.update(screen)
 
+        # Reportar las regiones que cambiaron
+        text_state = (self.current_paragraph, self.current_char, self.finished_typing)
+        if text_state != self.last_text_state:
+            self.game.mark_dirty((self.text_box_x, self.text_box_y, self.text_box_width, self.text_box_height))
+        self.last_text_state = text_state
+
+        image_state = (self.current_image, self.image_alpha)
+        if image_state != self.last_image_state:
+            self.game.mark_dirty((WIDTH // 2, 0, WIDTH // 2, HEIGHT))
+        self.last_image_state = image_state
+
 class HistoryScene(Scene):
 
-    proc = None
     table_data = []
+    pending_detail = None
+    reports_dirty_rects = True
 
     def setup(self):
         self.ui = UIManager(self.game)
         
         # Agregar botón de regreso
-        action_back = lambda: self.game.goto_scene("menu")
+        action_back = self.salir
         self.ui.add_button("back", (120, 40), action_back, "Volver", topleft=(50, 50))
         
         # Configuración de la tabla
-        self.table_width = 900  # Increased width to accommodate new column
-        self.table_height = 400
-        self.table_x = (WIDTH - self.table_width) // 2
-        self.table_y = (HEIGHT - self.table_height) // 2
+        table_width = 900  # Increased width to accommodate new column
+        table_height = 400
+        table_rect = ((WIDTH - table_width) // 2, (HEIGHT - table_height) // 2, table_width, table_height)
         
         # Encabezados de columnas
-        self.headers = ["ID", "Jugador", "Victoria", "Puntuación", "Detalle"]
-        self.column_widths = [100, 200, 150, 150, 100]  # Added width for Detalle column
-        self.row_height = 40
-        self.header_height = 50
-
-        # Scroll variables
-        self.scroll_y = 0
-        self.max_scroll_y = 0
-        self.scroll_speed = 20
+        headers = ["ID", "Jugador", "Victoria", "Puntuación", "Detalle"]
+        column_widths = [100, 200, 150, 150, 100]  # Added width for Detalle column
+        self.table = VirtualTable(self.game, table_rect, headers, column_widths, row_height=40,
+                                  button_text="Detalle")
 
         # assert data folder exists
         if not os.path.exists("data"):
             os.makedirs("data")
 
-        if not os.path.exists("main.exe") or DEV:
-            subprocess.run(["gcc", "TDAS/*.c", "main.c", "-o", "main.exe"], 
-                                      capture_output=True, text=True, check=True)
-
-        pipe = subprocess.PIPE
-        self.proc = subprocess.Popen(["main.exe", "listaHistorial"],
-                                        stdin=pipe, stdout=pipe, stderr=pipe, text=True, encoding='utf-8')
-
-        self.table_data = []
-
-        while True:
-            line = self.proc.stdout.readline()
-            if not line:
-                break
-
-            if DEV:
-                print(line, end="")
-
-            if "---" in line:
-                break
-            
-            id, nombre, victoria, puntuacion = line.split()
-            self.table_data.append([id, nombre, "Si" if int(victoria) == 0 else "No", int(puntuacion)])
-        
-
-        self.table_data.sort(key=lambda x: x[3], reverse=True)
-        # Calculate max scroll after loading data
-        self.calculate_max_scroll()
-
-    def calculate_max_scroll(self):
-        """Calculate maximum scroll value based on number of rows"""
-        if not self.table_data:
-            self.max_scroll_y = 0
-            return
-            
-        data_height = len(self.table_data) * self.row_height
-        available_height = self.table_height - self.header_height
-        self.max_scroll_y = max(0, data_height - available_height + 100)
+        # Las filas salen del índice, ya ordenadas por puntaje y leídas a medida que se muestran
+        try:
+            self.table_data = self.game.history.rows(self.table_row)
+        except sqlite3.Error as e:
+            print(f"Error al leer el índice del historial: {e}")
+            self.table_data = self.load_rows()
+        self.table.set_rows(self.table_data)
+
+        # listaHistorial solo hace falta para el detalle: se lanza (o se reutiliza) en segundo plano
+        self.game.backends.history_future()
+        self.pending_detail = None  # (id, Future de listaHistorial) del detalle pedido que aún no carga
+
+    @staticmethod
+    def table_row(row):
+        return [row.match_id, row.player, "Si" if row.victory == 0 else "No", row.score]
+
+    def load_rows(self):
+        """Filas leídas por listaHistorial (sin el índice)"""
+        _, rows = self.take_backend()
+        # Las filas ya vienen decodificadas (HistoryRow), sin los avisos del backend
+        table_data = [self.table_row(row) for row in rows]
+        table_data.sort(key=lambda x: x[3], reverse=True)
+        return table_data
+
+    def take_backend(self):
+        """Cliente de listaHistorial y sus filas; se lanza aquí si no hay uno al día (lo cierra BackendManager)"""
+        future = self.game.backends.history_future()
+        try:
+            return self.game.profiler.call("backend", future.result, BACKEND_TIMEOUT)
+        except (BackendError, OSError, subprocess.CalledProcessError, TimeoutError) as e:
+            print(f"Error al cargar el historial: {e}")
+            return None, []
 
     def handle_scroll(self, direction):
         """Handle scroll wheel events"""
-        if direction > 0:  # Scroll up
-            self.scroll_y = max(0, self.scroll_y - self.scroll_speed)
-        else:  # Scroll down
-            self.scroll_y = min(self.max_scroll_y, self.scroll_y + self.scroll_speed)
+        self.table.handle_scroll(direction)
 
     def handle_click(self, pos):
         # Check if click is on a detail button
-        if not self.table_data:
+        row_idx = self.table.button_at(pos)
+        if row_idx is None:
             return False
-            
-        # Calculate table area
-        separator_y = self.table_y + self.header_height
-        
-        for row_idx, row_data in enumerate(self.table_data):
-            row_y = separator_y + (row_idx + 1) * self.row_height - self.scroll_y
-            
-            # Skip if row is not visible
-            if row_y < separator_y or row_y > separator_y + self.table_height - self.header_height:
-                continue
-            
-            # Calculate position of detail button (last column)
-            detail_x = self.table_x + sum(self.column_widths[:-1]) + 20  # Start of last column
-            detail_y = row_y + 5  # Small padding from top of row
-            detail_width = 80
-            detail_height = 30
-            
-            detail_rect = pg.Rect(detail_x, detail_y, detail_width, detail_height)
-            
-            if detail_rect.collidepoint(pos):
-                # Navigate to detail scene with match ID
-                match_id = row_data[0]  # First column is the ID
-                self.game.goto_scene("detail", match_id=match_id, proc=self.proc)
-                return True
-                
-        return False
 
-    def draw_table(self, screen):
-        # Dibujar fondo de la tabla
-        table_rect = pg.Rect(self.table_x, self.table_y, self.table_width, self.table_height)
-        pg.draw.rect(screen, (10, 70, 135), table_rect, border_radius=10)
-        
-        # Dibujar fondo del encabezado
-        header_rect = pg.Rect(self.table_x, self.table_y, self.table_width, self.header_height)
-        pg.draw.rect(screen, (13, 82, 154), header_rect, border_radius=10)
-        
-        # Dibujar encabezados
-        font = pg.font.Font(None, 28)
-        x_offset = self.table_x + 20  # Posición x inicial con padding
-        
-        for i, header in enumerate(self.headers):
-            text = font.render(header, True, (255, 255, 255))
-            text_rect = text.get_rect(midleft=(x_offset, self.table_y + self.header_height // 2))
-            screen.blit(text, text_rect)
-            x_offset += self.column_widths[i]
-        
-        # Dibujar línea separadora
-        separator_y = self.table_y + self.header_height
-        pg.draw.line(screen, (255, 255, 255), 
-                    (self.table_x, separator_y), 
-                    (self.table_x + self.table_width, separator_y), 2)
-        
-        # Create a clipping surface for the data area
-        data_surface = pg.Surface((self.table_width - 20, self.table_height - self.header_height - 20))
-        data_surface.fill((10, 70, 135))
-        
-        # Dibujar datos de la tabla
-        if not self.table_data:
-            # Dibujar mensaje "No hay datos"
-            no_data_font = pg.font.Font(None, 32)
-            no_data_text = no_data_font.render("No hay datos disponibles", True, (255, 255, 255))
-            no_data_rect = no_data_text.get_rect(center=(data_surface.get_width() // 2, data_surface.get_height() // 2))
-            data_surface.blit(no_data_text, no_data_rect)
+        # Navigate to detail scene with match ID
+        match_id = self.table_data[row_idx][0]  # First column is the ID
+        # Las partidas archivadas se leen sin listaHistorial; si no, se espera a que cargue (ver poll_history)
+        if match_id in self.game.archive:
+            self.game.goto_scene("detail", match_id=match_id, backend=None)
         else:
-            # Dibujar filas de datos (cuando hay datos disponibles)
-            data_font = pg.font.Font(None, 24)
-            for row_idx, row_data in enumerate(self.table_data):
-                row_y = (row_idx + 1) * self.row_height - self.scroll_y
-                
-                # Skip if row is not visible
-                if row_y < 0 or row_y > data_surface.get_height():
-                    continue
-                
-                x_offset = 20
-                
-                for col_idx, cell_data in enumerate(row_data):
-                    text = data_font.render(str(cell_data), True, (255, 255, 255))
-                    text_rect = text.get_rect(midleft=(x_offset, row_y + self.row_height // 2))
-                    data_surface.blit(text, text_rect)
-                    x_offset += self.column_widths[col_idx]
-                
-                # Draw detail button for this row
-                detail_x = sum(self.column_widths[:-1]) + 20
-                detail_y = row_y + 5
-                detail_width = 80
-                detail_height = 30
-                
-                # Check if mouse is hovering over the button (adjust for scroll)
-                mouse_pos = pg.mouse.get_pos()
-                adjusted_mouse_y = mouse_pos[1] - self.table_y - self.header_height + 10
-                detail_rect = pg.Rect(detail_x, detail_y, detail_width, detail_height)
-                button_color = (10, 100, 180) if detail_rect.collidepoint(20, adjusted_mouse_y) else (13, 82, 154)
-                
-                # Draw button background
-                pg.draw.rect(data_surface, button_color, detail_rect, border_radius=5)
-                
-                # Draw button text
-                detail_text = data_font.render("Detalle", True, (255, 255, 255))
-                detail_text_rect = detail_text.get_rect(center=detail_rect.center)
-                data_surface.blit(detail_text, detail_text_rect)
-        
-        # Draw the data surface onto the screen
-        screen.blit(data_surface, (self.table_x + 10, self.table_y + self.header_height + 10))
-        
-        # Draw scroll indicator if needed
-        if self.max_scroll_y > 0:
-            self.draw_scroll_indicator(screen)
+            self.pending_detail = (match_id, self.game.backends.history_future())
+        return True
 
-    def draw_scroll_indicator(self, screen):
-        """Draw scroll indicator on the right side of the table"""
-        indicator_width = 8
-        indicator_x = self.table_x + self.table_width - indicator_width - 5
-        
-        # Calculate indicator height and position
-        total_height = len(self.table_data) * self.row_height
-        visible_height = self.table_height - self.header_height
-        indicator_height = max(20, (visible_height / total_height) * visible_height)
-        
-        # Calculate indicator position
-        scroll_ratio = self.scroll_y / self.max_scroll_y if self.max_scroll_y > 0 else 0
-        indicator_y = self.table_y + self.header_height + 10 + (scroll_ratio * (visible_height - indicator_height))
-        
-        # Draw scroll indicator
-        indicator_rect = pg.Rect(indicator_x, indicator_y, indicator_width, indicator_height)
-        pg.draw.rect(screen, (255, 255, 255, 150), indicator_rect, border_radius=4)
+    def poll_history(self):
+        """Abrir el detalle pedido cuando listaHistorial terminó de cargar (se llama cada frame)"""
+        if self.pending_detail is None:
+            return
+        match_id, future = self.pending_detail
+        if not future.done():
+            self.game.info_box.add_message("Cargando el historial...")
+            return
+        self.pending_detail = None
+
+        try:
+            backend, _ = future.result()
+        except (BackendError, OSError, subprocess.CalledProcessError, TimeoutError) as e:
+            print(f"Error al cargar el historial: {e}")
+            backend = None
+        self.game.goto_scene("detail", match_id=match_id, backend=backend)
+
+    def salir(self):
+        self.pending_detail = None
+        self.game.goto_scene("menu")
 
     def update(self, screen):
+        self.poll_history()
+        if self.game.current_scene is not self:
+            return
+
         self.draw_frame(screen)
-        self.draw_table(screen)
+        self.table.draw(screen)
         self.ui.update(screen)
+        self.table.report_dirty()
 
 class DetailScene(Scene):
-    def setup(self, match_id, proc):
+
+    reports_dirty_rects = True
+
+    def setup(self, match_id, backend):
         self.match_id = match_id
-        self.proc = proc
+        self.backend = backend
         self.ui = UIManager(self.game)
         
         # Agregar botón de regreso
@@ -1159,171 +1518,76 @@ class DetailScene(Scene):
         self.ui.add_button("back", (120, 40), action_back, "Volver", topleft=(50, 50))
         
         # Configuración de la tabla de detalles
-        self.table_width = 800
-        self.table_height = 500
-        self.table_x = (WIDTH - self.table_width) // 2
-        self.table_y = (HEIGHT - self.table_height) // 2
+        table_width = 800
+        table_height = 500
+        table_rect = ((WIDTH - table_width) // 2, (HEIGHT - table_height) // 2, table_width, table_height)
         
         # Encabezados de columnas para detalles
-        self.headers = ["Turno", "Acción", "Posición"]
-        self.column_widths = [100, 200, 200, 200]  # Ancho para cada columna
-        self.row_height = 35
-        self.header_height = 50
-        
-        # Scroll variables
-        self.scroll_y = 0
-        self.max_scroll_y = 0
-        self.scroll_speed = 20
+        headers = ["Turno", "Acción", "Posición"]
+        column_widths = [100, 200, 200, 200]  # Ancho para cada columna
+        self.table = VirtualTable(self.game, table_rect, headers, column_widths, row_height=35,
+                                  empty_text="No hay detalles disponibles")
         
         # Cargar datos del match específico
         self.match_details = []
         self.load_match_details()
-        
-        # Calculate max scroll after loading data
-        self.calculate_max_scroll()
+        self.table.set_rows(self.match_details)
 
     def salir(self):
-        self.proc.kill()
-        self.proc = None
+        # El listaHistorial no se cierra: BackendManager lo reutiliza para el próximo detalle
+        self.backend = None
         self.game.goto_scene("history")
 
-    def calculate_max_scroll(self):
-        """Calculate maximum scroll value based on number of rows"""
-        if not self.match_details:
-            self.max_scroll_y = 0
-            return
-            
-        data_height = len(self.match_details) * self.row_height
-        available_height = self.table_height - self.header_height
-        self.max_scroll_y = max(0, data_height - available_height + 100	)
-
     def handle_scroll(self, direction):
         """Handle scroll wheel events"""
-        if direction > 0:  # Scroll hacia arriba
-            self.scroll_y = max(0, self.scroll_y - self.scroll_speed)
-        else:  # Scroll hacia abajo
-            self.scroll_y = min(self.max_scroll_y, self.scroll_y + self.scroll_speed)
+        self.table.handle_scroll(direction)
 
     def load_match_details(self):
 
         if not self.match_id:
             return
-        
-        try:
-            self.proc.stdin.write(f"{self.match_id.strip()}\n")
-            self.proc.stdin.flush()
-        except:
-            print(self.match_id)
-            return
-
-        while True:
-            line = self.proc.stdout.readline()
-            if not line:
-                break
-            if "---" in line:
-                break
-
-            info = line.split()
-            tipo_mov = info[0]
-            jugador = "Jugador" if info[-1] == "1" else "Bot"
-
-            if tipo_mov == "4":
-                self.match_details.insert(0, [jugador, "Ataque", f"{info[2]}, {info[3]}"])
-                
-            elif tipo_mov == "5":
-                id_objeto = info[1]
-                dict_objetos = {"1": "Bomba", "2": "Catalejo", "3": "Torpedo"}
-                self.match_details.insert(0, [jugador, f"Objeto: {dict_objetos[id_objeto]}", f"{info[3]}, {info[4]}"])
-
-    def draw_table(self, screen):
-        # Dibujar título
-        title_font = pg.font.Font(None, 36)
-        title_text = title_font.render(f"Detalles del Match {self.match_id}", True, (255, 255, 255))
-        title_rect = title_text.get_rect(center=(WIDTH // 2, self.table_y - 50))
-        screen.blit(title_text, title_rect)
-        
-        # Dibujar fondo de la tabla
-        table_rect = pg.Rect(self.table_x, self.table_y, self.table_width, self.table_height)
-        pg.draw.rect(screen, (10, 70, 135), table_rect, border_radius=10)
-        
-        # Dibujar fondo del encabezado
-        header_rect = pg.Rect(self.table_x, self.table_y, self.table_width, self.header_height)
-        pg.draw.rect(screen, (13, 82, 154), header_rect, border_radius=10)
-        
-        # Dibujar encabezados
-        font = pg.font.Font(None, 28)
-        x_offset = self.table_x + 20  # Posición x inicial con padding
-        
-        for i, header in enumerate(self.headers):
-            text = font.render(header, True, (255, 255, 255))
-            text_rect = text.get_rect(midleft=(x_offset, self.table_y + self.header_height // 2))
-            screen.blit(text, text_rect)
-            x_offset += self.column_widths[i]
-        
-        # Dibujar línea separadora
-        separator_y = self.table_y + self.header_height
-        pg.draw.line(screen, (255, 255, 255), 
-                    (self.table_x, separator_y), 
-                    (self.table_x + self.table_width, separator_y), 2)
-        
-        # Crear una superficie de datos
-        data_surface = pg.Surface((self.table_width - 20, self.table_height - self.header_height - 20))
-        data_surface.fill((10, 70, 135))
-        
-        # Dibujar datos de la tabla
-        if not self.match_details:
-            # Dibujar mensaje "No hay datos"
-            no_data_font = pg.font.Font(None, 32)
-            no_data_text = no_data_font.render("No hay detalles disponibles", True, (255, 255, 255))
-            no_data_rect = no_data_text.get_rect(center=(data_surface.get_width() // 2, data_surface.get_height() // 2))
-            data_surface.blit(no_data_text, no_data_rect)
-        else:
-            # Dibujar filas de datos
-            data_font = pg.font.Font(None, 24)
-            for row_idx, row_data in enumerate(self.match_details):
-                row_y = (row_idx + 1) * self.row_height - self.scroll_y
-                
-                # Saltar si la fila no es visible
-                if row_y < 0 or row_y > data_surface.get_height():
-                    continue
-                
-                x_offset = 20
-                
-                for col_idx, cell_data in enumerate(row_data):
-                    text = data_font.render(str(cell_data), True, (255, 255, 255))
-                    text_rect = text.get_rect(midleft=(x_offset, row_y + self.row_height // 2))
-                    data_surface.blit(text, text_rect)
-                    x_offset += self.column_widths[col_idx]
-        
-        # Dibujar la superficie de datos en la pantalla
-        screen.blit(data_surface, (self.table_x + 10, self.table_y + self.header_height + 10))
-        
-        # Dibujar el indicador de scroll si es necesario
-        if self.max_scroll_y > 0:
-            self.draw_scroll_indicator(screen)
-
-    def draw_scroll_indicator(self, screen):
-        """Dibujar el indicador de scroll en el lado derecho de la tabla"""
-        indicator_width = 8
-        indicator_x = self.table_x + self.table_width - indicator_width - 5
-        
-        # Calcular la altura y posición del indicador
-        total_height = len(self.match_details) * self.row_height
-        visible_height = self.table_height - self.header_height
-        indicator_height = max(20, (visible_height / total_height) * visible_height)
-        
-        # Calcular la posición del indicador
-        scroll_ratio = self.scroll_y / self.max_scroll_y if self.max_scroll_y > 0 else 0
-        indicator_y = self.table_y + self.header_height + 10 + (scroll_ratio * (visible_height - indicator_height))
-        
-        # Dibujar el indicador de scroll
-        indicator_rect = pg.Rect(indicator_x, indicator_y, indicator_width, indicator_height)
-        pg.draw.rect(screen, (255, 255, 255, 150), indicator_rect, border_radius=4)
+
+        # Del archivo empaquetado si está ahí; si no, de listaHistorial
+        moves = self.game.archive.moves(self.match_id.strip())
+        if moves is None:
+            if self.backend is None:
+                return
+            try:
+                request = self.backend.submit(f"{self.match_id.strip()}\n", parser=read_moves)
+                moves = self.game.profiler.call("backend", request.result, BACKEND_TIMEOUT)
+            except (BackendError, TimeoutError) as e:
+                print(f"Error al cargar el detalle de {self.match_id}: {str(e) or f'sin respuesta en {BACKEND_TIMEOUT} s'}")
+                if isinstance(e, TimeoutError):
+                    # El pedido seguiría en la cola del cliente compartido: se lo da por muerto
+                    # y history_future lanza otro listaHistorial para el próximo detalle
+                    self.backend.fail(BackendTimeout(f"listaHistorial no respondió en {BACKEND_TIMEOUT} s"))
+                return
+
+        for move in moves:
+            message = move.message
+            jugador = "Jugador" if move.player == 1 else "Bot"
+
+            if message.code == ATTACK:
+                self.match_details.append([jugador, "Ataque", f"{message.x}, {message.y}"])
+
+            elif message.code == OBJECT:
+                nombre = OBJECT_NAMES.get(message.object_id, message.object_id)
+                self.match_details.append([jugador, f"Objeto: {nombre}", f"{message.x}, {message.y}"])
+
+        # Los movimientos más recientes primero
+        self.match_details.reverse()
 
     def update(self, screen):
         self.draw_frame(screen)
-        self.draw_table(screen)
+
+        # Dibujar título
+        title_text = self.game.assets.render_text(f"Detalles del Match {self.match_id}", 36, (255, 255, 255))
+        title_rect = title_text.get_rect(center=(WIDTH // 2, self.table.rect.y - 50))
+        screen.blit(title_text, title_rect)
+
+        self.table.draw(screen)
         self.ui.update(screen)
+        self.table.report_dirty()
 
 class FinalScene(TextScene):
 
@@ -1344,7 +1608,6 @@ class FinalScene(TextScene):
         
         # Variables para efectos de celebración
         self.frame_counter = 0
-        self.celebration_particles = []
 
         self.custom_start()
 
@@ -1370,7 +1633,7 @@ class FinalScene(TextScene):
             display_width = int(max_height * img_ratio)
         
         # Escalar imagen
-        scaled_img = pg.transform.smoothscale(img, (display_width, display_height))
+        scaled_img = self.game.assets.get_scaled(self.prat_asset, (display_width, display_height))
         
         # Calcular posición centrada horizontalmente, arriba de los botones
         x = (WIDTH - display_width) // 2
@@ -1381,10 +1644,6 @@ class FinalScene(TextScene):
 
     def draw_text(self, screen):
         """Dibujar texto de victoria con efecto typewriter"""
-        font_large = pg.font.Font(None, 72)
-        font_medium = pg.font.Font(None, 36)
-        font_small = pg.font.Font(None, 28)
-        
         y_offset = HEIGHT // 4
         texts = self.get_texts()
         
@@ -1402,16 +1661,21 @@ class FinalScene(TextScene):
             if display_text:
                 # Seleccionar fuente según el texto
                 if i == 0:  # "¡VICTORIA!"
-                    font = font_large
+                    font_size = 72
                     color = (255, 215, 0)  # Dorado
                 elif i == 1:  # Primera línea de descripción
-                    font = font_medium
+                    font_size = 36
                     color = (255, 255, 255)
                 else:  # Resto del texto
-                    font = font_small
+                    font_size = 28
                     color = (200, 200, 200)
                 
-                text_surface = font.render(display_text, True, color)
+                font = self.game.assets.get_font(font_size)
+                if display_text == text:
+                    text_surface = self.game.assets.render_text(display_text, font_size, color)
+                else:
+                    # Texto a medio escribir: no vale la pena cachearlo
+                    text_surface = font.render(display_text, True, color)
                 text_rect = text_surface.get_rect(center=(WIDTH//2, y_offset))
                 screen.blit(text_surface, text_rect)
                 
@@ -1419,7 +1683,6 @@ class FinalScene(TextScene):
 
     def update(self, screen):
         self.draw_frame(screen)
-        self.update_typewriter(self.get_texts())
         self.draw_text(screen)
         self.draw_prat(screen)
         self.loop(screen)
@@ -1427,8 +1690,10 @@ class FinalScene(TextScene):
 
 class VictoryScene(FinalScene):
     prat_asset = "prat_defeated"
+    particle_colors = [(255, 215, 0), (255, 255, 255), (255, 100, 100), (100, 255, 100), (100, 100, 255)]
 
     def custom_start(self):
+        self.celebration_particles = ParticleSystem(2000, self.particle_colors)
         self.generate_particles()
 
     def get_texts(self):
@@ -1439,47 +1704,34 @@ class VictoryScene(FinalScene):
             "Los estudiantes pueden regresar a su realidad... ¡Por ahora!",
         ]
     
-    def generate_particles(self):
+    def generate_particles(self, n=50):
         """Generar partículas de celebración"""
-        for _ in range(50):
-            particle = {
-                'x': random.randint(0, WIDTH),
-                'y': random.randint(0, HEIGHT),
-                'vx': random.uniform(-3, 3),
-                'vy': random.uniform(-5, -1),
-                'life': random.randint(60, 120),
-                'color': random.choice([(255, 215, 0), (255, 255, 255), (255, 100, 100), (100, 255, 100), (100, 100, 255)])
-            }
-            self.celebration_particles.append(particle)
+        self.celebration_particles.emit(
+            [random.randint(0, WIDTH) for _ in range(n)],
+            [random.randint(0, HEIGHT) for _ in range(n)],
+            [random.uniform(-3, 3) for _ in range(n)],
+            [random.uniform(-5, -1) for _ in range(n)],
+            [random.randint(60, 120) for _ in range(n)],
+            [random.choice(self.particle_colors) for _ in range(n)],
+        )
 
     def update_particles(self):
         """Actualizar partículas de celebración"""
-        for particle in self.celebration_particles[:]:
-            particle['x'] += particle['vx']
-            particle['y'] += particle['vy']
-            particle['vy'] += 0.1  # Gravedad
-            particle['life'] -= 1
-            
-            if particle['life'] <= 0:
-                self.celebration_particles.remove(particle)
+        self.celebration_particles.update()
         
         # Regenerar partículas si se acabaron
-        if len(self.celebration_particles) < 20:
+        if self.celebration_particles.count < 20:
             self.generate_particles()
 
     def draw_particles(self, screen):
         """Dibujar partículas de celebración"""
-        for particle in self.celebration_particles:
-            alpha = min(255, particle['life'] * 3)
-            color = (*particle['color'], alpha)
-            
-            # Crear superficie con transparencia
-            particle_surf = pg.Surface((4, 4), pg.SRCALPHA)
-            pg.draw.circle(particle_surf, color, (2, 2), 2)
-            screen.blit(particle_surf, (particle['x'], particle['y']))
+        self.celebration_particles.draw(screen, self.game.alpha)
 
-    def loop(self, screen):
+    def step(self):
+        super().step()
         self.update_particles()
+
+    def loop(self, screen):
         self.draw_particles(screen)
     
 class DefeatScene(FinalScene):
@@ -1498,12 +1750,22 @@ class DefeatScene(FinalScene):
     
 
 class MatchScene(Scene):
+
+    reports_dirty_rects = True
+    backend = None
+    hit_colors = [(255, 200, 60), (255, 140, 0), (200, 50, 20)]
+    sink_colors = [(255, 140, 0), (90, 90, 90), (160, 160, 160)]
+
     def setup(self, grid, objects):
         self.init_match(grid, objects)
         self.game.event_manager.add_action_key(pg.K_SPACE, self.end_turn)
         self.game.event_manager.add_action_key(pg.K_r, self.rotate_torpedo)
 
     def handle_click(self, pos):
+        # El turno enviado sigue en pantalla hasta que responde el backend
+        if self.pending_turn is not None:
+            return
+
         # Verificar si el clic está en el panel de objetos
         panel_x = WIDTH // 4 - self.object_panel.width // 2
         panel_y = HEIGHT // 3 + self.gridB.grid_height // 2 + 20
@@ -1550,29 +1812,25 @@ class MatchScene(Scene):
                 # Seleccionar este objeto
                 self.selected_object = item_name
                 self.gridA.set_selected_object(item_name)
-                hover_sound = self.game.assets.audio["sfx"]["hover"]
-                hover_sound.play()
+                self.game.sfx.play("hover")
                 return
 
     def handle_grid_object_click(self, pos):
         # Verificar si el clic está en la cuadrícula enemiga
-        mouse_vec = pg.Vector2(pos) - self.gridA.start_pos
-        for i in range(self.gridA.size[0]):
-            for j in range(self.gridA.size[1]):
-                w = self.gridA.cell_size + self.gridA.margin
-                s = self.gridA.cell_size
-                rect = pg.Rect(i * w, j * w, s, s)
-                if rect.collidepoint(mouse_vec):
-                    # Para torpedo, usar orientación manual solo si la posición es válida
-                    orientation = 0
-                    if self.selected_object == 'torpedo':
-                        if self.gridA.is_valid_torpedo_position(i, j):
-                            orientation = self.gridA.torpedo_orientation
-                        else:
-                            return  # No permitir colocar torpedo en posición inválida
-
-                    self.use_object_at_position(i, j, orientation)
-                    return
+        cell = self.gridA.cell_at(pos)
+        if cell is None:
+            return
+
+        i, j = cell
+        # Para torpedo, usar orientación manual solo si la posición es válida
+        orientation = 0
+        if self.selected_object == 'torpedo':
+            if self.gridA.is_valid_torpedo_position(i, j):
+                orientation = self.gridA.torpedo_orientation
+            else:
+                return  # No permitir colocar torpedo en posición inválida
+
+        self.use_object_at_position(i, j, orientation)
 
     def use_object_at_position(self, x, y, orientation=0):
         if not self.selected_object or self.object_panel.items[self.selected_object]['quantity'] <= 0:
@@ -1615,14 +1873,7 @@ class MatchScene(Scene):
             os.makedirs("data")
 
         with open(f"cache/{self.id}.txt", "w") as f:
-            # Escribir ID de partida
-            f.write(f"{self.id}\n")
-            f.write(f"{self.game.name}\n")
-            
-            # Escribir tamaño de cuadrícula
-            f.write(f"{grid.size[0]} {grid.size[1]}\n")
-            
-            # Crear y escribir el estado de la cuadrícula
+            # Crear el estado de la cuadrícula
             grid_state = [[0 for _ in range(grid.size[1])] for _ in range(grid.size[0])]
             
             # Llenar posiciones de barcos
@@ -1634,58 +1885,40 @@ class MatchScene(Scene):
                     else:  # vertical
                         grid_state[y+i][x] = boat['id']
             
-            # Escribir el estado de la cuadrícula
-            for row in grid_state:
-                f.write(" ".join(map(str, row)) + "\n")
-
-            # Escribir información de objetos
+            # Objetos con cantidad disponible
             objects_with_quantity = [item for item in self.game.scenes["setup"].object_panel.items.values() if item['quantity'] > 0]
-            f.write(f"N objetos: {len(objects_with_quantity)}\n")
-            
-            # Escribir id y cantidad de cada objeto
-            for item in objects_with_quantity:
-                f.write(f"{item['id']} {item['quantity']}\n")
+            objects = [(item['id'], item['quantity']) for item in objects_with_quantity]
 
-    def start_backend(self):
+            # ID de partida, jugador, tamaño, cuadrícula y objetos
+            f.write(encode_config(self.id, self.game.name, grid_state, objects))
 
-        if DEV or not os.path.exists("main.exe"):
-            # gcc TDAS/*.c main.c -o main.exe
-            try:
-                subprocess.run(["gcc", "TDAS/*.c", "main.c", "-o", "main.exe"], 
-                                      capture_output=True, text=True, check=True)
-                if DEV:
-                    print("Compilación exitosa")
-            except subprocess.CalledProcessError as e:
-                print(f"Error de compilación: {e}")
-                print(f"stdout: {e.stdout}")
-                print(f"stderr: {e.stderr}")
-                return
-            except FileNotFoundError:
-                print("Error: gcc no encontrado. Asegúrate de tener GCC instalado.")
-                return
+    def start_backend(self):
+        self.backend = None
 
         try:
-            pipe = subprocess.PIPE
-            self.proc = subprocess.Popen(["./main.exe", "iniciarJuego", f"{self.id}.txt"], 
-                                       stdin=pipe, stdout=pipe, stderr=subprocess.PIPE, text=True, encoding='utf-8')
-            
-            # Leer la primera línea de respuesta
-            first_response = self.proc.stdout.readline()
-            if first_response:
-                if DEV:
-                    print(first_response, end='')
-            else:
-                print("Error: No se recibió respuesta del backend")
-                
+            # El proceso ya se lanzó durante SetupScene; aquí solo recibe su configuración
+            on_exit = lambda backend, error: post_event(BACKEND_DIED, error=str(error))
+            self.backend, greeting = self.game.profiler.call("backend", self.game.backends.take_match,
+                                                             f"{self.id}.txt", on_exit)
+
+            # Primera línea de respuesta; se lee en segundo plano y los turnos se encolan detrás
+            if DEV:
+                greeting.add_done_callback(lambda future: future.exception() or print(future.result()))
+
         except Exception as e:
             print(f"Error al iniciar el backend: {e}")
-            self.proc = None
+            self.backend = None
 
     def init_match(self, grid, objects):
 
         margin = WIDTH // 20
         self.gridA = EnemyGrid(self, GRID_SIZE, WIDTH // 2 - margin*2, HEIGHT * 0.9, boats=[])
         self.gridB = Grid(self, GRID_SIZE, HEIGHT // 2 - margin*2, HEIGHT * 0.8, boats=grid.boats)
+        self.gridA.boat_sizes = {boat['id']: boat['size'] for boat in grid.boats}
+
+        # Chispas de los impactos y los hundimientos en el tablero enemigo
+        self.particles = ParticleSystem(600, dict.fromkeys(self.hit_colors + self.sink_colors))
+        self.particle_rect = None
 
         # Agregar panel de objetos para uso en juego
         self.object_panel = ObjectPanel(self.game, WIDTH // 4, HEIGHT // 6)
@@ -1700,15 +1933,11 @@ class MatchScene(Scene):
         # Lista de objetos colocados en la cuadrícula (para mostrar visualmente)
         self.placed_objects = []
 
-        self.fog_list = []
-        x_step = self.gridA.grid_width // 5
-        y_step = self.gridA.grid_height // 5
-        for i in range(5):
-            for j in range(5):
-                x = x_step * i
-                y = y_step * j
-
-                self.fog_list.append(pg.Vector2(x, y))
+        # Turno enviado al backend cuya respuesta aún no llega, sus mensajes y el número de turno (métricas)
+        self.pending_turn = None
+        self.backend_error = None  # Mensaje si el backend murió: la partida ya no puede seguir
+        self.sent_messages = []
+        self.turn_number = 0
 
         self.id = str(uuid.uuid4())[:5]
         self.save_config()
@@ -1730,7 +1959,8 @@ class MatchScene(Scene):
         self.game.event_manager.add_cheat_sequence("bomb_cheat", 241, 3, self.activate_bomb_cheat)
 
     def salir(self):
-        self.proc.kill()
+        if self.backend is not None:
+            self.backend.close()
         self.game.goto_scene("menu")
 
     def activate_bomb_cheat(self):
@@ -1741,128 +1971,146 @@ class MatchScene(Scene):
             self.object_panel.items['torpedo']['quantity'] += 10
             
             # Reproducir sonido de éxito
-            create_sound = self.game.assets.audio["sfx"]["create"]
-            create_sound.play()
+            self.game.sfx.play("create")
             
             if DEV:
                 print("¡Cheat activado! +10 bombas")
         else:
             print("Error: No se encontró el objeto 'bomb' en el panel")
 
+    def clear_turn(self):
+        """Limpiar el estado del turno (objetivo y objetos usados)"""
+        self.gridA.clear_target()
+        self.used_objects = []
+        self.placed_objects = []
+        self.turn_ended = True
+
     def end_turn(self):
+        # Mientras el backend resuelve un turno no se envía otro
+        if self.pending_turn is not None or self.backend_error is not None:
+            return
+
         if self.gridA.selected_target is not None or self.used_objects:
             # Verificar si el proceso backend existe
-            if self.proc is None:
+            if self.backend is None:
                 print("Error: No hay proceso backend activo")
                 # Limpiar estado del turno sin enviar mensajes
-                self.gridA.clear_target()
-                self.used_objects = []
-                self.placed_objects = []
-                self.turn_ended = True
+                self.clear_turn()
                 return
             
-            # Verificar si el proceso backend sigue vivo
-            if self.proc.poll() is not None:
-                print(self.proc.stdout.readlines())
-                print("Error: El proceso backend ha terminado inesperadamente")
-                # Limpiar estado del turno sin enviar mensajes
-                self.gridA.clear_target()
-                self.used_objects = []
-                self.placed_objects = []
-                self.turn_ended = True
-                return
-            
-            # Calcular número total de mensajes
-            num_messages = 0
-            
-            if self.gridA.selected_target is not None:
-                num_messages += 1  # Mensaje de ataque
-                
-            num_messages += len(self.used_objects)  # Mensajes de objetos usados
-            
-            # Enviar mensaje de nuevo turno
-            msg = f'8 {num_messages}\n'
-            
-            # Enviar mensaje de ataque si hay objetivo seleccionado
+            messages = []
+
+            # Mensaje de ataque si hay objetivo seleccionado
             if self.gridA.selected_target is not None:
-                msg += f"4 {self.gridA.selected_target[0]} {self.gridA.selected_target[1]}\n"
-            
-            # Enviar mensajes de objetos usados
+                messages.append(Attack(*self.gridA.selected_target))
+
+            # Mensajes de objetos usados (solo el torpedo lleva orientación)
             for obj in self.used_objects:
-                if obj['object_id'] == 3:
-                    msg += f"5 {obj['object_id']} {obj['x']} {obj['y']} {obj['orientation']}\n"
-                else:
-                    msg += f"5 {obj['object_id']} {obj['x']} {obj['y']}\n"
-            
+                orientation = obj['orientation'] if obj['object_id'] == TORPEDO else None
+                messages.append(UseObject(obj['object_id'], obj['x'], obj['y'], orientation))
+
+            # "8 n" seguido de los n mensajes
+            msg = encode_turn(messages)
+
             if DEV:
-                print('>', msg, end='')
-            
-            try:
-                self.proc.stdin.write(msg)
-                self.proc.stdin.flush()
-            except (OSError, IOError) as e:
-                print(f"Error al enviar mensaje al backend: {e}")
-                # Limpiar estado del turno sin enviar mensajes
-                self.gridA.clear_target()
-                self.used_objects = []
-                self.placed_objects = []
-                self.turn_ended = True
-                return
+                print('>', msg.decode(), end='')
 
-            try:
-                # Leer la primera línea (debería ser "8 X" para número de mensajes)
-                first_line = self.proc.stdout.readline().strip()
-                
-                # Analizar el número de mensajes
-                if first_line.startswith("8 "):
-                    num_messages = int(first_line.split()[1])
-                    if DEV:
-                        print(first_line)
-                    
-                    # Leer todos los mensajes
-                    for i in range(num_messages):
-                        message = self.proc.stdout.readline().strip()
-                        
-                        if DEV:
-                            print(message)
+            # La respuesta se lee en segundo plano; update() la aplica cuando llega
+            self.pending_turn = self.game.profiler.call("backend", self.backend.submit, msg)
+            self.sent_messages = messages
+            self.turn_number += 1
 
-                        message_type = int(message.split()[0])
+    def poll_backend(self):
+        """Aplicar la respuesta del turno pendiente si ya llegó (se llama cada frame)"""
+        if self.backend is None:
+            return
+        self.game.profiler.call("backend", self.backend.poll)
 
-                        if message_type == 4:
-                            x, y = map(int, message.split()[1:])
-                            self.gridB.mark_cell(x, y, 99)
+        if self.pending_turn is None or not self.pending_turn.done():
+            return
+        turn, self.pending_turn = self.pending_turn, None
 
-                        if message_type == 9: # Informe de Estado Casilla
-                            x, y, value = map(int, message.split()[1:])
-                            self.gridA.update_cell(x, y, value)
+        error = None
+        try:
+            messages = turn.result()
+        except BackendError as e:
+            print(f"Error al leer respuesta del backend: {e}")
+            messages = []
+            error = str(e)
+        self.record_metrics(turn, messages, error)
 
-                        if message_type == 777: # Código de Fin de Juego
+        if DEV and messages:
+            print(f"8 {len(messages)}")
 
-                            self.proc.kill()
+        for message in messages:
+            if DEV:
+                print(message.encode())
 
-                            result = int(message.split()[1])
-                            if result == 1:
-                                self.game.goto_scene("defeat")
-                            elif result == 2:
-                                self.game.goto_scene("victory")  
+            message_type = message.code
 
-                            return
-                        # Aquí puedes procesar cada mensaje según sea necesario
-            except (OSError, IOError) as e:
-                print(f"Error al leer respuesta del backend: {e}")
-            
-            # Limpiar estado del turno
-            self.gridA.clear_target()
-            self.used_objects = []  # Limpiar lista de objetos usados
-            self.placed_objects = []  # Limpiar lista de objetos colocados visualmente
-            self.turn_ended = True
+            if message_type == ATTACK:
+                self.gridB.mark_cell(message.x, message.y, 99)
 
-    def draw_fog(self, screen, box):
-        fog_surf = pg.Surface(box.size, pg.SRCALPHA)
-        fog_surf.fill((0, 0, 0, 20))
-        screen.blit(fog_surf, box.topleft)
+            if message_type == STATE: # Informe de Estado Casilla
+                self.gridA.update_cell(message.x, message.y, message.value)
+
+            if message_type == END: # Código de Fin de Juego
+
+                # Al salir el proceso mueve la partida a data/: se indexa cuando termina, sin esperarlo aquí
+                match_id = self.id
+                exited = self.backend.close()
+                exited.add_done_callback(lambda future: post_event(MATCH_SAVED, match_id=match_id))
+
+                if message.result == DEFEAT:
+                    self.game.goto_scene("defeat")
+                elif message.result == VICTORY:
+                    self.game.goto_scene("victory")
+
+                return
+            # Aquí puedes procesar cada mensaje según sea necesario
+
+        # Limpiar estado del turno
+        self.clear_turn()
+
+    def record_metrics(self, turn, messages, error=None):
+        metrics = self.game.metrics
+        if metrics is None:
+            return
+        proc = getattr(self.backend, "proc", None)  # El motor de rules.py no tiene proceso aparte
+        metrics.record_turn(self.id, self.turn_number, self.sent_messages, turn, messages,
+                            engine=self.game.backends.engine, pid=proc.pid if proc is not None else None,
+                            error=error)
+        if messages and messages[-1].code == END:
+            metrics.summary(self.id)
+
+    def handle_backend_died(self, error):
+        """El backend murió o no respondió: la partida termina y solo queda volver al menú"""
+        print(f"Error: {error}")
+        # El turno que falló queda anotado en las métricas
+        self.poll_backend()
+        self.pending_turn = None
+        self.backend_error = error
+        self.clear_turn()
+        self.ui.add_button("end_turn", (180, 50), self.salir, "Volver al menú", topleft=(WIDTH-220, HEIGHT-80))
+
+    def step(self):
+        self.particles.update()
+
+    def draw_particles(self, screen):
+        """Dibujar las partículas y reportar la zona que ocupan (y la que ocupaban en el frame anterior)"""
+        rect = self.particles.bounds()
+        if rect is not None:
+            self.particles.draw(screen, self.game.alpha)
+            self.game.mark_dirty(rect)
+        if self.particle_rect is not None:
+            self.game.mark_dirty(self.particle_rect)
+        self.particle_rect = rect
 
     def update(self, screen):
+        self.poll_backend()
+        if self.game.current_scene is not self:
+            return
+
         self.draw_frame(screen)
 
         # Dibujar la cuadrícula
@@ -1872,11 +2120,11 @@ class MatchScene(Scene):
         self.gridA.update(screen, *posA)
         self.gridB.update(screen, *posB)
 
-        w_a = self.gridA.grid_width
-        gridA_rect = pg.Rect(*self.gridA.start_pos, w_a, w_a)
-
-        self.draw_fog(screen, gridA_rect)
         self.gridA.draw_state(screen, *posA)
+        self.draw_particles(screen)
+
+        if self.backend_error is not None:
+            self.game.info_box.add_message(f"La partida se interrumpió: {self.backend_error}")
 
         # Dibujar panel de objetos debajo de gridB
         panel_x = WIDTH // 4 - self.object_panel.width // 2
@@ -1885,14 +2133,9 @@ class MatchScene(Scene):
 
         # Manejar clic para apuntar
         if self.game.event_manager.is_clicking and not self.turn_ended:
-            mouse_pos = pg.mouse.get_pos() - self.gridB.start_pos
-            for i in range(self.gridB.size[0]):
-                for j in range(self.gridB.size[1]):
-                    w = self.gridB.cell_size + self.gridB.margin
-                    s = self.gridB.cell_size
-                    rect = pg.Rect(i * w, j * w, s, s)
-                    if rect.collidepoint(mouse_pos):
-                        self.gridB.handle_click(i, j)
+            cell = self.gridB.cell_at(self.game.event_manager.mouse_pos)
+            if cell is not None:
+                self.gridB.handle_click(*cell)
 
         self.ui.update(screen)
 
@@ -1902,7 +2145,13 @@ class MatchScene(Scene):
             self.gridA.rotate_torpedo()
 
 class SetupScene(Scene):
+
+    reports_dirty_rects = True
+
     def setup(self):
+        # Lanzar el backend de la partida mientras se arma el tablero
+        self.game.backends.prewarm_match()
+
         self.grid = SetupGrid(self, GRID_SIZE, WIDTH, HEIGHT * 0.8)
         self.object_panel = SetupObjectPanel(self.game, WIDTH // 5, HEIGHT * 0.8)
 
@@ -1921,25 +2170,25 @@ class SetupScene(Scene):
         # Agregar botón de aleatorización en la parte superior del panel selector de barcos
         randomize_action = lambda: self.randomize_boats()
         randomize_center = (140, HEIGHT//2 - HEIGHT//3 - 30)
-        dice_img = self.game.assets.images["dice"]
-        self.ui.add_button("randomize", (50, 50), randomize_action, image=dice_img, opacity=0.4, center=randomize_center)
+        self.ui.add_button("randomize", (50, 50), randomize_action, image="dice", opacity=0.4, center=randomize_center)
 
         # Agregar botón de limpiar junto al botón de aleatorización
         clear_action = lambda: self.clear_all_boats()
         clear_center = (200, HEIGHT//2 - HEIGHT//3 - 30)
-        clear_img = self.game.assets.images["clear"]
-        self.ui.add_button("clear", (50, 50), clear_action, image=clear_img, opacity=0.4, center=clear_center)
+        self.ui.add_button("clear", (50, 50), clear_action, image="clear", opacity=0.4, center=clear_center)
 
         self.game.event_manager.add_action_key(pg.K_r, self.rotate_selected_boat)
 
+        self.last_selector_state = None
+        self.last_ghost_rect = None
+
     def randomize_boats(self):
         # Obtener barcos que aún no han sido colocados
         unplaced_boats = [boat for boat in self.boats if boat['pos'] is None]
         
         if not unplaced_boats:
             # Todos los barcos ya están colocados, solo reproducir sonido de denegación
-            deny_sound = self.game.assets.audio["sfx"]["deny"]
-            deny_sound.play()
+            self.game.sfx.play("deny")
             return
         
         # Intentar colocar cada barco no colocado aleatoriamente
@@ -1989,8 +2238,7 @@ class SetupScene(Scene):
                 continue
         
         # Reproducir efecto de sonido
-        create_sound = self.game.assets.audio["sfx"]["create"]
-        create_sound.play()
+        self.game.sfx.play("create")
 
     def is_cell_empty(self, x, y):
         """Verificar si una celda está vacía (ningún barco la ocupa)"""
@@ -2013,7 +2261,7 @@ class SetupScene(Scene):
 
     def clear_all_boats(self):
         # Limpiar todos los barcos de la cuadrícula
-        self.grid.boats = []
+        self.grid.clear_boats()
         
         # Restablecer todos los barcos al estado no colocado
         self.boats = list(self.init_boats)
@@ -2022,13 +2270,11 @@ class SetupScene(Scene):
             boat['selected'] = False
         
         # Reproducir efecto de sonido
-        destroy_sound = self.game.assets.audio["sfx"]["destroy"]
-        destroy_sound.play()
+        self.game.sfx.play("destroy")
 
     def start_match(self):
         if not self.grid.boats:
-            deny_sound = self.game.assets.audio["sfx"]["deny"]
-            deny_sound.play()
+            self.game.sfx.play("deny")
             return
         
         self.game.scenes["match"]
@@ -2051,8 +2297,7 @@ class SetupScene(Scene):
         if not self.grid.preview_pos:
             return
         
-        create_sound = self.game.assets.audio["sfx"]["create"]
-        create_sound.play()
+        self.game.sfx.play("create")
             
         # Colocar el barco
         selected_boat['pos'] = self.grid.preview_pos
@@ -2127,11 +2372,17 @@ class SetupScene(Scene):
         pos.x += margin
         pos.y += margin
 
+        # Los botones rotados sobresalen del panel
+        selector_rect = rect.inflate(size, size)
+        hovered = None
+        ghost_rect = None
+
         for boat in self.boats:
             if boat['pos'] is None:
                 rect = pg.Rect(pos.x, pos.y, size, size)
                 
-                if rect.collidepoint(pg.mouse.get_pos()):
+                if rect.collidepoint(self.game.event_manager.mouse_pos):
+                    hovered = id(boat)
                     color = (10, 70, 135)  
                     if self.game.event_manager.is_clicking:
                         for b in self.boats:
@@ -2148,7 +2399,7 @@ class SetupScene(Scene):
 
                     ghost_surf = surf.copy()
                     ghost_surf.set_alpha(150)  # 0.4 * 255
-                    ghost_rect = ghost_surf.get_rect(center=pg.mouse.get_pos())
+                    ghost_rect = ghost_surf.get_rect(center=self.game.event_manager.mouse_pos)
                     screen.blit(ghost_surf, ghost_rect)
                     
                     self.grid.preview(boat)
@@ -2161,6 +2412,18 @@ class SetupScene(Scene):
                 
                 pos.y += size + margin
 
+        # Reportar el selector de barcos y el barco fantasma como regiones sucias
+        selector_state = (hovered, tuple((b['size'], b['direction'], b['selected']) for b in self.boats))
+        if selector_state != self.last_selector_state:
+            self.game.mark_dirty(selector_rect)
+        self.last_selector_state = selector_state
+
+        if ghost_rect != self.last_ghost_rect:
+            for r in (ghost_rect, self.last_ghost_rect):
+                if r is not None:
+                    self.game.mark_dirty(r)
+        self.last_ghost_rect = ghost_rect
+
         
 
 class InfoBox:
@@ -2169,11 +2432,14 @@ class InfoBox:
     padding = 10
     opacity = 100
     message = []
+    wrapped_cache_size = 64
 
     def __init__(self, game, width, height):
         self.game = game
         self.width = width
         self.height = height
+        self.wrapped_messages = OrderedDict()  # Líneas ya envueltas por mensaje (LRU)
+        self.last_messages = ()
 
     def add_message(self, message):
         self.message.append(message)
@@ -2205,25 +2471,38 @@ class InfoBox:
         return all_lines
 
     def draw(self, screen):
-        if not self.message:
-            return
-
         x = self.margin
         y = screen.get_height() - self.height - self.margin
 
+        # Reportar la caja como región sucia si cambiaron los mensajes
+        messages = tuple(self.message)
+        if messages != self.last_messages:
+            self.game.mark_dirty((x, y, self.width, self.height))
+        self.last_messages = messages
+
+        if not self.message:
+            return
+
         surf = pg.Surface((self.width, self.height), pg.SRCALPHA)
         surf.fill((0, 0, 0, self.opacity))
 
-        font = pg.font.Font(None, 24)
+        font = self.game.assets.get_font(24)
         current_y = self.padding
         
         for message in self.message:
-            # Envolver el texto
-            wrapped_lines = self.wrap_text(message, font, self.width)
+            # Envolver el texto (una sola vez por mensaje)
+            wrapped_lines = self.wrapped_messages.get(message)
+            if wrapped_lines is None:
+                wrapped_lines = self.wrap_text(message, font, self.width)
+                self.wrapped_messages[message] = wrapped_lines
+                if len(self.wrapped_messages) > self.wrapped_cache_size:
+                    self.wrapped_messages.popitem(last=False)
+            else:
+                self.wrapped_messages.move_to_end(message)
             
             # Dibujar cada línea
             for line in wrapped_lines:
-                text = font.render(line, True, (255, 255, 255))
+                text = self.game.assets.render_text(line, 24, (255, 255, 255))
                 surf.blit(text, (self.padding, current_y))
                 current_y += text.get_height() + 2  # Add small spacing between lines
                 
@@ -2239,6 +2518,7 @@ class UIManager:
         self.game = game
         self.buttons = {}
         self.was_hovering = {}  # Rastrear el estado de hover para cada botón
+        self.surfaces = {}  # Superficies de botón ya dibujadas por (nombre, hover)
 
     def add_button(self, name, size, click, text=None, image=None, opacity=1.0, topleft=None, center=None):
         rect = pg.Rect(0, 0, size[0], size[1])
@@ -2255,6 +2535,8 @@ class UIManager:
             "opacity": opacity
         }
         self.was_hovering[name] = False
+        self.surfaces.pop((name, False), None)
+        self.surfaces.pop((name, True), None)
 
     def mousePressed(self, pos):
         for _, btn in self.buttons.items():
@@ -2264,50 +2546,70 @@ class UIManager:
         return False
 
     def update(self, screen):
-        mouse_pos = pg.mouse.get_pos()
+        start = self.game.profiler.start()
+        mouse_pos = self.game.event_manager.mouse_pos
         
         for name, btn in self.buttons.items():
             is_hovering = btn["rect"].collidepoint(mouse_pos)
             
             # Reproducir el sonido de hover cuando el mouse entra en el botón
             if is_hovering and not self.was_hovering[name]:
-                hover_sound = self.game.assets.audio["sfx"]["hover"]
-                hover_sound.play()
+                self.game.sfx.play("hover")
+
+            if is_hovering != self.was_hovering[name]:
+                self.game.mark_dirty(btn["rect"])
             
             self.was_hovering[name] = is_hovering
-            
-            # Crear una superficie para el botón con soporte de alpha
-            btn_surf = pg.Surface((btn["rect"].width, btn["rect"].height), pg.SRCALPHA)
-            
-            # Dibujar el fondo del botón con opacidad
-            btn_color = (10, 70, 135) if is_hovering else (13, 82, 154)
-            pg.draw.rect(btn_surf, btn_color, (0, 0, btn["rect"].width, btn["rect"].height), 0, 10)
-            
-            # Dibujar la imagen si se proporciona
-            if btn["image"]:
-                # Escalar la imagen para ajustar el tamaño del botón con algunos márgenes
-                img_size = min(btn["rect"].width, btn["rect"].height) - 10
-                scaled_img = pg.transform.smoothscale(btn["image"], (img_size, img_size))
-                
-                # Aplicar opacidad a la imagen
-                if btn["opacity"] < 1.0:
-                    scaled_img.set_alpha(int(255 * btn["opacity"]))
-                
-                img_rect = scaled_img.get_rect(center=(btn["rect"].width//2, btn["rect"].height//2))
-                btn_surf.blit(scaled_img, img_rect)
-            # Dibujar texto si se proporciona (y no imagen)
-            elif btn["text"]:
-                font = pg.font.Font(None, 24)
-                text_color = (255, 255, 255, int(255 * btn["opacity"]))
-                text = font.render(btn["text"], True, text_color)
-                text_rect = text.get_rect(center=(btn["rect"].width//2, btn["rect"].height//2))
-                btn_surf.blit(text, text_rect)
+
+            btn_surf = self.surfaces.get((name, is_hovering))
+            if btn_surf is None:
+                btn_surf = self.draw_button(btn, is_hovering)
+                self.surfaces[(name, is_hovering)] = btn_surf
             
             # Dibujar la superficie del botón en la pantalla
             screen.blit(btn_surf, btn["rect"])
 
+        self.game.profiler.stop("ui", start)
+
+    def draw_button(self, btn, is_hovering):
+        # Crear una superficie para el botón con soporte de alpha
+        btn_surf = pg.Surface((btn["rect"].width, btn["rect"].height), pg.SRCALPHA)
+        
+        # Dibujar el fondo del botón con opacidad
+        btn_color = (10, 70, 135) if is_hovering else (13, 82, 154)
+        pg.draw.rect(btn_surf, btn_color, (0, 0, btn["rect"].width, btn["rect"].height), 0, 10)
+        
+        # Dibujar la imagen si se proporciona
+        if btn["image"]:
+            # Escalar la imagen para ajustar el tamaño del botón con algunos márgenes
+            # y aplicar opacidad a la imagen
+            img_size = min(btn["rect"].width, btn["rect"].height) - 10
+            alpha = int(255 * btn["opacity"]) if btn["opacity"] < 1.0 else None
+            scaled_img = self.game.assets.get_scaled(btn["image"], (img_size, img_size), alpha)
+            
+            img_rect = scaled_img.get_rect(center=(btn["rect"].width//2, btn["rect"].height//2))
+            btn_surf.blit(scaled_img, img_rect)
+        # Dibujar texto si se proporciona (y no imagen)
+        elif btn["text"]:
+            text_color = (255, 255, 255, int(255 * btn["opacity"]))
+            text = self.game.assets.render_text(btn["text"], 24, text_color)
+            text_rect = text.get_rect(center=(btn["rect"].width//2, btn["rect"].height//2))
+            btn_surf.blit(text, text_rect)
+        
+        return btn_surf
+
 class AnimatedWaveBackground:
-    def __init__(self, wave_image, screen_width, screen_height, num_waves=16):
+    """Fondo de olas animado.
+
+    Cada ola se pre-renderiza una sola vez como una franja ya repetida a lo ancho
+    de la pantalla, de modo que dibujarla cuesta un blit. Si `cycle_frames` es
+    mayor que cero, el movimiento se ajusta para repetirse cada
+    `cycle_frames * cycle_step` frames y cada paso del ciclo se hornea (de forma
+    perezosa) en una sola superficie: dibujar el fondo cuesta entonces un blit.
+    La memoria del ciclo se limita a `max_cycle_mb` megabytes.
+    """
+
+    def __init__(self, wave_image, screen_width, screen_height, num_waves=16, cycle_frames=0, cycle_step=1, max_cycle_mb=256):
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.wave_image = wave_image
@@ -2355,6 +2657,7 @@ class AnimatedWaveBackground:
 
             self.wave_layers.append({
                 'surface': wave_surface,
+                'strip': self.make_strip(wave_surface),
                 'y_pos_base': y_pos,
                 'x_offset': random.randint(0, screen_width),
                 'direction': direction,
@@ -2362,76 +2665,734 @@ class AnimatedWaveBackground:
                 'frequency': frequency,
                 'amplitude': amplitude
             })
+
+        # Las olas se dibujan de arriba hacia abajo; el orden no cambia entre frames
+        self.wave_layers.sort(key=lambda w: w['y_pos_base'])
+
+        # Ciclo horneado (desactivado si cycle_frames es 0)
+        self.cycle = []
+        self.cycle_frames = 0
+        self.cycle_step = max(1, cycle_step)
+        if cycle_frames > 0:
+            frame_bytes = screen_width * screen_height * 4
+            max_frames = max(1, int(max_cycle_mb * 1024 * 1024) // frame_bytes)
+            self.cycle_frames = min(cycle_frames, max_frames)
+            self.cycle = [None] * self.cycle_frames
+            self.make_periodic(self.cycle_frames * self.cycle_step)
+
+    def make_strip(self, wave_surface):
+        """Repetir la ola a lo ancho para poder dibujarla con un solo blit"""
+        wave_width = wave_surface.get_width()
+        strip = pg.Surface((self.screen_width + wave_width, wave_surface.get_height()), pg.SRCALPHA)
+        for x in range(0, strip.get_width(), wave_width):
+            strip.blit(wave_surface, (x, 0))
+        if pg.display.get_surface() is not None:
+            strip = strip.convert_alpha()
+        return strip
+
+    def make_periodic(self, n):
+        """Ajustar velocidad y frecuencia de cada ola para que el movimiento se repita cada `n` frames.
+
+        Cada ola avanza un número entero de anchos y oscila un número entero de
+        veces por ciclo; con ciclos cortos el avance puede redondearse a cero y
+        las olas solo oscilan.
+        """
+        for wave in self.wave_layers:
+            wave_width = wave['surface'].get_width()
+            laps = round(wave['speed'] * n / wave_width)
+            wave['speed'] = laps * wave_width / n
+
+            oscillations = max(1, round(wave['frequency'] * n / (2 * math.pi)))
+            wave['frequency'] = oscillations * 2 * math.pi / n
     
     def update(self):
         self.frame_counter += 1
+        if self.cycle:
+            return
+
         for wave in self.wave_layers:
             wave['x_offset'] += wave['direction'] * wave['speed']
             
             if abs(wave['x_offset']) > wave['surface'].get_width():
                 wave['x_offset'] = 0
 
-    def draw(self, screen):
-        for wave in sorted(self.wave_layers, key=lambda w: w['y_pos_base']):
-            sin_offset = math.sin(self.frame_counter * wave['frequency']) * wave['amplitude']
-            x_pos = wave['x_offset']
+    def draw_waves(self, screen, frame, t=0.0):
+        """Dibujar las olas en `frame`, más una fracción `t` del paso siguiente"""
+        frame += t
+        for wave in self.wave_layers:
+            sin_offset = math.sin(frame * wave['frequency']) * wave['amplitude']
             y_pos = wave['y_pos_base'] + sin_offset
             
+            # La franja empieza a la izquierda de la pantalla y la cubre completa
             wave_width = wave['surface'].get_width()
-            
-            # Calcular cuántas instancias de onda necesitamos para cubrir toda la pantalla
-            # Necesitamos cubrir desde -wave_width hasta screen_width + wave_width para asegurar que no haya huecos
-            start_x = -wave_width
-            end_x = self.screen_width + wave_width
-            
-            # Calcular la posición de la primera onda que cubre el borde izquierdo
-            first_wave_x = x_pos
-            while first_wave_x > start_x:
-                first_wave_x -= wave_width
-            
-            # Dibujar ondas de izquierda a derecha para asegurar cobertura completa
-            current_x = first_wave_x
-            while current_x < end_x:
-                screen.blit(wave['surface'], (current_x, y_pos))
-                current_x += wave_width
+            x_pos = wave['x_offset']
+            if self.cycle:
+                x_pos += wave['direction'] * wave['speed'] * frame
+            else:
+                x_pos += wave['direction'] * wave['speed'] * t
+            x_pos = x_pos % wave_width - wave_width
+
+            screen.blit(wave['strip'], (x_pos, y_pos))
+
+    def bake_frame(self, index):
+        """Hornear el paso `index` del ciclo en una superficie opaca"""
+        surf = pg.Surface((self.screen_width, self.screen_height))
+        surf.fill((12, 139, 221))
+        self.draw_waves(surf, index * self.cycle_step)
+        if pg.display.get_surface() is not None:
+            surf = surf.convert()
+        return surf
+
+    def bake_all(self):
+        """Hornear todo el ciclo de una vez (por ejemplo durante la carga)"""
+        for index in range(self.cycle_frames):
+            if self.cycle[index] is None:
+                self.cycle[index] = self.bake_frame(index)
+
+    def draw(self, screen, t=0.0):
+        if not self.cycle:
+            self.draw_waves(screen, self.frame_counter, t)
+            return
+
+        index = (self.frame_counter // self.cycle_step) % self.cycle_frames
+        frame = self.cycle[index]
+        if frame is None:
+            frame = self.bake_frame(index)
+            self.cycle[index] = frame
+        screen.blit(frame, (0, 0))
+
+class AnimatedSeaBackground:
+    """Fondo de mar animado a partir de una Animation a pantalla completa: dibujarlo cuesta un blit"""
+
+    def __init__(self, animation):
+        self.sprite = AnimatedSprite(animation)
+        self.frame_counter = 0
+
+    def update(self):
+        self.frame_counter += 1
+
+    def draw(self, screen, t=0.0):
+        elapsed_ms = (self.frame_counter + t) * 1000 / TICK_RATE
+        frame = self.sprite.get_frame(elapsed_ms)
+        if frame is not None:
+            screen.blit(frame, (0, 0))
+
+class ParticleSystem:
+    """Sistema de partículas de capacidad fija guardado como arreglos (struct of arrays).
+
+    Posición, velocidad, vida y color viven en arreglos paralelos; la integración
+    y la compactación se vectorizan con NumPy si está instalado (si no, se usa
+    `array` con un recorrido lineal). Cada partícula se dibuja con un sprite
+    pre-renderizado por color y nivel de opacidad, todos en un solo `blits`.
+    """
+
+    alpha_buckets = 16  # Niveles de opacidad pre-renderizados por color
+
+    def __init__(self, capacity, colors, radius=2, gravity=0.1):
+        self.capacity = capacity
+        self.count = 0
+        self.gravity = gravity
+        self.colors = list(colors)
+        self.color_index = {color: i for i, color in enumerate(self.colors)}
+
+        if np is not None:
+            self.x = np.zeros(capacity, np.float32)
+            self.y = np.zeros(capacity, np.float32)
+            self.vx = np.zeros(capacity, np.float32)
+            self.vy = np.zeros(capacity, np.float32)
+            self.life = np.zeros(capacity, np.int32)
+            self.color = np.zeros(capacity, np.int32)
+        else:
+            self.x = array('f', bytes(4 * capacity))
+            self.y = array('f', bytes(4 * capacity))
+            self.vx = array('f', bytes(4 * capacity))
+            self.vy = array('f', bytes(4 * capacity))
+            self.life = array('i', bytes(4 * capacity))
+            self.color = array('i', bytes(4 * capacity))
+
+        # Sprites indexados por color * alpha_buckets + nivel
+        size = radius * 2
+        self.sprites = []
+        for color in self.colors:
+            for bucket in range(self.alpha_buckets):
+                alpha = min(255, (bucket + 1) * 256 // self.alpha_buckets)
+                sprite = pg.Surface((size, size), pg.SRCALPHA)
+                pg.draw.circle(sprite, (*color, alpha), (radius, radius), radius)
+                self.sprites.append(sprite)
+
+    def emit(self, x, y, vx, vy, life, color):
+        """Agregar partículas; cada argumento es una secuencia del mismo largo.
+
+        Las que no caben en la capacidad se descartan. Devuelve cuántas se agregaron.
+        """
+        n = min(len(x), self.capacity - self.count)
+        start, end = self.count, self.count + n
+        colors = [self.color_index[c] for c in color[:n]]
+
+        if np is not None:
+            self.x[start:end] = x[:n]
+            self.y[start:end] = y[:n]
+            self.vx[start:end] = vx[:n]
+            self.vy[start:end] = vy[:n]
+            self.life[start:end] = life[:n]
+            self.color[start:end] = colors
+        else:
+            for k in range(n):
+                i = start + k
+                self.x[i] = x[k]
+                self.y[i] = y[k]
+                self.vx[i] = vx[k]
+                self.vy[i] = vy[k]
+                self.life[i] = life[k]
+                self.color[i] = colors[k]
+
+        self.count = end
+        return n
+
+    def burst(self, x, y, n, speed, life, colors):
+        """Emitir `n` partículas desde un punto en direcciones aleatorias"""
+        angles = [random.uniform(0, 2 * math.pi) for _ in range(n)]
+        speeds = [random.uniform(0.3, 1.0) * speed for _ in range(n)]
+        self.emit([x] * n, [y] * n,
+                  [math.cos(a) * s for a, s in zip(angles, speeds)],
+                  [math.sin(a) * s for a, s in zip(angles, speeds)],
+                  [random.randint(life // 2, life) for _ in range(n)],
+                  [random.choice(colors) for _ in range(n)])
+
+    def clear(self):
+        self.count = 0
+
+    def bounds(self):
+        """Rectángulo que cubre las partículas vivas (con su paso siguiente), o None si no hay"""
+        n = self.count
+        if n == 0:
+            return None
+        if np is not None:
+            xs = np.concatenate((self.x[:n], self.x[:n] + self.vx[:n]))
+            ys = np.concatenate((self.y[:n], self.y[:n] + self.vy[:n]))
+            left, right, top, bottom = float(xs.min()), float(xs.max()), float(ys.min()), float(ys.max())
+        else:
+            xs = [v for i in range(n) for v in (self.x[i], self.x[i] + self.vx[i])]
+            ys = [v for i in range(n) for v in (self.y[i], self.y[i] + self.vy[i])]
+            left, right, top, bottom = min(xs), max(xs), min(ys), max(ys)
+        size = self.sprites[0].get_width()
+        return pg.Rect(int(left), int(top), int(right - left) + size + 1, int(bottom - top) + size + 1)
+
+    def update(self):
+        """Integrar un paso y compactar las partículas que murieron"""
+        n = self.count
+        if n == 0:
+            return
+
+        if np is not None:
+            self.x[:n] += self.vx[:n]
+            self.y[:n] += self.vy[:n]
+            self.vy[:n] += self.gravity
+            self.life[:n] -= 1
+
+            alive = self.life[:n] > 0
+            k = int(np.count_nonzero(alive))
+            if k < n:
+                for arr in (self.x, self.y, self.vx, self.vy, self.life, self.color):
+                    arr[:k] = arr[:n][alive]
+            self.count = k
+            return
+
+        x, y, vx, vy, life, color = self.x, self.y, self.vx, self.vy, self.life, self.color
+        gravity = self.gravity
+        i = 0
+        while i < n:
+            life[i] -= 1
+            if life[i] <= 0:
+                # Reemplazar por la última partícula viva (sin mover el resto)
+                n -= 1
+                x[i], y[i], vx[i], vy[i], life[i], color[i] = x[n], y[n], vx[n], vy[n], life[n], color[n]
+                continue
+            x[i] += vx[i]
+            y[i] += vy[i]
+            vy[i] += gravity
+            i += 1
+        self.count = n
+
+    def draw(self, screen, t=0.0):
+        """Dibujar las partículas, interpoladas una fracción `t` del paso siguiente"""
+        n = self.count
+        if n == 0:
+            return
+
+        buckets = self.alpha_buckets
+        sprites = self.sprites
+        if np is not None:
+            alpha = np.minimum(255, self.life[:n] * 3)
+            index = self.color[:n] * buckets + alpha * buckets // 256
+            xs = self.x[:n] + self.vx[:n] * t
+            ys = self.y[:n] + self.vy[:n] * t
+            positions = zip(xs.tolist(), ys.tolist())
+            screen.blits(zip(map(sprites.__getitem__, index.tolist()), positions), doreturn=False)
+            return
+
+        x, y, vx, vy, life, color = self.x, self.y, self.vx, self.vy, self.life, self.color
+        screen.blits([(sprites[color[i] * buckets + min(255, life[i] * 3) * buckets // 256],
+                       (x[i] + vx[i] * t, y[i] + vy[i] * t))
+                      for i in range(n)], doreturn=False)
+
+class AssetHandle:
+    """Asset que se carga en segundo plano y se resuelve la primera vez que se usa"""
+
+    def __init__(self, name, loader, *args):
+        self.name = name
+        self.loader = loader
+        self.args = args
+        self.future = None
+        self.value = None
+        self.resolved = False
+
+        # Tiempos para el reporte de arranque (segundos)
+        self.load_time = None  # Cargando (en el hilo que lo cargó)
+        self.wait_time = 0.0  # Bloqueado en el hilo principal esperándolo
+        self.ready_at = None  # Momento en que quedó listo, medido desde el inicio de la carga
+        self.origin = 0.0
+
+    def submit(self, pool, origin):
+        self.origin = origin
+        self.future = pool.submit(self.run)
+
+    def run(self):
+        start = time.perf_counter()
+        value = self.loader(*self.args)
+        end = time.perf_counter()
+        self.load_time = end - start
+        self.ready_at = end - self.origin
+        return value
+
+    def done(self):
+        return self.resolved or (self.future is not None and self.future.done())
+
+    def get(self):
+        if not self.resolved:
+            start = time.perf_counter()
+            # Sin future el asset es perezoso: se carga aquí mismo al pedirlo
+            self.value = self.future.result() if self.future is not None else self.run()
+            self.wait_time = time.perf_counter() - start
+            self.resolved = True
+        return self.value
+
+class AssetTable(dict):
+    """Diccionario de AssetHandle que entrega el asset ya resuelto"""
+
+    def __getitem__(self, name):
+        return dict.__getitem__(self, name).get()
 
 class AssetManager:
+
+    scaled_cache_size = 64  # Máximo de variantes escaladas en memoria
+    text_cache_size = 512  # Máximo de textos renderizados en memoria
+    load_workers = 4  # Hilos para decodificar imágenes (la decodificación y el smoothscale sueltan el GIL)
+
+    image_files = {
+        "menu": "assets/img/menu.png",
+        "bomb": "assets/img/bomb.png",
+        "spyglass": "assets/img/spyglass.png",
+        "torpedo": "assets/img/torpedo.png",
+        "target": "assets/img/target.png",
+        "broken": "assets/img/broken.png",
+        "dice": "assets/img/dice.png",
+        "clear": "assets/img/clear.png",
+        "title": "assets/img/tittle.png",
+        "wave": "assets/img/wave.png",
+        "prat": "assets/img/prat.png",
+        "prat_defeated": "assets/img/prat_defeated.png",
+        "prat_winner": "assets/img/prat_winner.png",
+    }
+    sfx_files = {
+        "hover": "assets/audio/hover.wav",
+        "create": "assets/audio/create.wav",
+        "deny": "assets/audio/deny.wav",
+        "destroy": "assets/audio/destroy.wav",
+    }
+
+    fog_file = "assets/anim/fog-cloud.png"
+    fog_sheet = (5, 8)  # Columnas y filas de la hoja de nubes
+    fog_step = 6  # Se toma una de cada `fog_step` nubes de la hoja
+
+    # Lo que necesita el primer frame del menú: se encola antes que el resto
+    menu_assets = ("wave", "background", "title", "hover")
+    # Se cargan solo si alguien los pide (menu.png no se usa en ninguna escena)
+    lazy_assets = ("menu",)
+
+    def __init__(self, sea_background=False):
+        self.sea_background = sea_background
+        self.animations = {}  # Animaciones decodificadas, compartidas por clave
+
+        self.scaled_cache = OrderedDict()
+        self.scaled_hits = 0
+        self.scaled_misses = 0
+
+        self.fonts = {}
+        self.text_cache = OrderedDict()
+        self.text_hits = 0
+        self.text_misses = 0
+
+    def get_font(self, size, name=None):
+        """Devolver la fuente compartida (name, size), creándola solo la primera vez"""
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pg.font.Font(name, size)
+            self.fonts[key] = font
+        return font
+
+    def render_text(self, text, size, color, antialias=True, font=None):
+        """Devolver el texto renderizado, cacheado con LRU por (fuente, tamaño, texto, color, antialias).
+
+        La superficie devuelta es compartida: no debe modificarse.
+        """
+        key = (font, size, text, tuple(color), antialias)
+
+        surf = self.text_cache.get(key)
+        if surf is not None:
+            self.text_cache.move_to_end(key)
+            self.text_hits += 1
+            return surf
+
+        self.text_misses += 1
+        surf = self.get_font(size, font).render(text, antialias, color)
+
+        self.text_cache[key] = surf
+        if len(self.text_cache) > self.text_cache_size:
+            self.text_cache.popitem(last=False)
+        return surf
+
+    def get_scaled(self, name, size, alpha=None):
+        """Devolver la imagen `name` escalada a `size` (y con opacidad `alpha`), cacheada con LRU.
+
+        La superficie devuelta es compartida: no debe modificarse.
+        """
+        size = (int(size[0]), int(size[1]))
+        key = (name, size, alpha)
+
+        surf = self.scaled_cache.get(key)
+        if surf is not None:
+            self.scaled_cache.move_to_end(key)
+            self.scaled_hits += 1
+            return surf
+
+        self.scaled_misses += 1
+        surf = pg.transform.smoothscale(self.images[name], size)
+        if alpha is not None:
+            surf.set_alpha(alpha)
+
+        self.scaled_cache[key] = surf
+        if len(self.scaled_cache) > self.scaled_cache_size:
+            self.scaled_cache.popitem(last=False)
+        return surf
+
+    def scaled_cache_info(self):
+        """Estadísticas del caché de imágenes escaladas"""
+        return {
+            "hits": self.scaled_hits,
+            "misses": self.scaled_misses,
+            "size": len(self.scaled_cache),
+            "maxsize": self.scaled_cache_size,
+        }
+
+    def text_cache_info(self):
+        """Estadísticas del caché de textos renderizados"""
+        return {
+            "hits": self.text_hits,
+            "misses": self.text_misses,
+            "size": len(self.text_cache),
+            "maxsize": self.text_cache_size,
+            "fonts": len(self.fonts),
+        }
+
     def load(self):
+        """Encolar la carga de todos los assets en un pool de hilos y volver de inmediato.
+
+        Primero va lo que usa el menú; cada asset queda como un AssetHandle que
+        `images[...]`, `audio["sfx"][...]` y `background` resuelven al primer uso.
+        """
+        self.load_start = time.perf_counter()
+        self.handles = OrderedDict()
+
+        self.images = AssetTable()
+        for name, path in self.image_files.items():
+            self.images[name] = self.add_handle(name, self.load_image, path)
+
         self.audio = {
             "music": {
                 "main": "assets/audio/menu.mp3",
             },
-            "sfx": {
-                "hover": pg.mixer.Sound("assets/audio/hover.wav"),
-                "create": pg.mixer.Sound("assets/audio/create.wav"),
-                "deny": pg.mixer.Sound("assets/audio/deny.wav"),
-                "destroy": pg.mixer.Sound("assets/audio/destroy.wav"),
-            }
-        }
-        for audio in self.audio["sfx"].values():
-            audio.set_volume(0.1)
-
-        self.images = {
-            "menu": pg.image.load("assets/img/menu.png").convert_alpha(),
-            "bomb": pg.image.load("assets/img/bomb.png").convert_alpha(),
-            "spyglass": pg.image.load("assets/img/spyglass.png").convert_alpha(),
-            "torpedo": pg.image.load("assets/img/torpedo.png").convert_alpha(),
-            "target": pg.image.load("assets/img/target.png").convert_alpha(),
-            "broken": pg.image.load("assets/img/broken.png").convert_alpha(),
-            "dice": pg.image.load("assets/img/dice.png").convert_alpha(),
-            "clear": pg.image.load("assets/img/clear.png").convert_alpha(),
-            "title": pg.image.load("assets/img/tittle.png").convert_alpha(),
-            "wave": pg.image.load("assets/img/wave.png").convert_alpha(),
-            "prat": pg.image.load("assets/img/prat.png").convert_alpha(),
-            "prat_defeated": pg.image.load("assets/img/prat_defeated.png").convert_alpha(),
-            "prat_winner": pg.image.load("assets/img/prat_winner.png").convert_alpha(),
+            "sfx": AssetTable()
         }
+        for name, path in self.sfx_files.items():
+            self.audio["sfx"][name] = self.add_handle(name, self.load_sound, path)
 
         # Crear un fondo de ondas animado con más ondas
-        self.background = AnimatedWaveBackground(self.images["wave"], WIDTH, HEIGHT, num_waves=12)
+        self.add_handle("background", self.build_background)
+        self.add_handle("fog", self.load_fog, self.fog_file)
+        if self.sea_background:
+            # Decodificar el GIF toma segundos: mientras tanto se muestran las olas
+            self.add_handle("sea", self.build_sea)
+
+        # El resto se encola cuando el menú ya está listo, para no competir con él por el GIL
+        pool = ThreadPoolExecutor(max_workers=self.load_workers, thread_name_prefix="assets")
+        for name in self.menu_assets:
+            self.handles[name].submit(pool, self.load_start)
+        self.handles["background"].future.add_done_callback(lambda future: self.load_rest(pool))
+
+    def load_rest(self, pool):
+        for name, handle in self.handles.items():
+            if name not in self.menu_assets and name not in self.lazy_assets:
+                handle.submit(pool, self.load_start)
+        # Las tareas encoladas siguen corriendo; solo se liberan los hilos al terminar
+        pool.shutdown(wait=False)
+
+    def add_handle(self, name, loader, *args):
+        handle = AssetHandle(name, loader, *args)
+        self.handles[name] = handle
+        return handle
+
+    def load_image(self, path):
+        return pg.image.load(path).convert_alpha()
+
+    def load_sound(self, path):
+        # El volumen lo pone SoundMixer en el canal, para poder subirlo al fusionar disparos
+        return pg.mixer.Sound(path)
+
+    def load_fog(self, path):
+        """Recortar algunas nubes de la hoja fog-cloud.
+
+        La hoja es de 6400x7200 con paleta y colorkey: convertida completa ocuparía
+        ~180 MB, así que solo se convierte el recorte de cada nube elegida.
+        """
+        sheet = pg.image.load(path)
+        cols, rows = self.fog_sheet
+        width, height = sheet.get_width() // cols, sheet.get_height() // rows
+
+        clouds = []
+        for index in range(0, cols * rows, self.fog_step):
+            frame = sheet.subsurface(((index % cols) * width, (index // cols) * height, width, height))
+            box = frame.get_bounding_rect()
+            if box.width and box.height:
+                clouds.append(frame.subsurface(box).convert_alpha())
+        return clouds
+
+    def build_background(self):
+        # Corre en el pool: "wave" se encoló antes, así que esperarlo no puede bloquear a los hilos
+        wave = self.handles["wave"].future.result()
+        return AnimatedWaveBackground(wave, WIDTH, HEIGHT, num_waves=12,
+                                      cycle_frames=WAVE_CYCLE_FRAMES, cycle_step=WAVE_CYCLE_STEP,
+                                      max_cycle_mb=WAVE_CYCLE_MB)
+
+    def build_sea(self):
+        return AnimatedSeaBackground(self.get_gif(SEA_FILE, (WIDTH, HEIGHT), SEA_MAX_MB))
+
+    def get_animation(self, key, loader, *args):
+        """Animation compartida para `key`, decodificada con `loader` solo la primera vez"""
+        handle = self.animations.get(key)
+        if handle is None:
+            handle = self.animations.setdefault(key, AssetHandle(key, loader, *args))
+        return handle.get()
+
+    def get_sheet(self, path, frame_size, count=None, duration=100):
+        """Animation de una hoja de sprites con frames de `frame_size`, de izquierda a derecha y de arriba hacia abajo"""
+        return self.get_animation((path, frame_size, count, duration), self.load_sheet, path, frame_size, count, duration)
+
+    def get_gif(self, path, size=None, max_mb=SEA_MAX_MB):
+        """Animation de un GIF escalado a `size`, usando como máximo `max_mb` megabytes"""
+        return self.get_animation((path, size, max_mb), self.load_gif, path, size, max_mb)
+
+    def load_sheet(self, path, frame_size, count, duration):
+        sheet = pg.image.load(path)
+        alpha = sheet.get_alpha() is not None or sheet.get_colorkey() is not None
+        width, height = frame_size
+        columns = sheet.get_width() // width
+        count = count or columns * (sheet.get_height() // height)
+
+        frames = []
+        for index in range(count):
+            x = (index % columns) * width
+            y = (index // columns) * height
+            # Copias independientes: get_frame no vuelve a hacer subsurface
+            frame = sheet.subsurface((x, y, width, height))
+            frames.append(frame.convert_alpha() if alpha else frame.convert())
+        return Animation(frames, [duration] * count)
+
+    def load_gif(self, path, size, max_mb):
+        """Decodificar un GIF una vez en frames opacos en formato de pantalla.
+
+        Si todos los frames no caben en `max_mb`, se guardan frames repartidos
+        de forma pareja y cada uno dura lo que duraban los que reemplaza.
+        """
+        if Image is None:
+            # Sin Pillow pygame solo entrega el primer frame
+            frame = pg.image.load(path).convert()
+            if size is not None:
+                frame = pg.transform.smoothscale(frame, size)
+            return Animation([frame], [100])
+
+        gif = Image.open(path)
+        size = size or gif.size
+        count = getattr(gif, "n_frames", 1)
+        frame_bytes = size[0] * size[1] * 4
+        keep = max(1, min(count, int(max_mb * 2**20) // frame_bytes))
+
+        frames = []
+        durations = []
+        for index in range(count):
+            # Los GIF se decodifican en orden (cada frame depende del anterior), pero solo
+            # se escalan y convierten los que se guardan
+            gif.seek(index)
+            duration = gif.info.get("duration") or 100
+            if index * keep // count == len(frames):
+                image = gif.convert("RGB")
+                if image.size != size:
+                    image = image.resize(size, Image.BILINEAR)
+                frames.append(pg.image.frombytes(image.tobytes(), size, "RGB").convert())
+                durations.append(duration)
+            else:
+                durations[-1] += duration
+        return Animation(frames, durations)
+
+    @property
+    def background(self):
+        # El mar reemplaza a las olas apenas termina de decodificarse
+        if self.sea_background and self.handles["sea"].done():
+            return self.handles["sea"].get()
+        return self.handles["background"].get()
+
+    @property
+    def fog(self):
+        return self.handles["fog"].get()
+
+    def ready(self, *names):
+        """Si los assets `names` (o todos los que se precargan) ya terminaron de cargarse"""
+        names = names or [name for name in self.handles if name not in self.lazy_assets]
+        return all(self.handles[name].done() for name in names)
+
+    def progress(self):
+        """Fracción de los assets precargados que ya está lista"""
+        handles = [handle for name, handle in self.handles.items() if name not in self.lazy_assets]
+        return sum(handle.done() for handle in handles) / len(handles)
+
+    def wait(self):
+        """Resolver todos los assets precargados, bloqueando hasta que estén listos"""
+        for name, handle in self.handles.items():
+            if name not in self.lazy_assets:
+                handle.get()
+
+    def load_timings(self):
+        """Tiempos de arranque por asset, en milisegundos (None si aún no se cargó)"""
+        ms = lambda seconds: None if seconds is None else round(seconds * 1000, 2)
+        return {
+            name: {"load_ms": ms(handle.load_time), "wait_ms": ms(handle.wait_time), "ready_ms": ms(handle.ready_at)}
+            for name, handle in self.handles.items()
+        }
+
+    def load_report(self):
+        """Reporte de arranque: carga en el hilo, espera del hilo principal y momento en que quedó listo"""
+        fmt = lambda value: "-" if value is None else f"{value:.1f}"
+        lines = [f"{'asset':<14}{'carga ms':>10}{'espera ms':>11}{'listo ms':>10}"]
+        for name, timing in self.load_timings().items():
+            lines.append(f"{name:<14}{fmt(timing['load_ms']):>10}{fmt(timing['wait_ms']):>11}{fmt(timing['ready_ms']):>10}")
+
+        ready = [self.handles[name].ready_at for name in self.handles if self.handles[name].ready_at is not None]
+        menu = [self.handles[name].ready_at for name in self.menu_assets]
+        if None not in menu:
+            lines.append(f"Menú listo en {max(menu) * 1000:.1f} ms, todo listo en {max(ready) * 1000:.1f} ms")
+        return "\n".join(lines)
+
+class SoundMixer:
+    """Reproduce los efectos de sonido con un grupo fijo de canales reservados.
+
+    Los disparos de un frame se acumulan con `play` y se reproducen en `flush`:
+    los del mismo sonido se fusionan en una sola reproducción más fuerte y cada
+    sonido tiene un intervalo mínimo entre reproducciones.
+    """
+
+    voices = 6  # Canales reservados para efectos
+    max_plays_per_frame = 3  # Llamadas al mixer por frame como máximo
+    volume = 0.1  # Volumen de un disparo
+    merge_gain = 0.25  # Volumen extra por cada disparo fusionado
+    max_gain = 2.0
+    min_interval = {"hover": 4, "destroy": 3}  # Pasos de simulación entre reproducciones
+    default_interval = 2
+
+    def __init__(self, game):
+        self.game = game
+        pg.mixer.set_num_channels(max(pg.mixer.get_num_channels(), self.voices))
+        pg.mixer.set_reserved(self.voices)
+        self.channels = [pg.mixer.Channel(i) for i in range(self.voices)]
+        self.started = [0] * self.voices  # Paso en que empezó a sonar cada canal
+
+        self.pending = OrderedDict()  # Sonido -> disparos en este frame
+        self.last_played = {}
+
+        self.plays = 0
+        self.merged = 0
+        self.throttled = 0
+        self.dropped = 0
+        self.stolen = 0
+
+    def play(self, name):
+        """Pedir que suene `name` en este frame"""
+        self.pending[name] = self.pending.get(name, 0) + 1
+
+    def flush(self):
+        """Reproducir lo pedido en el frame; se llama una vez al final de Game.update"""
+        if not self.pending:
+            return
+
+        frame = self.game.frame
+        plays = 0
+        for name, count in self.pending.items():
+            self.merged += count - 1
+
+            interval = self.min_interval.get(name, self.default_interval)
+            last = self.last_played.get(name)
+            if last is not None and frame - last < interval:
+                self.throttled += count
+                continue
+            if plays == self.max_plays_per_frame:
+                self.dropped += count
+                continue
+
+            gain = min(1 + self.merge_gain * (count - 1), self.max_gain)
+            channel = self.get_channel()
+            channel.set_volume(min(self.volume * gain, 1.0))
+            channel.play(self.game.assets.audio["sfx"][name])
+
+            self.last_played[name] = frame
+            plays += 1
+        self.plays += plays
+        self.pending.clear()
+
+    def get_channel(self):
+        """Un canal libre del grupo o, si están todos ocupados, el que lleva más tiempo sonando"""
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                break
+        else:
+            i = min(range(self.voices), key=self.started.__getitem__)
+            self.stolen += 1
+        self.started[i] = self.game.frame
+        return self.channels[i]
+
+    def info(self):
+        """Estadísticas del mixer"""
+        return {
+            "plays": self.plays,
+            "merged": self.merged,
+            "throttled": self.throttled,
+            "dropped": self.dropped,
+            "stolen": self.stolen,
+            "voices": self.voices,
+        }
 
 class Game:
-    def __init__(self, win_size, name):
+    def __init__(self, win_size, name, sea_background=False, engine="c", record_dir=None, metrics_path=METRICS_PATH,
+                 static_background=False):
         self.running = True
         pg.mixer.init()
         
@@ -2439,23 +3400,45 @@ class Game:
         pg.mixer.music.set_volume(0.3)  # Volumen para música de fondo
         
         self.win_size = win_size
-        self.frame = 0
+        self.frame = 0  # Pasos de simulación (TICK_RATE por segundo)
+        self.alpha = 0.0  # Fracción del próximo paso ya transcurrida, para interpolar el dibujo
         self.name = name
+        self.static_background = static_background  # Fondo quieto: con regiones sucias no obliga a redibujar todo
 
         self.event_manager = EventManager(self)
-        self.assets = AssetManager()
+        self.profiler = Profiler(self)
+        self.assets = AssetManager(sea_background)
+        self.sfx = SoundMixer(self)
+        self.backends = BackendManager(timeout=BACKEND_TIMEOUT, engine=engine, record_dir=record_dir)
+        self.metrics = TurnMetrics(metrics_path) if metrics_path else None  # Latencia de cada turno
+        self.archive = Archive()  # Partidas empaquetadas con archive.py (data/archive/)
+        self.history = HistoryIndex(archive=self.archive)  # Resumen de las partidas terminadas (data/index.sqlite3)
         self.info_box = InfoBox(self, WIDTH // 3, HEIGHT // 5 )
 
+        # Modo de regiones sucias (lo activa el Engine)
+        self.dirty_rect_mode = False
+        self.dirty_rects = []
+        self.full_redraw = True
+
+    def mark_dirty(self, rect):
+        """Reportar una región de pantalla que cambió en este frame"""
+        if self.dirty_rect_mode:
+            self.dirty_rects.append(pg.Rect(rect))
+
     def goto_scene(self, scene_name, *args, **kwargs):
         self.current_scene = self.scenes[scene_name]
         self.current_scene.setup(*args, **kwargs)
+        self.full_redraw = True
         
     def setup(self):
+        # Compilar el backend (o tomarlo de build/) en segundo plano
+        self.backends.start()
         self.assets.load()
         pg.mixer.music.load(self.assets.audio["music"]["main"])
         pg.mixer.music.play(-1)
 
         self.scenes = {
+            "loading": LoadingScene(self),
             "menu": MenuScene(self),
             "intro": IntroScene(self),
             "setup": SetupScene(self),
@@ -2469,8 +3452,19 @@ class Game:
         # Registrar cheats globalmente (cheats globales)
         self.event_manager.add_cheat_sequence("bomb_cheat", pg.K_F10, 3, self.activate_bomb_cheat)
 
-        self.current_scene = self.scenes["setup"] if DEV else self.scenes["menu"]
-        self.current_scene.setup()
+        # Overlay de tiempos por etapa
+        self.event_manager.add_action_key(pg.K_F3, self.profiler.toggle)
+
+        # Mientras se cargan los assets del menú se muestra la pantalla de carga
+        self.current_scene = self.scenes["loading"]
+        self.current_scene.setup("setup" if DEV else "menu")
+
+    def match_saved(self, match_id):
+        """La partida terminada ya está en data/list.txt: se indexa"""
+        try:
+            self.history.record_match(match_id)
+        except sqlite3.Error as e:
+            print(f"Error al actualizar el índice del historial: {e}")
 
     def activate_bomb_cheat(self):
         """Activar el cheat de bombas - solo funciona en MatchScene"""
@@ -2480,22 +3474,44 @@ class Game:
             self.current_scene.object_panel.items['torpedo']['quantity'] += 10
             
             # Reproducir sonido de éxito
-            create_sound = self.assets.audio["sfx"]["create"]
-            create_sound.play()
+            self.sfx.play("create")
 
-    def update(self, screen):
-        self.event_manager.update()
+    def step(self):
+        """Un paso de simulación de duración fija"""
+        if not self.static_background and self.assets.ready("background"):
+            self.profiler.call("background update", self.assets.background.update)
+        self.profiler.call("scene", self.current_scene.step)
+        self.frame += 1
+
+    def update(self, screen, steps=1, alpha=0.0):
+        """Procesar la entrada, avanzar `steps` pasos de simulación y dibujar el frame"""
+        profiler = self.profiler
+        profiler.call("events", self.event_manager.update)
+
+        for _ in range(steps):
+            self.step()
+        moved = steps > 0 or alpha != self.alpha
+        self.alpha = alpha
         
         screen.fill((12, 139, 221))
-        self.assets.background.update()
-        self.assets.background.draw(screen)
+        if self.assets.ready("background"):
+            if self.static_background:
+                profiler.call("background draw", self.assets.background.draw, screen)
+            else:
+                profiler.call("background draw", self.assets.background.draw, screen, alpha)
+                # El fondo animado cubre toda la pantalla: si se movió hay que presentarla entera
+                if moved:
+                    self.full_redraw = True
 
-        self.current_scene.update(screen)
+        if not self.current_scene.reports_dirty_rects:
+            self.full_redraw = True
+
+        profiler.call("scene", self.current_scene.update, screen)
         if self.current_scene.ui:
             self.current_scene.ui.update(screen)
-        self.frame += 1
 
-        self.info_box.draw(screen)
+        profiler.call("info box", self.info_box.draw, screen)
+        self.sfx.flush()
 
         return self.running
 
@@ -2503,9 +3519,10 @@ class EventManager:
     def __init__(self, game):
         self.game = game
         self.is_clicking = False
+        self.mouse_pos = (0, 0)  # Estado del mouse tomado una vez por frame
         self.actions = {}
         self.cheat_sequences = {}  # Para manejar secuencias de cheat
-        self.cheat_timeout_max = 60  # 1 segundo a 60 FPS
+        self.cheat_timeout_max = TICK_RATE  # 1 segundo, en pasos de simulación
 
     def add_action_key(self, key, callback):
         self.actions[key] = callback
@@ -2570,13 +3587,21 @@ class EventManager:
 
     def update(self):
         self.is_clicking = False
-        for ev in pg.event.get():
+        events = pg.event.get()
+
+        # Foto del mouse para todo el frame: los widgets la leen en vez de consultar a pygame
+        self.mouse_pos = pg.mouse.get_pos()
+
+        for ev in events:
             if ev.type == pg.QUIT:
                 self.game.running = False
 
             elif ev.type == pg.KEYDOWN:
                 self.handle_key_down(ev.key)
 
+            elif ev.type == pg.MOUSEMOTION:
+                self.mouse_pos = ev.pos
+
             elif ev.type == pg.MOUSEBUTTONDOWN:
                 self.handle_click(ev.pos)
 
@@ -2588,29 +3613,151 @@ class EventManager:
                 if hasattr(self.game.current_scene, 'handle_scroll'):
                     self.game.current_scene.handle_scroll(ev.y)
 
+            elif ev.type == BACKEND_DIED:
+                if hasattr(self.game.current_scene, 'handle_backend_died'):
+                    self.game.current_scene.handle_backend_died(ev.error)
+
+            elif ev.type == MATCH_SAVED:
+                self.game.match_saved(ev.match_id)
+
+class Animation:
+    """Frames ya recortados y en formato de pantalla, con la duración de cada uno en ms.
+
+    Se decodifica una sola vez (ver AssetManager.get_sheet y get_gif) y la
+    comparten todos los AnimatedSprite que la reproducen.
+    """
+
+    def __init__(self, frames, durations):
+        self.frames = frames
+        # Un frame de duración 0 (hay GIF así) dura 1 ms: el total nunca es 0 si hay frames
+        self.durations = [max(1, duration) for duration in durations]
+
+        # Instante en que termina cada frame, para buscar el actual con bisect
+        self.ends = []
+        total = 0
+        for duration in self.durations:
+            total += duration
+            self.ends.append(total)
+        self.total = total
+
+    def frame_at(self, ms):
+        """Frame que se muestra `ms` milisegundos después de empezar (en bucle), o None si no hay frames"""
+        if not self.total:
+            return None
+        index = bisect_right(self.ends, ms % self.total)
+        return self.frames[min(index, len(self.frames) - 1)]
+
+    def size_mb(self):
+        return sum(frame.get_width() * frame.get_height() * frame.get_bytesize() for frame in self.frames) / 2**20
+
 class AnimatedSprite:
-    def __init__(self, img, size, n_frames):
-        self.img = pg.image.load(img).convert()
-        self.size = size
-        self.n_frames = n_frames
+    """Reproducción de una Animation compartida según el tiempo transcurrido"""
+
+    def __init__(self, animation, start_ms=0):
+        self.animation = animation
+        self.start_ms = start_ms
+
+    def get_frame(self, elapsed_ms):
+        return self.animation.frame_at(elapsed_ms - self.start_ms)
+
+class Profiler:
+    """Tiempos por etapa de cada frame, mostrados en un overlay (F3).
+
+    Las etapas se miden con `start()`/`stop()` o con `call()`. Con el overlay
+    apagado `start()` devuelve None y `stop()` no hace nada, así que las
+    mediciones cuestan solo una llamada. Las etapas pueden anidarse: "ui" y
+    "backend" también quedan contadas dentro de "scene".
+    """
+
+    stages = ("events", "background update", "background draw", "scene", "ui", "info box", "flip", "backend")
+    history_size = 120  # Frames promediados
+    refresh_frames = 15  # Cada cuántos frames se vuelve a dibujar el texto del overlay
+
+    def __init__(self, game):
+        self.game = game
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.current = {}
+        self.history = {stage: deque(maxlen=self.history_size) for stage in ("frame",) + self.stages}
+        self.surface = None
+        self.frames_since_refresh = 0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.reset()
+        self.game.full_redraw = True
 
-        self.columns = self.img.get_width() // self.size[0]
-        self.rows = self.img.get_height() // self.size[1]
+    def start(self):
+        return time.perf_counter() if self.enabled else None
+
+    def stop(self, stage, start):
+        """Sumar al frame actual el tiempo de una etapa iniciada con start()"""
+        if start is None:
+            return
+        self.current[stage] = self.current.get(stage, 0) + time.perf_counter() - start
+
+    def call(self, stage, func, *args):
+        """Llamar a `func(*args)` sumando su duración a la etapa"""
+        if not self.enabled:
+            return func(*args)
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.stop(stage, start)
+
+    def end_frame(self, frame_start):
+        if frame_start is None:
+            return
+        self.history["frame"].append(time.perf_counter() - frame_start)
+        for stage in self.stages:
+            self.history[stage].append(self.current.get(stage, 0))
+        self.current = {}
+
+    def render(self, fps):
+        """Dibujar la tabla de etapas: nombre, promedio y máximo en ms"""
+        font = self.game.assets.get_font(18)
+        rows = [("FPS", f"{fps:.1f}", "")]
+        for stage, times in self.history.items():
+            if times:
+                rows.append((stage, f"{sum(times) / len(times) * 1000:.2f} ms", f"max {max(times) * 1000:.2f}"))
+
+        # Columnas alineadas: la fuente no es monoespaciada
+        widths = [max(font.size(row[col])[0] for row in rows) for col in range(3)]
+        line_height = font.get_linesize()
+        surface = pg.Surface((sum(widths) + 50, line_height * len(rows) + 16), pg.SRCALPHA)
+        surface.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            y = 8 + i * line_height
+            right = 10
+            for col, text in enumerate(row):
+                right += widths[col] + (15 if col else 0)
+                text = font.render(text, True, (255, 255, 255))
+                x = 10 if col == 0 else right - text.get_width()
+                surface.blit(text, (x, y))
+        return surface
+
+    def draw(self, screen, fps):
+        if not self.enabled:
+            return
+        if self.surface is None or self.frames_since_refresh >= self.refresh_frames:
+            self.surface = self.render(fps)
+            self.frames_since_refresh = 0
+        self.frames_since_refresh += 1
 
-    def get_frame(self, frame):
-        frame = frame % self.n_frames  # Asegurar que el frame esté dentro de los límites
-        row = frame // self.columns    # Calcular la fila basada en las columnas
-        col = frame % self.columns     # Calcular la columna
-        x = col * self.size[0]         # Calcular la posición x
-        y = row * self.size[1]         # Calcular la posición y
-        return self.img.subsurface(x, y, self.size[0], self.size[1])
+        rect = screen.blit(self.surface, (WIDTH - self.surface.get_width() - 10, 10))
+        self.game.mark_dirty(rect)
 
 class Engine:
 
     FPS = 60
 
-    def __init__(self, game):
+    def __init__(self, game, dirty_rects=False, fps=FPS):
         self.game = game
+        self.dirty_rects = dirty_rects
+        self.fps = fps
         self.setup()
 
     def setup(self):
@@ -2619,22 +3766,86 @@ class Engine:
         self.screen = pg.display.set_mode((WIDTH, HEIGHT))
         self.clock = pg.time.Clock()
 
+    def present(self):
+        """Presentar el frame: flip completo o solo las regiones sucias reportadas"""
+        game = self.game
+        if not game.dirty_rect_mode or game.full_redraw:
+            pg.display.flip()
+        elif game.dirty_rects:
+            screen_rect = self.screen.get_rect()
+            pg.display.update([rect.clip(screen_rect) for rect in merge_rects(game.dirty_rects)])
+
+        game.dirty_rects = []
+        game.full_redraw = False
+
     def run(self):
         self.running = True
+        self.game.dirty_rect_mode = self.dirty_rects
         self.game.setup()
-        while self.game.update(self.screen):
-            pg.display.flip()
-            self.clock.tick(self.FPS)
+        profiler = self.game.profiler
+
+        # Paso fijo: el tiempo real transcurrido se consume en pasos de 1 / TICK_RATE
+        # y lo que sobra se usa para interpolar el dibujo
+        dt = 1 / TICK_RATE
+        accumulator = 0.0
+        previous = time.perf_counter()
+        while True:
+            frame_start = profiler.start()
+            now = time.perf_counter()
+            accumulator += min(now - previous, MAX_FRAME_TIME)
+            previous = now
+            steps = int(accumulator / dt)
+            accumulator -= steps * dt
+
+            if not self.game.update(self.screen, steps, accumulator / dt):
+                break
+            profiler.draw(self.screen, self.clock.get_fps())
+            profiler.call("flip", self.present)
+            profiler.end_frame(frame_start)
+            self.clock.tick(self.fps)
+
+        if DEV:
+            print("Caché de imágenes escaladas:", self.game.assets.scaled_cache_info())
+            print("Caché de textos:", self.game.assets.text_cache_info())
+            print("Efectos de sonido:", self.game.sfx.info())
+            print("Carga de assets:")
+            print(self.game.assets.load_report())
+            print("Backend:")
+            print(self.game.backends.report())
+
+        self.game.backends.shutdown()
+        if self.game.metrics is not None:
+            self.game.metrics.close()
+        self.game.history.close()
+        self.game.archive.close()
 
         pg.quit()
 
 def main():
 
     args = sys.argv[1:]
+    dirty_rects = "--dirty-rects" in args
+    sea_background = "--sea" in args
+    static_background = "--static-background" in args
+    fps = Engine.FPS
+    engine = "c"
+    record_dir = None
+    metrics_path = None if "--no-metrics" in args else METRICS_PATH
+    for arg in args:
+        if arg.startswith("--fps="):
+            fps = int(arg.split("=", 1)[1])
+        if arg.startswith("--engine="):
+            engine = arg.split("=", 1)[1]
+        if arg.startswith("--record="):
+            record_dir = arg.split("=", 1)[1]
+        if arg.startswith("--metrics="):
+            metrics_path = arg.split("=", 1)[1]
+    args = [arg for arg in args if not arg.startswith("--")]
     name = args[0] if len(args) > 0 else "anonimo"
 
-    game = Game(win_size=(WIDTH, HEIGHT), name=name)
-    engine = Engine(game)
+    game = Game(win_size=(WIDTH, HEIGHT), name=name, sea_background=sea_background, engine=engine,
+                record_dir=record_dir, metrics_path=metrics_path, static_background=static_background)
+    engine = Engine(game, dirty_rects=dirty_rects, fps=fps)
     engine.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,379 @@
+"""Índice persistente (SQLite) con el resumen de cada partida terminada.
+
+`main.exe listaHistorial` vuelve a leer entero cada data/<id>.txt de
+data/list.txt para armar el listado, aunque HistoryScene solo muestra el
+resumen. El índice (data/index.sqlite3) guarda por partida el jugador, la
+victoria y el puntaje (los mismos valores que imprime listaHistorial), la
+cantidad de movimientos y la fecha. HistoryScene lee de a páginas solo las
+filas visibles, así que abrirlo no depende del tamaño del historial.
+
+El índice se pone al día comparándolo con data/list.txt, que solo crece: se
+guarda hasta qué byte ya se indexó y los últimos bytes de esa parte. Si el
+archivo no cambió no se lee nada; si creció se indexan solo las partidas
+nuevas (al terminar cada partida); si se reescribió se compara la lista
+completa y solo se vuelven a leer las partidas cuyo archivo cambió.
+
+Uso:
+    python history_index.py check            (compara con listaHistorial)
+    python history_index.py bench [--matches 5000]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+from protocol import END, HistoryRow, decode_message, split_log
+
+INDEX_NAME = "index.sqlite3"
+PAGE_SIZE = 64  # Filas por consulta al recorrer el historial
+TAIL_SIZE = 64  # Bytes del final ya indexado de list.txt que se comparan para saber si solo creció
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id TEXT PRIMARY KEY,
+    player TEXT NOT NULL,
+    victory INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    moves INTEGER NOT NULL,
+    finished REAL NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    valid INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS matches_by_score ON matches (valid, score DESC, position);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value) WITHOUT ROWID;
+"""
+
+def read_summary(path):
+    """(jugador, victoria, puntaje, movimientos, válida) de un archivo de partida, como lo lee leerPartida"""
+    with open(path, "rb") as f:
+        return summarize_log(f.read())
+
+def summarize_log(data):
+    """read_summary sobre el contenido (bytes) del archivo de una partida"""
+    lines = data.split(b"\n", 2)
+    player = lines[1].decode(errors="replace") if len(lines) > 1 else ""
+
+    # El resultado está en la última línea "777 resultado puntaje"
+    result = score = None
+    start = data.rfind(b"\n777", sum(len(line) + 1 for line in lines[:2]) - 1)
+    if start >= 0:
+        end = data.find(b"\n", start + 1)
+        try:
+            message = decode_message(data[start + 1:end if end >= 0 else len(data)])
+            if message.code == END:
+                result, score = message.result, message.score
+        except ValueError:
+            pass
+
+    # Movimientos: las líneas "4 ..." y "5 ..." de los turnos (no las del tablero de la cabecera)
+    _, body = split_log(data)
+    moves = body.count(b"\n4 ") + body.count(b"\n5 ")
+
+    # listaHistorial descarta la partida sin resultado o sin nombre, y la fila no se lee si el nombre tiene espacios
+    valid = result is not None and score != -1 and bool(player) and len(player.split()) == 1
+    # En el listado: 1 si el 777 trae 1 (DEFEAT), 0 si no
+    victory = 1 if result == 1 else 0
+    return player, victory, score if score is not None else -1, moves, valid
+
+class HistoryRows:
+    """Filas del historial ordenadas por puntaje, leídas del índice de a páginas (para VirtualTable)"""
+
+    max_pages = 32
+
+    def __init__(self, index, count, convert):
+        self.index = index
+        self.count = count
+        self.convert = convert  # HistoryRow -> celdas de la tabla
+        self.pages = OrderedDict()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        number, offset = divmod(i, PAGE_SIZE)
+        page = self.pages.get(number)
+        if page is None:
+            page = [self.convert(row) for row in self.index.page(number * PAGE_SIZE, PAGE_SIZE)]
+            self.pages[number] = page
+            if len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(number)
+        return page[offset]
+
+class HistoryIndex:
+
+    def __init__(self, data_dir="data", archive=None):
+        self.data_dir = data_dir
+        self.archive = archive  # archive.Archive para las partidas que ya no están en data/ (opcional)
+        self.path = os.path.join(data_dir, INDEX_NAME)
+        self.db = None
+
+    def connect(self):
+        if self.db is None:
+            os.makedirs(self.data_dir, exist_ok=True)
+            self.db = sqlite3.connect(self.path)
+            self.db.execute("PRAGMA synchronous = NORMAL")
+            self.db.executescript(SCHEMA)
+        return self.db
+
+    def get_meta(self, key, default=None):
+        row = self.connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_meta(self, **values):
+        self.connect().executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", values.items())
+
+    def list_path(self):
+        return os.path.join(self.data_dir, "list.txt")
+
+    def summarize(self, match_id, position):
+        """Fila del índice para data/<match_id>.txt (o su registro en el archivo), o None si no existe"""
+        path = os.path.join(self.data_dir, f"{match_id}.txt")
+        try:
+            stat = os.stat(path)
+            player, victory, score, moves, valid = read_summary(path)
+        except OSError:
+            summary = self.archive.summary(match_id) if self.archive is not None else None
+            if summary is None:
+                return None
+            player, victory, score, moves, valid, finished, length = summary
+            return (match_id, player, victory, score, moves, finished, length, 0, position, int(valid))
+        return (match_id, player, victory, score, moves, stat.st_mtime, stat.st_size, stat.st_mtime_ns,
+                position, int(valid))
+
+    def insert(self, match_ids, first_position):
+        """Indexar partidas recién agregadas a list.txt (una ya indexada conserva su posición)"""
+        db = self.connect()
+        for position, match_id in enumerate(match_ids, first_position):
+            row = db.execute("SELECT position FROM matches WHERE id = ?", (match_id,)).fetchone()
+            summary = self.summarize(match_id, row[0] if row is not None else position)
+            if summary is not None:
+                db.execute("INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", summary)
+
+    def rebuild(self, match_ids):
+        """list.txt se reescribió: quitar lo que ya no está y releer solo los archivos que cambiaron"""
+        db = self.connect()
+        known = {row[0]: row[1:] for row in db.execute("SELECT id, size, mtime_ns, position FROM matches")}
+        positions = {}
+        for position, match_id in enumerate(match_ids):
+            positions.setdefault(match_id, position)
+
+        db.executemany("DELETE FROM matches WHERE id = ?", [(match_id,) for match_id in known.keys() - positions.keys()])
+        for match_id, position in positions.items():
+            try:
+                stat = os.stat(os.path.join(self.data_dir, f"{match_id}.txt"))
+                if known.get(match_id) == (stat.st_size, stat.st_mtime_ns, position):
+                    continue
+            except OSError:
+                pass  # Archivada o borrada: lo resuelve summarize
+            summary = self.summarize(match_id, position)
+            if summary is None:
+                db.execute("DELETE FROM matches WHERE id = ?", (match_id,))
+            else:
+                db.execute("INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", summary)
+
+    def repair(self):
+        """Poner el índice al día con data/list.txt; devuelve cuántas partidas nuevas se leyeron"""
+        db = self.connect()
+        try:
+            stat = os.stat(self.list_path())
+        except OSError:
+            stat = None
+        signature = f"{stat.st_size}:{stat.st_mtime_ns}" if stat is not None else ""
+        if self.get_meta("list_signature") == signature:
+            return 0
+
+        offset = self.get_meta("list_offset", 0)
+        tail = self.get_meta("list_tail", b"")
+        lines = self.get_meta("list_lines", 0)
+        with db:
+            if stat is None:
+                db.execute("DELETE FROM matches")
+                self.set_meta(list_offset=0, list_tail=b"", list_lines=0)
+                added = 0
+            else:
+                with open(self.list_path(), "rb") as f:
+                    f.seek(max(0, offset - len(tail)))
+                    appended = stat.st_size >= offset and f.read(len(tail)) == tail
+                    if not appended:
+                        f.seek(0)
+                        offset = lines = 0
+                    data = f.read()
+
+                # Solo líneas completas: la última puede estar escribiéndose
+                end = data.rfind(b"\n") + 1
+                match_ids = [line.strip().decode(errors="replace") for line in data[:end].split(b"\n")[:-1]]
+                match_ids = [match_id for match_id in match_ids if match_id]
+                if appended:
+                    self.insert(match_ids, lines)
+                else:
+                    self.rebuild(match_ids)
+                added = len(match_ids)
+
+                tail = (tail if appended else b"") + data[:end]
+                self.set_meta(list_offset=offset + end, list_tail=tail[-TAIL_SIZE:], list_lines=lines + len(match_ids))
+
+            count = db.execute("SELECT COUNT(*) FROM matches WHERE valid = 1").fetchone()[0]
+            self.set_meta(list_signature=signature, count=count)
+        return added
+
+    def record_match(self, match_id):
+        """Al terminar una partida (ya en data/ y en list.txt): indexar lo nuevo de list.txt"""
+        self.repair()
+
+    def rows(self, convert=lambda row: row):
+        """Filas válidas por puntaje (como las ordena HistoryScene), leídas a medida que se muestran"""
+        self.repair()
+        return HistoryRows(self, self.get_meta("count", 0), convert)
+
+    def page(self, start, size):
+        cursor = self.connect().execute(
+            "SELECT id, player, victory, score FROM matches WHERE valid = 1 "
+            "ORDER BY score DESC, position LIMIT ? OFFSET ?", (size, start))
+        return [HistoryRow(*row) for row in cursor]
+
+    def summary(self, match_id):
+        """(jugador, victoria, puntaje, movimientos, fecha) de una partida, o None"""
+        return self.connect().execute("SELECT player, victory, score, moves, finished FROM matches WHERE id = ?",
+                                      (match_id,)).fetchone()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+# Herramienta: comparación con listaHistorial y tiempos
+
+def list_history(executable, root):
+    """Filas que imprime `main.exe listaHistorial` en `root` (sin pedir detalles)"""
+    start = time.perf_counter()
+    proc = subprocess.run([executable, "listaHistorial"], cwd=root, input=b"", capture_output=True)
+    elapsed = time.perf_counter() - start
+    rows = []
+    for line in proc.stdout.decode(errors="replace").splitlines():
+        if line == "---":
+            break
+        fields = line.split()
+        if len(fields) == 4:
+            rows.append((fields[0], fields[1], int(fields[2]), int(fields[3])))
+    return rows, elapsed
+
+def check(args):
+    """Las filas del índice deben ser las mismas que las de listaHistorial.
+
+    listaHistorial no ve las partidas que `archive.py pack --remove` sacó de data/;
+    esas filas se comparan con el resumen guardado en data/archive/.
+    """
+    from archive import Archive
+    from backend import BackendManager
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    expected, _ = list_history(BackendManager(root).build(), ".")
+    archive = Archive()
+    index = HistoryIndex(archive=archive)
+    rows = index.rows()
+    actual = [(row.match_id, row.player, row.victory, row.score) for row in (rows[i] for i in range(len(rows)))]
+    missing = sorted(set(expected) - set(actual))
+    extra = sorted(set(actual) - set(expected))
+    archived = []
+    for row in extra:
+        if os.path.exists(os.path.join("data", f"{row[0]}.txt")):
+            continue
+        summary = archive.summary(row[0])
+        if summary is not None and summary[4] and tuple(summary[:3]) == row[1:]:
+            archived.append(row)
+    extra = [row for row in extra if row not in archived]
+    archive.close()
+    print(f"{len(expected)} filas en listaHistorial, {len(actual)} en el índice ({len(archived)} solo archivadas)")
+    for row in missing[:10]:
+        print("falta en el índice:", *row)
+    for row in extra[:10]:
+        print("sobra en el índice:", *row)
+    return 1 if missing or extra else 0
+
+def bench(args):
+    """Historial sintético de `--matches` partidas: listaHistorial contra abrir el índice"""
+    from backend import BackendManager
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    executable = BackendManager(root).build()
+    sources = [os.path.join("data", name) for name in sorted(os.listdir("data"))
+               if name.endswith(".txt") and name != "list.txt"] if os.path.isdir("data") else []
+    sources = [path for path in sources if read_summary(path)[4]]
+    if not sources:
+        print("No hay partidas terminadas en data/ para copiar (jugar una o usar simulate.py --keep)")
+        return 1
+
+    workdir = tempfile.mkdtemp(prefix="history-index-")
+    try:
+        data_dir = os.path.join(workdir, "data")
+        os.makedirs(data_dir)
+        with open(os.path.join(data_dir, "list.txt"), "w") as f:
+            for n in range(args.matches):
+                match_id = f"{n:05x}"
+                shutil.copy(sources[n % len(sources)], os.path.join(data_dir, f"{match_id}.txt"))
+                f.write(f"{match_id}\n")
+
+        results = {"matches": args.matches}
+        _, results["listaHistorial_ms"] = list_history(executable, workdir)
+
+        def open_rows():
+            # Lo que hace HistoryScene al entrar: poner al día el índice y leer la primera página
+            start = time.perf_counter()
+            index = HistoryIndex(data_dir)
+            rows = index.rows()
+            rows[0]
+            elapsed = time.perf_counter() - start
+            index.close()
+            return elapsed
+
+        results["index_build_ms"] = open_rows()
+        results["index_open_ms"] = open_rows()
+
+        # Bajar hasta el final de la tabla (OFFSET recorre las filas anteriores)
+        index = HistoryIndex(data_dir)
+        rows = index.rows()
+        start = time.perf_counter()
+        rows[len(rows) - 1]
+        results["index_last_page_ms"] = time.perf_counter() - start
+        index.close()
+
+        # Una partida más al final de list.txt: solo se lee esa
+        with open(os.path.join(data_dir, "list.txt"), "a") as f:
+            shutil.copy(sources[0], os.path.join(data_dir, "fffff.txt"))
+            f.write("fffff\n")
+        results["index_append_ms"] = open_rows()
+
+        for key, value in results.items():
+            if key.endswith("_ms"):
+                print(f"{key:<22}{value * 1000:>10.2f} ms")
+            else:
+                print(f"{key:<22}{value:>10}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice del historial de partidas")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("check", help="comparar el índice con listaHistorial").set_defaults(handler=check)
+    bench_parser = commands.add_parser("bench", help="tiempo de listaHistorial contra el índice")
+    bench_parser.add_argument("--matches", type=int, default=5000)
+    bench_parser.set_defaults(handler=bench)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -217,7 +217,9 @@ Tablero *inicializarTableroBot(List *player_boats, int ancho, int alto)
     }
 
     // Colocar barcos aleatoriamente, coincidiendo con los tamaños de los barcos del jugador
-    srand(time(NULL));
+    // La variable de entorno SEMILLA fija la semilla para reproducir una partida (rules.py check)
+    const char *semilla = getenv("SEMILLA");
+    srand(semilla ? (unsigned int)strtoul(semilla, NULL, 10) : (unsigned int)time(NULL));
     int boat_id = 1;
 
     // Iterar a través de los barcos del jugador para coincidir con sus tamaños
@@ -887,6 +889,7 @@ int mostrarAyuda()
     printf("Uso: <accion> [parametros]\n\n");
     printf("Acciones disponibles:\n");
     printf("  iniciarJuego <archivo_configuracion> - Inicia una nueva partida\n");
+    printf("  iniciarJuego - - Igual, pero lee el archivo de configuracion de la primera linea de stdin\n");
     printf("  buscarPartida <id_partida> - Muestra el historial de una partida\n");
     printf("  ayuda - Muestra esta ayuda\n\n");
     printf("Formato de entrada durante el juego:\n");
@@ -1374,7 +1377,7 @@ Partida *leerPartida(const char *linea)
             else if (id_objeto == 3) // Torpedo
             {
                 int dir = 0;
-                sscanf(l, "%*d %d %d %d", &dir);
+                sscanf(l, "%*d %*d %*d %*d %d", &dir); // 5 3 x y orientación
                 parametros[1] = dir;
                 n_parametros_adicionales = 2;
             }
@@ -1586,6 +1589,8 @@ int main(int n_args, char *args[])
     }
 
     // main.exe iniciarJuego <archivo_configuracion>
+    // main.exe iniciarJuego -   (el nombre del archivo llega en la primera línea de stdin,
+    //                            para poder lanzar el proceso antes de tener la configuración)
     if (strcmp(args[1], "iniciarJuego") == 0)
     {
         if (n_args < 3)
@@ -1594,6 +1599,14 @@ int main(int n_args, char *args[])
             mostrarAyuda();
             return 1;
         }
+        if (strcmp(args[2], "-") == 0)
+        {
+            char archivo[256];
+            if (!fgets(archivo, sizeof(archivo), stdin))
+                return 1;
+            archivo[strcspn(archivo, "\r\n")] = '\0';
+            return iniciarJuego(archivo);
+        }
         return iniciarJuego(args[2]);
     }
 
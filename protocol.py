@@ -0,0 +1,480 @@
+"""Codificación y decodificación de los mensajes entre el juego y main.exe.
+
+Los códigos están en CODIGOS.md. Un turno es una línea "8 n" seguida de n
+mensajes, tanto en lo que envía el juego (4 ataque, 5 objeto) como en lo que
+responde el backend (9 estado de casilla, 4 ataque del bot, 777 fin). El
+historial (`listaHistorial`) responde bloques de líneas terminados en "---".
+
+La salida del backend se lee en binario con un buffer grande (FrameReader).
+En un turno con muchos mensajes (una bomba o un catalejo generan varios 9)
+los n mensajes se sacan del buffer de una sola vez y la racha de mensajes 9
+del principio se convierte a enteros de un golpe, sin partir línea por
+línea. Ese lote tiene un costo fijo que solo se paga desde unos 10
+mensajes: el turno común (un 9 y el ataque del bot) se lee línea por línea.
+
+Uso como herramienta:
+    python protocol.py bench [--messages N] [--turns N]
+    python protocol.py check [archivos...]   (por defecto las partidas de fixtures/partidas/)
+"""
+
+import argparse
+import glob
+import io
+import os
+import re
+import sys
+import time
+
+# Códigos de CODIGOS.md
+ATTACK = 4
+OBJECT = 5
+HORIZONTAL = 6
+VERTICAL = 7
+TURN = 8
+STATE = 9
+END = 777
+
+BOMB = 1
+SPYGLASS = 2
+TORPEDO = 3
+
+OBJECT_NAMES = {BOMB: "Bomba", SPYGLASS: "Catalejo", TORPEDO: "Torpedo"}
+
+# Resultado de un 777 (visto desde el jugador)
+DEFEAT = 1
+VICTORY = 2
+
+BUFFER_SIZE = 1 << 16
+BLOCK_END = b"---"
+SMALL_BATCH = 8  # Hasta cuántos mensajes por turno se decodifica línea por línea (ver `bench`)
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "partidas")
+
+class Message:
+    """Mensaje de un turno. Las subclases definen `code` y sus campos en __slots__"""
+
+    __slots__ = ()
+    code = None
+
+    def fields(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def encode(self):
+        """Línea del mensaje, sin salto de línea"""
+        return " ".join(map(str, (self.code, *self.fields())))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.fields() == other.fields()
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self.fields()}"
+
+class Attack(Message):
+    """4 x y (el del bot llega como 4 fila columna)"""
+
+    __slots__ = ("x", "y")
+    code = ATTACK
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+class UseObject(Message):
+    """5 id x y [orientación]; solo el torpedo lleva orientación (6 o 7)"""
+
+    __slots__ = ("object_id", "x", "y", "orientation")
+    code = OBJECT
+
+    def __init__(self, object_id, x, y, orientation=None):
+        self.object_id = object_id
+        self.x = x
+        self.y = y
+        self.orientation = orientation
+
+    def fields(self):
+        if self.orientation is None:
+            return (self.object_id, self.x, self.y)
+        return (self.object_id, self.x, self.y, self.orientation)
+
+class CellState(Message):
+    """9 x y valor"""
+
+    __slots__ = ("x", "y", "value")
+    code = STATE
+
+    def __init__(self, x, y, value):
+        self.x = x
+        self.y = y
+        self.value = value
+
+class GameOver(Message):
+    """777 resultado puntaje"""
+
+    __slots__ = ("result", "score")
+    code = END
+
+    def __init__(self, result, score):
+        self.result = result
+        self.score = score
+
+class Unknown(Message):
+    """Línea que no es un mensaje del protocolo (avisos o errores del backend)"""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def encode(self):
+        return self.text
+
+MESSAGE_TYPES = {ATTACK: Attack, OBJECT: UseObject, STATE: CellState, END: GameOver}
+
+class HistoryRow:
+    """Fila del listado de listaHistorial: id nombre victoria puntaje"""
+
+    __slots__ = ("match_id", "player", "victory", "score")
+
+    def __init__(self, match_id, player, victory, score):
+        self.match_id = match_id
+        self.player = player
+        self.victory = victory
+        self.score = score
+
+    def encode(self):
+        return f"{self.match_id} {self.player} {self.victory} {self.score}"
+
+class HistoryMove:
+    """Movimiento del detalle de una partida: el mensaje y quién lo hizo (1 = jugador)"""
+
+    __slots__ = ("message", "player")
+
+    def __init__(self, message, player):
+        self.message = message
+        self.player = player
+
+    def encode(self):
+        return f"{self.message.encode()} {self.player}"
+
+# Codificación
+
+def encode_turn(messages):
+    """Turno completo ("8 n" y sus mensajes) listo para escribir al backend"""
+    lines = [f"{TURN} {len(messages)}"]
+    lines.extend(message.encode() for message in messages)
+    lines.append("")
+    return "\n".join(lines).encode()
+
+def encode_turns(turns):
+    """Varios turnos seguidos en un solo bloque de bytes"""
+    return b"".join(encode_turn(messages) for messages in turns)
+
+def encode_config(match_id, player, grid_state, objects):
+    """Contenido de cache/<id>.txt, la configuración que lee iniciarJuego.
+
+    grid_state: filas del tablero del jugador (0 agua, id del barco en sus casillas)
+    objects: pares (id del objeto, cantidad)
+    """
+    lines = [match_id, player, f"{len(grid_state)} {len(grid_state[0])}"]
+    lines.extend(" ".join(map(str, row)) for row in grid_state)
+    lines.append(f"N objetos: {len(objects)}")
+    lines.extend(f"{object_id} {quantity}" for object_id, quantity in objects)
+    lines.append("")
+    return "\n".join(lines)
+
+# Decodificación
+
+# Enteros ya convertidos: coordenadas, valores de casilla y códigos caben de sobra
+# y buscarlos en un dict cuesta menos de la mitad que int() sobre bytes
+SMALL_INTS = {str(i).encode(): i for i in range(-1000, 1000)}
+
+def parse_ints(tokens):
+    try:
+        return list(map(SMALL_INTS.__getitem__, tokens))
+    except KeyError:
+        return list(map(int, tokens))
+
+def decode_fields(fields):
+    """Mensaje a partir de los campos (bytes) de una línea"""
+    try:
+        values = parse_ints(fields)
+        return MESSAGE_TYPES[values[0]](*values[1:])
+    except (ValueError, IndexError, KeyError, TypeError):
+        return Unknown(b" ".join(fields).decode(errors="replace"))
+
+def decode_message(line):
+    if isinstance(line, str):
+        line = line.encode()
+    return decode_fields(line.split())
+
+# Salto de línea tras el cual no viene un mensaje 9
+NOT_STATE = re.compile(rb"\n(?!9 )")
+
+def decode_batch(chunk):
+    """Mensajes de un bloque de líneas ya leído (bytes terminados en salto de línea)"""
+    if not chunk:
+        return []
+
+    # Camino rápido: la racha inicial de 9 se convierte a enteros de una vez
+    messages = []
+    end = 0
+    if chunk.startswith(b"9 "):
+        match = NOT_STATE.search(chunk)
+        end = match.start() + 1 if match else len(chunk)
+        try:
+            values = parse_ints(chunk[:end].split())
+        except ValueError:
+            values = ()
+        if values and len(values) % 4 == 0:
+            messages = [CellState(x, y, value)
+                        for x, y, value in zip(values[1::4], values[2::4], values[3::4])]
+        else:
+            end = 0  # Algún 9 mal formado: se decodifica línea por línea
+
+    messages.extend(decode_message(line) for line in chunk[end:].splitlines())
+    return messages
+
+def decode_turns(data):
+    """Todos los turnos de un bloque de bytes con uno o más "8 n" seguidos"""
+    reader = FrameReader(io.BytesIO(data))
+    turns = []
+    while True:
+        try:
+            turns.append(read_turn(reader))
+        except EOFError:
+            return turns
+
+def decode_history_row(line):
+    """HistoryRow de una línea del listado, o None si es un aviso del backend"""
+    fields = line.split()
+    if len(fields) != 4:
+        return None
+    try:
+        return HistoryRow(fields[0], fields[1], int(fields[2]), int(fields[3]))
+    except ValueError:
+        return None
+
+def decode_history_move(line):
+    """HistoryMove de una línea del detalle ("4 x y jugador" o "5 id x y [orientación] jugador")"""
+    fields = line.split()
+    if len(fields) < 2:
+        return None
+    message = decode_fields(fields[:-1])
+    if isinstance(message, Unknown):
+        return None
+    return HistoryMove(message, int(fields[-1]))
+
+class FrameReader:
+    """Lector de líneas sobre un stream binario con buffer (stdout del backend).
+
+    tap: función que recibe cada bloque de bytes leído (para grabar la sesión)
+    """
+
+    def __init__(self, stream, buffer_size=BUFFER_SIZE, tap=None):
+        if not hasattr(stream, "peek"):
+            stream = io.BufferedReader(stream, buffer_size)
+        self.stream = stream
+        self.tap = tap
+
+    def readline(self):
+        line = self.stream.readline()
+        if not line:
+            raise EOFError
+        if self.tap is not None:
+            self.tap(line)
+        return line
+
+    def read_lines(self, n):
+        """Bytes con las próximas n líneas completas, sacadas del buffer en la menor cantidad de lecturas"""
+        stream = self.stream
+        chunks = []
+        while n > 0:
+            data = stream.peek()
+            if not data:
+                raise EOFError
+
+            # Buscar el salto de la n-ésima línea sin recorrer el resto del buffer
+            end = found = 0
+            position = data.find(b"\n")
+            while position >= 0:
+                end = position + 1
+                found += 1
+                if found == n:
+                    break
+                position = data.find(b"\n", end)
+
+            if found:
+                chunks.append(stream.read(end))
+                n -= found
+            else:
+                # Ni una línea completa en el buffer: esperar con readline
+                line = stream.readline()
+                if not line:
+                    raise EOFError
+                chunks.append(line)
+                n -= 1
+
+        data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        if self.tap is not None:
+            self.tap(data)
+        return data
+
+# Lectores de respuestas para BackendClient.submit
+
+def read_line(reader):
+    """Respuesta de una sola línea (por ejemplo el saludo inicial)"""
+    return reader.readline().decode(errors="replace").strip()
+
+def read_block(reader):
+    """Respuesta de listaHistorial: líneas hasta un "---" (sin incluirlo)"""
+    lines = []
+    while True:
+        line = reader.readline()
+        if BLOCK_END in line:
+            return lines
+        lines.append(line.decode(errors="replace").strip())
+
+def read_history(reader):
+    """Listado de listaHistorial como HistoryRow, sin los avisos del backend"""
+    return [row for row in map(decode_history_row, read_block(reader)) if row is not None]
+
+def read_moves(reader):
+    """Detalle de una partida como HistoryMove"""
+    return [move for move in map(decode_history_move, read_block(reader)) if move is not None]
+
+def read_turn(reader):
+    """Respuesta de un turno: "8 n" seguido de n mensajes. Devuelve la lista de mensajes"""
+    first_line = reader.readline()
+    if not first_line.startswith(b"8 "):
+        return []
+    n = int(first_line.split()[1])
+    if n <= SMALL_BATCH:
+        # Con pocos mensajes el lote no alcanza a pagar su costo fijo
+        return [decode_fields(reader.readline().split()) for _ in range(n)]
+    return decode_batch(reader.read_lines(n))
+
+def read_turn_batch(reader):
+    """read_turn siempre por lote, sin importar n (para comparar en `bench`)"""
+    first_line = reader.readline()
+    if not first_line.startswith(b"8 "):
+        return []
+    return decode_batch(reader.read_lines(int(first_line.split()[1])))
+
+# Herramienta: microbenchmark y verificación de ida y vuelta
+
+def legacy_decode(lines):
+    """Decodificación como se hacía antes en MatchScene (split por mensaje), para comparar"""
+    messages = []
+    for message in lines:
+        message_type = int(message.split()[0])
+        if message_type == 4:
+            x, y = map(int, message.split()[1:])
+            messages.append((message_type, x, y))
+        if message_type == 9:
+            x, y, value = map(int, message.split()[1:])
+            messages.append((message_type, x, y, value))
+        if message_type == 777:
+            messages.append((message_type, int(message.split()[1])))
+    return messages
+
+def legacy_read_turn(stream):
+    first_line = stream.readline().strip()
+    if not first_line.startswith("8 "):
+        return []
+    return legacy_decode([stream.readline().strip() for _ in range(int(first_line.split()[1]))])
+
+def sample_turn(n_states):
+    """Respuesta típica: n mensajes 9 (jugador) y el ataque del bot"""
+    messages = [CellState(i % 10, i // 10 % 10, 99 if i % 3 else -(i % 5 + 1)) for i in range(n_states)]
+    messages.append(Attack(3, 7))
+    return messages
+
+def bench(args):
+    results = []
+    for n_states in args.messages:
+        data = encode_turns([sample_turn(n_states)] * args.turns)
+        text = data.decode()
+
+        start = time.perf_counter()
+        stream = io.StringIO(text)
+        for _ in range(args.turns):
+            legacy_read_turn(stream)
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reader = FrameReader(io.BytesIO(data))
+        for _ in range(args.turns):
+            read_turn(reader)
+        codec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reader = FrameReader(io.BytesIO(data))
+        for _ in range(args.turns):
+            read_turn_batch(reader)
+        batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        turns = [sample_turn(n_states)] * args.turns
+        encode_turns(turns)
+        encode = time.perf_counter() - start
+
+        per_turn = 1e6 / args.turns
+        results.append((n_states, legacy * per_turn, codec * per_turn, batch * per_turn, encode * per_turn))
+
+    # Cada turno lleva además el ataque del bot: n mensajes 9 son n + 1 líneas
+    print(f"{'mensajes 9':>10} {'antes us':>10} {'codec us':>10} {'x':>6} {'lote us':>10} {'encode us':>10}")
+    for n_states, legacy, codec, batch, encode in results:
+        print(f"{n_states:>10} {legacy:>10.2f} {codec:>10.2f} {legacy / codec:>6.2f} {batch:>10.2f} {encode:>10.2f}")
+    return 0
+
+def split_log(data):
+    """Cabecera (configuración) y turnos de un archivo de partida; los turnos empiezan en el primer "8 n" """
+    match = re.search(rb"^8 \d+$", data, re.M)
+    if match is None:
+        return data, b""
+    return data[:match.start()], data[match.start():]
+
+def check(args):
+    """Decodificar y volver a codificar los turnos registrados; deben quedar idénticos"""
+    files = args.files or sorted(glob.glob(os.path.join(FIXTURES, "*.txt")))
+    files = [name for name in files if not name.endswith(("list.txt", "state.txt"))]
+    if not files:
+        print(f"No hay partidas registradas ({FIXTURES})")
+        return 1
+
+    failures = 0
+    total_turns = total_messages = 0
+    for name in files:
+        with open(name, "rb") as f:
+            _, body = split_log(f.read())
+        turns = decode_turns(body)
+        total_turns += len(turns)
+        total_messages += sum(len(turn) for turn in turns)
+
+        encoded = encode_turns(turns)
+        unknown = [m for turn in turns for m in turn if isinstance(m, Unknown)]
+        if encoded != body.replace(b"\r\n", b"\n") or unknown:
+            failures += 1
+            position = next((i for i, (a, b) in enumerate(zip(encoded, body)) if a != b),
+                            min(len(encoded), len(body)))
+            print(f"{name}: difiere en el byte {position} ({len(unknown)} líneas desconocidas)")
+
+    print(f"{len(files)} partidas, {total_turns} turnos, {total_messages} mensajes, {failures} con diferencias")
+    return 1 if failures else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Codec del protocolo de turnos")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bench_parser = commands.add_parser("bench", help="microbenchmark de decodificación y codificación")
+    bench_parser.add_argument("--messages", type=lambda s: [int(n) for n in s.split(",")], default=[1, 4, 7, 9, 16, 100, 1000],
+                              help="cantidades de mensajes 9 por turno, separadas por coma")
+    bench_parser.add_argument("--turns", type=int, default=2000, help="turnos por medición")
+
+    check_parser = commands.add_parser("check", help="ida y vuelta contra partidas registradas")
+    check_parser.add_argument("files", nargs="*", help="por defecto fixtures/partidas/*.txt (data/*.txt para las propias)")
+
+    args = parser.parse_args()
+    return bench(args) if args.command == "bench" else check(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
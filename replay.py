@@ -0,0 +1,336 @@
+"""Grabación y reproducción de sesiones con el backend (main.exe).
+
+Con `python game.py --record=DIR` cada proceso de main.exe que lanza el juego
+(la partida de MatchScene y el listaHistorial de HistoryScene/DetailScene) deja
+en DIR una traza: todo lo escrito a su stdin y todo lo leído de su stdout, con
+el tiempo en microsegundos desde que se lanzó. La traza guarda además los
+archivos que el proceso lee al empezar (la configuración de cache/, o
+data/list.txt y las partidas) y la SEMILLA del bot, para poder repetirla.
+
+Formato: gzip con la cabecera MAGIC y registros RECORD (tipo, µs, largo)
+seguidos de sus bytes. Tipos: H (JSON con los argumentos), F (archivo,
+"ruta\\0contenido"), I (stdin), O (stdout) y E (código de salida).
+
+Uso:
+    python replay.py run TRAZA... [--pace fast|original] [--repeat N] [--turns]
+    python replay.py show TRAZA
+
+`run` vuelve a jugar cada traza contra un main.exe nuevo, en un directorio
+temporal con los archivos grabados: como sea más rápido o respetando los
+tiempos originales. Compara cada respuesta con la grabada e informa la latencia
+(ida y vuelta) de cada turno, grabada y reproducida. Termina con código 1 si
+alguna salida difiere.
+"""
+
+import argparse
+import atexit
+import gzip
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+from protocol import BUFFER_SIZE, FrameReader
+
+MAGIC = b"BTRC1\n"
+RECORD = struct.Struct("<cQI")  # tipo, µs desde el inicio, largo
+
+HEADER = b"H"
+FILE = b"F"
+STDIN = b"I"
+STDOUT = b"O"
+EXIT = b"E"
+
+# Trazas abiertas: se cierran al salir para que el gzip quede completo aunque un cliente no se haya cerrado
+open_traces = set()
+
+class TraceWriter:
+    """Traza de un proceso del backend. La escriben el hilo del juego (stdin) y el lector (stdout)"""
+
+    def __init__(self, path, args, env=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.closed = False
+        self.file = gzip.open(path, "wb", compresslevel=6)
+        self.file.write(MAGIC)
+        self.start = time.perf_counter_ns()
+        open_traces.add(self)
+        header = {"args": list(args[1:]), "executable": os.path.basename(args[0]),
+                  "semilla": (env or {}).get("SEMILLA"), "time": time.time()}
+        self.write(HEADER, json.dumps(header).encode())
+
+    def write(self, kind, payload):
+        t = (time.perf_counter_ns() - self.start) // 1000
+        with self.lock:
+            if self.closed:
+                return
+            self.file.write(RECORD.pack(kind, t, len(payload)))
+            self.file.write(payload)
+
+    def stdin(self, data):
+        self.write(STDIN, data)
+
+    def stdout(self, data):
+        self.write(STDOUT, data)
+
+    def snapshot(self, root, name):
+        """Guardar el archivo `name` (relativo a `root`) tal como lo verá el proceso"""
+        try:
+            with open(os.path.join(root, name), "rb") as f:
+                content = f.read()
+        except OSError:
+            return
+        self.write(FILE, name.replace(os.sep, "/").encode() + b"\0" + content)
+
+    def exit(self, returncode):
+        self.write(EXIT, str(returncode).encode())
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.file.close()
+        open_traces.discard(self)
+
+@atexit.register
+def close_traces():
+    for trace in list(open_traces):
+        trace.close()
+
+def read_trace(path):
+    """Registros (tipo, µs, bytes) de una traza; si quedó cortada (el juego se cerró de golpe) se lee hasta ahí"""
+    records = []
+    with gzip.open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: no es una traza del backend")
+        try:
+            while True:
+                head = f.read(RECORD.size)
+                if len(head) < RECORD.size:
+                    break
+                kind, t, size = RECORD.unpack(head)
+                payload = f.read(size)
+                if len(payload) < size:
+                    break
+                records.append((kind, t, payload))
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            pass
+    return records
+
+class Exchange:
+    """Una escritura a stdin (None para lo que el proceso imprime al empezar) y la salida que le siguió"""
+
+    __slots__ = ("input", "t_input", "output", "t_output")
+
+    def __init__(self, data, t):
+        self.input = data
+        self.t_input = t
+        self.output = b""
+        self.t_output = None
+
+    def lines(self):
+        count = self.output.count(b"\n")
+        return count + 1 if self.output and not self.output.endswith(b"\n") else count
+
+    def rtt_ms(self):
+        if self.t_output is None:
+            return None
+        return (self.t_output - self.t_input) / 1000
+
+class Trace:
+
+    def __init__(self, path):
+        self.path = path
+        self.header = {}
+        self.files = []  # (ruta, contenido)
+        self.exchanges = [Exchange(None, 0)]
+        self.returncode = None
+
+        for kind, t, payload in read_trace(path):
+            if kind == HEADER:
+                self.header = json.loads(payload)
+            elif kind == FILE:
+                name, _, content = payload.partition(b"\0")
+                self.files.append((name.decode(), content))
+            elif kind == STDIN:
+                self.exchanges.append(Exchange(payload, t))
+            elif kind == STDOUT:
+                exchange = self.exchanges[-1]
+                exchange.output += payload
+                exchange.t_output = t
+            elif kind == EXIT:
+                self.returncode = int(payload)
+
+    def restore(self, workdir):
+        """Dejar en `workdir` los archivos grabados, con cache/ y data/ como espera main.exe"""
+        for folder in ("cache", "data"):
+            os.makedirs(os.path.join(workdir, folder), exist_ok=True)
+        for name, content in self.files:
+            path = os.path.join(workdir, *name.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content)
+
+def first_difference(expected, actual):
+    """(número de línea, grabada, reproducida) de la primera línea distinta, o None"""
+    expected, actual = expected.splitlines(), actual.splitlines()
+    for n in range(max(len(expected), len(actual))):
+        a = expected[n] if n < len(expected) else None
+        b = actual[n] if n < len(actual) else None
+        if a != b:
+            return n, a, b
+    return None
+
+def replay(trace, executable, pace="fast", timeout=5.0):
+    """Reproducir `trace` contra un proceso nuevo; devuelve (turnos, código de salida)
+
+    Cada turno es un dict con la latencia grabada y la reproducida (ms) y, si la
+    respuesta difiere, la primera línea distinta.
+    """
+    workdir = tempfile.mkdtemp(prefix="replay-")
+    try:
+        trace.restore(workdir)
+        env = dict(os.environ)
+        if trace.header.get("semilla") is not None:
+            env["SEMILLA"] = trace.header["semilla"]
+
+        pipe = subprocess.PIPE
+        proc = subprocess.Popen([executable, *trace.header.get("args", ())], stdin=pipe, stdout=pipe,
+                                stderr=subprocess.DEVNULL, cwd=workdir, env=env, bufsize=BUFFER_SIZE)
+        reader = FrameReader(proc.stdout)
+        start = time.perf_counter()
+        turns = []
+
+        for n, exchange in enumerate(trace.exchanges):
+            sent = start
+            if exchange.input is not None:
+                if pace == "original":
+                    delay = start + exchange.t_input / 1e6 - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                sent = time.perf_counter()
+                try:
+                    proc.stdin.write(exchange.input)
+                    proc.stdin.flush()
+                except OSError:
+                    pass
+
+            # Si el proceso no responde lo que se espera, se lo mata y la lectura termina en EOF
+            watchdog = threading.Timer(timeout, proc.kill)
+            watchdog.start()
+            try:
+                output = reader.read_lines(exchange.lines()) if exchange.lines() else b""
+            except (EOFError, OSError):
+                output = b""
+            finally:
+                watchdog.cancel()
+            done = time.perf_counter()
+
+            if exchange.input is None and not exchange.output:
+                continue  # El proceso no imprime nada al empezar (iniciarJuego -)
+            turn = {"turn": n, "lines": exchange.lines(), "recorded_ms": exchange.rtt_ms(),
+                    "replay_ms": round((done - sent) * 1000, 3) if exchange.lines() else None}
+            difference = first_difference(exchange.output, output)
+            if difference is not None:
+                line, expected, actual = difference
+                turn["diverged"] = {"line": line, "expected": expected and expected.decode(errors="replace"),
+                                    "actual": actual and actual.decode(errors="replace")}
+            turns.append(turn)
+
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            returncode = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            returncode = proc.wait()
+        return turns, returncode
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def run(args):
+    # Importados aquí: backend.py usa TraceWriter de este módulo
+    from backend import BackendManager
+    from simulate import stats
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    executable = args.executable or BackendManager(root).build()
+    diverged = False
+
+    for path in args.traces:
+        trace = Trace(path)
+        recorded = [exchange.rtt_ms() for exchange in trace.exchanges[1:] if exchange.rtt_ms() is not None]
+        replayed, divergences, exits = [], [], []
+        for _ in range(args.repeat):
+            turns, returncode = replay(trace, executable, args.pace, args.timeout)
+            exits.append(returncode)
+            replayed += [turn["replay_ms"] for turn in turns if turn["turn"] > 0 and turn["replay_ms"] is not None]
+            divergences += [turn for turn in turns if "diverged" in turn]
+            if args.turns:
+                for turn in turns:
+                    mark = "DIFIERE" if "diverged" in turn else "ok"
+                    print(f"turno {turn['turn']:>4}  {turn['lines']:>5} líneas  grabado {turn['recorded_ms'] or 0:>9.3f} ms"
+                          f"  reproducido {turn['replay_ms'] or 0:>9.3f} ms  {mark}")
+
+        # Un proceso que se mató al cerrar (código negativo) no cuenta como diferencia
+        exit_diverged = trace.returncode is not None and trace.returncode >= 0 and \
+            any(code != trace.returncode for code in exits)
+        diverged = diverged or bool(divergences) or exit_diverged
+        print(json.dumps({
+            "trace": path,
+            "args": trace.header.get("args"),
+            "semilla": trace.header.get("semilla"),
+            "pace": args.pace,
+            "repeat": args.repeat,
+            "turns": len(trace.exchanges) - 1,
+            "recorded_rtt_ms": stats(recorded),
+            "replay_rtt_ms": stats(replayed),
+            "divergences": len(divergences),
+            "first_divergence": divergences[0] if divergences else None,
+            "exit": {"recorded": trace.returncode, "replay": sorted(set(exits))},
+        }, indent=2))
+    return 1 if diverged else 0
+
+def show(args):
+    names = {HEADER: "H", FILE: "F", STDIN: ">", STDOUT: "<", EXIT: "E"}
+    for kind, t, payload in read_trace(args.trace):
+        if kind == FILE:
+            name, _, content = payload.partition(b"\0")
+            text = f"{name.decode()} ({len(content)} bytes)"
+        else:
+            text = payload.decode(errors="replace").rstrip("\n").replace("\n", " | ")
+        print(f"{t / 1000:>11.3f} ms {names.get(kind, '?')} {text}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Grabación y reproducción de sesiones con main.exe")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="reproducir trazas contra un backend nuevo")
+    run_parser.add_argument("traces", nargs="+")
+    run_parser.add_argument("--pace", choices=("fast", "original"), default="fast",
+                            help="lo más rápido posible o con los tiempos grabados")
+    run_parser.add_argument("--repeat", type=int, default=1)
+    run_parser.add_argument("--turns", action="store_true", help="mostrar la latencia de cada turno")
+    run_parser.add_argument("--timeout", type=float, default=5.0, help="segundos por respuesta del backend")
+    run_parser.add_argument("--executable", help="binario a usar en vez de compilar las fuentes")
+    run_parser.set_defaults(handler=run)
+
+    show_parser = commands.add_parser("show", help="mostrar los registros de una traza")
+    show_parser.add_argument("trace")
+    show_parser.set_defaults(handler=show)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
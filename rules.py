@@ -0,0 +1,709 @@
+"""Motor de reglas en Python, equivalente a `main.exe iniciarJuego`.
+
+Match reproduce una partida de main.c sin lanzar un proceso: lee la misma
+configuración de cache/, responde cada turno con los mismos mensajes (ver
+CODIGOS.md) y escribe el mismo registro, que al terminar pasa a data/ junto
+con su id en data/list.txt. Cada método corresponde a la función de main.c
+indicada en su docstring y conserva sus detalles: el catalejo revela una sola
+casilla, revelar agua la marca como atacada y el patrón de búsqueda del bot
+no avanza de fila al llegar al borde.
+
+El tablero del bot sale del mismo generador que rand() de glibc con la misma
+semilla (la hora o la variable de entorno SEMILLA), así que con la misma
+semilla el tablero es el mismo que arma main.exe compilado con gcc.
+
+En el juego se usa con `python game.py <nombre> --engine=python`.
+
+Uso como herramienta (comparación contra main.exe):
+    python rules.py check [--games N] [--seed S] [--turns N]
+"""
+
+import argparse
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+
+from protocol import (ATTACK, BOMB, END, HORIZONTAL, OBJECT, SPYGLASS, TORPEDO, VERTICAL, Attack, CellState, GameOver,
+                      UseObject, decode_turns, encode_config, encode_turn)
+
+MAX_GRID = 20
+ID_LENGTH = 5
+WATER_HIT = 99  # Agua ya atacada o revelada
+
+HELP_TEXT = """Battleship Game - Ayuda
+======================
+
+Uso: <accion> [parametros]
+
+Acciones disponibles:
+  iniciarJuego <archivo_configuracion> - Inicia una nueva partida
+  iniciarJuego - - Igual, pero lee el archivo de configuracion de la primera linea de stdin
+  buscarPartida <id_partida> - Muestra el historial de una partida
+  ayuda - Muestra esta ayuda
+
+Formato de entrada durante el juego:
+  <codigo_turno> <numero_acciones>
+  <tipo_accion> [parametros]
+
+Tipos de acción:
+  4 <x> <y> - Ataque en coordenadas (x,y)
+  5 <id_objeto> <x> <y> <orientacion> - Usar objeto
+
+Objetos disponibles:
+  1 - Bomba (ataca área 3x3)
+  2 - Catalejo (revela área 3x3)
+  3 - Torpedo (ataca en línea)
+"""
+
+class EngineExit(Exception):
+    """El backend habría terminado con `code` (exit, return de main o una falla de memoria)"""
+
+    def __init__(self, code):
+        super().__init__(f"código {code}")
+        self.code = code
+
+class CRandom:
+    """rand()/srand() de glibc (generador aditivo TYPE_3)"""
+
+    def __init__(self, seed):
+        seed &= 0xffffffff
+        if seed == 0:
+            seed = 1
+        word = seed - (1 << 32) if seed >= 1 << 31 else seed
+        state = [word]
+        for _ in range(30):
+            # 16807 * word % 2147483647 sin desbordar, con la división truncada de C
+            hi = int(word / 127773)
+            word = 16807 * (word - hi * 127773) - 2836 * hi
+            if word < 0:
+                word += 2147483647
+            state.append(word)
+        state = [value & 0xffffffff for value in state]
+        self.state = deque(state + state[:3], maxlen=34)
+        for _ in range(310):
+            self.next()
+
+    def next(self):
+        state = self.state
+        value = (state[-31] + state[-3]) & 0xffffffff
+        state.append(value)
+        return value
+
+    def rand(self):
+        return self.next() >> 1
+
+def default_seed():
+    """La misma semilla que usa main.c: SEMILLA si está definida, si no la hora"""
+    seed = os.environ.get("SEMILLA")
+    return int(seed) if seed else int(time.time())
+
+SCAN_INT = re.compile(r"\s*([+-]?\d+)")
+
+def scan_ints(text, count):
+    """Enteros al principio de `text`, como sscanf con `count` veces %d (para en el primero que falla)"""
+    values = []
+    position = 0
+    while len(values) < count:
+        match = SCAN_INT.match(text, position)
+        if match is None:
+            break
+        values.append(int(match.group(1)))
+        position = match.end()
+    return values
+
+class Board:
+    """Tablero (Tablero en main.c): valores[y][x] con 0 agua, id de barco, -id barco atacado y 99 agua atacada.
+
+    Las casillas se cambian con `set`, que lleva la cuenta de casillas de barco
+    intactas y atacadas; así verificarFinalizacion y el puntaje no recorren el tablero.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.values = [[0] * width for _ in range(height)]
+        self.intact_cells = 0
+        self.hit_cells = 0
+
+    def set(self, x, y, value):
+        old = self.values[y][x]
+        self.intact_cells += (0 < value != WATER_HIT) - (0 < old != WATER_HIT)
+        self.hit_cells += (value < 0) - (old < 0)
+        self.values[y][x] = value
+
+    def intact(self):
+        return self.intact_cells > 0
+
+    def hits(self):
+        return self.hit_cells
+
+class Match:
+    """Partida en curso, manejada como el proceso `main.exe iniciarJuego <config>`.
+
+    `feed` recibe lo que se escribiría en su stdin y devuelve lo que escribiría
+    en stdout. Si el proceso hubiera terminado (un exit de main.c o el fin de
+    stdin) queda su código en `returncode`; escribirle después levanta EngineExit.
+    """
+
+    encoding = "utf-8"
+    errors = "surrogateescape"  # Los bytes que no son UTF-8 pasan tal cual, como en C
+
+    max_attempts = 100
+
+    def __init__(self, config_name, root=".", rand=None):
+        self.root = root
+        self.config_path = os.path.join(root, "cache", config_name)
+        self.rand = rand
+        self.output = []
+        self.messages = []  # mensajesEstado del turno
+        self.log = None
+        self.buffer = b""
+        self.last_x = self.last_y = 0
+        self.score = 0
+        self.finished = False
+        self.returncode = None
+
+        self.loop = self.run()
+        self.step(next, self.loop)
+
+    # Entrada y salida
+
+    def write(self, text):
+        self.output.append(text)
+
+    def puts(self, text):
+        self.output.append(text + "\n")
+
+    def write_log(self, text):
+        if self.log is not None:
+            self.log.write(text)
+
+    def take_output(self):
+        output, self.output = "".join(self.output).encode(self.encoding, self.errors), []
+        return output
+
+    def step(self, function, *args):
+        """Avanzar el bucle principal hasta que pida otra línea; registra el código si terminó"""
+        try:
+            function(*args)
+        except StopIteration:
+            self.returncode = 0
+        except EngineExit as e:
+            self.returncode = e.code
+        if self.returncode is not None:
+            self.close_files()
+
+    def feed(self, data):
+        """Procesar bytes de stdin (las líneas completas) y devolver lo que se escribió en stdout"""
+        if self.returncode is not None:
+            raise EngineExit(self.returncode)
+        self.buffer += data
+        while self.returncode is None and b"\n" in self.buffer:
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            self.step(self.loop.send, line.decode(self.encoding, self.errors) + "\n")
+        return self.take_output()
+
+    def close(self):
+        """Fin de stdin: el bucle de main.c termina (una línea incompleta se lee antes)"""
+        if self.returncode is None and self.buffer:
+            buffer, self.buffer = self.buffer, b""
+            self.step(self.loop.send, buffer.decode(self.encoding, self.errors))
+        if self.returncode is None:
+            self.step(self.loop.send, None)
+        return self.take_output()
+
+    def close_files(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def fail(self, *lines, code=1):
+        for line in lines:
+            self.write(line + "\n")
+        raise EngineExit(code)
+
+    # Bucle principal
+
+    def run(self):
+        """iniciarJuego: cargar la configuración y responder un turno por cada línea "8 n" """
+        self.load_config()
+        self.write(f"PARDTIDA INICIADA ID {self.id}\n")
+        try:
+            self.log = open(self.config_path, "a", newline="", encoding=self.encoding, errors=self.errors)
+        except OSError:
+            raise EngineExit(1)
+
+        while True:
+            line = yield
+            if line is None:
+                return
+            if line.endswith("\n"):
+                line = line[:-1]
+
+            yield from self.read_turn(line)
+            self.bot_decision()
+
+            result = self.check_end()
+            if result > 0:
+                self.score = self.player_score()
+                self.messages.append(GameOver(result, self.score))
+
+            self.show_messages()
+
+    def read_turn(self, choice):
+        """leerTurno: "8 n" y luego n acciones, registradas en el archivo de la partida"""
+        values = scan_ints(choice, 2)
+        if len(values) != 2:
+            self.fail("Error: La elección no es correcta")
+
+        self.messages = []
+        self.write_log(f"{choice}\n")
+
+        for _ in range(values[1]):
+            line = yield
+            if line is None:
+                self.puts("Error: No se pudo leer la entrada")
+                return
+            if line.endswith("\n"):
+                line = line[:-1]
+
+            self.write_log(f"{line}\n")
+            self.read_action(line)
+
+    def read_action(self, line):
+        """leerAccion: 4 x y (ataque) o 5 ... (objeto)"""
+        values = scan_ints(line, 1)
+        if not values:
+            self.puts("Error: No se ingresó un tipo de acción válido")
+            return
+
+        if values[0] == ATTACK:
+            values = scan_ints(line, 3)
+            if len(values) != 3:
+                self.puts("Error: No se ingresaron coordenadas válidas para el ataque")
+                return
+            self.apply_attack(values[1], values[2])
+        elif values[0] == OBJECT:
+            self.use_object(line)
+        else:
+            self.puts("Error: No se ingresó un tipo de acción válido")
+            self.write(HELP_TEXT)
+            self.fail(code=1)
+
+    def show_messages(self):
+        """mostrarMensajesEstado: enviar el turno y registrarlo; el 777 cierra el archivo de la partida"""
+        text = encode_turn(self.messages).decode()
+        self.write(text)
+        self.write_log(text)
+        if self.log is not None and self.messages and self.messages[-1].code == END:
+            self.close_match_file()
+
+    def close_match_file(self):
+        """cerrarArchivoPartida: mover la partida a data/ y agregarla a data/list.txt"""
+        self.close_files()
+        self.finished = True
+        try:
+            os.rename(os.path.join(self.root, "cache", f"{self.id}.txt"),
+                      os.path.join(self.root, "data", f"{self.id}.txt"))
+        except OSError:
+            pass
+        try:
+            with open(os.path.join(self.root, "data", "list.txt"), "a", newline="") as f:
+                f.write(f"{self.id}\n")
+        except OSError:
+            # fopen devuelve NULL y fprintf falla
+            raise EngineExit(-11)
+
+    # Configuración
+
+    def load_config(self):
+        """leerConfiguracion: id, nombre, tamaño y tablero del jugador; arma el tablero del bot"""
+        error = "Error: No se pudo cargar la configuración del juego"
+        try:
+            with open(self.config_path, newline="", encoding=self.encoding, errors=self.errors) as f:
+                text = f.read()
+        except OSError:
+            self.fail(f"Error: No se pudo abrir el archivo {self.config_path}", error)
+
+        tokens = ConfigScanner(text)
+        self.id = tokens.word(ID_LENGTH)
+        if self.id is None:
+            self.fail("Error: No se pudo leer el ID de la partida", error)
+
+        self.player_name = tokens.word(255)
+        if self.player_name is None:
+            self.fail("Error: No se pudo leer el nombre del jugador", error)
+
+        rows, cols = tokens.int(), tokens.int()
+        if rows is None or cols is None or not (0 < rows <= MAX_GRID and 0 < cols <= MAX_GRID):
+            self.fail("Error: Dimensiones de la cuadrícula inválidas", error)
+
+        self.player = Board(cols, rows)
+        boats = {}  # id -> tamaño, en el orden en que aparecen (leerCelda)
+        for i in range(rows):
+            for j in range(cols):
+                value = tokens.int()
+                if value is None:
+                    self.fail(f"Error: No se pudo leer el valor en la posición [{i}][{j}]", error)
+                self.player.set(j, i, value)
+                if value > 0:
+                    boats[value] = boats.get(value, 0) + 1
+
+        self.bot = self.init_bot_board(list(boats.values()), cols, rows)
+        if self.bot is None:
+            self.fail("Error: No se pudo inicializar el tablero del bot", error)
+
+    def init_bot_board(self, sizes, width, height):
+        """inicializarTableroBot: barcos de los mismos tamaños en posiciones al azar"""
+        if self.rand is None:
+            self.rand = CRandom(default_seed())
+        rand = self.rand.rand
+        board = Board(width, height)
+
+        for boat_id, size in enumerate(sizes, start=1):
+            vertical = rand() % 2
+            placed = False
+            attempts = self.max_attempts
+
+            while not placed and attempts > 0:
+                # % de C: el resto de un rand() no negativo nunca es negativo
+                x = rand() % abs(width - (0 if vertical else size - 1))
+                y = rand() % abs(height - (size - 1 if vertical else 0))
+
+                cells = [(x, y + i) if vertical else (x + i, y) for i in range(size)]
+                if all(cx < width and cy < height and board.values[cy][cx] == 0 for cx, cy in cells):
+                    for cx, cy in cells:
+                        board.set(cx, cy, boat_id)
+                    placed = True
+                attempts -= 1
+
+            if not placed:
+                self.puts(f"Error: No se pudo colocar el barco {boat_id} después de varios intentos")
+                return None
+        return board
+
+    # Reglas
+
+    def report_cell(self, x, y):
+        """informarCasilla: mensaje 9 con el valor de la casilla del bot (el agua queda como 99)"""
+        if not (0 <= x < self.bot.width and 0 <= y < self.bot.height):
+            # main.c no valida las coordenadas y lee fuera del tablero
+            raise EngineExit(-11)
+        value = self.bot.values[y][x]
+        if value == 0:
+            self.bot.set(x, y, WATER_HIT)
+            value = WATER_HIT
+        self.messages.append(CellState(x, y, value))
+
+    def apply_attack(self, x, y):
+        """aplicarAtaque: atacar una casilla del bot; una ya atacada no genera mensaje"""
+        if not (0 <= x < self.bot.width and 0 <= y < self.bot.height):
+            self.puts("Coordenada fuera de rango :(\n")
+            self.fail(code=1)
+
+        value = self.bot.values[y][x]
+        if value == WATER_HIT or value < 0:
+            return
+        self.bot.set(x, y, -value if value > 0 else WATER_HIT)
+        self.report_cell(x, y)
+
+    def torpedo(self, x, y, orientation):
+        """ObjectTorpedo: avanza desde (x, y) hasta el borde o el primer barco, revelando el agua"""
+        board = self.bot
+        if not (0 <= x < board.width and 0 <= y < board.height):
+            self.puts("Error: Coordenadas iniciales fuera de rango")
+            return
+
+        # Desde el borde 0 avanza hacia adelante; desde cualquier otra casilla, hacia atrás
+        if orientation == HORIZONTAL:
+            dx, dy = (1 if x == 0 else -1), 0
+        elif orientation == VERTICAL:
+            dx, dy = 0, (1 if y == 0 else -1)
+        else:
+            self.puts("Error: Orientación inválida para torpedo")
+            return
+
+        while 0 <= x < board.width and 0 <= y < board.height:
+            if 0 < board.values[y][x] < WATER_HIT:
+                self.apply_attack(x, y)
+                return
+            self.report_cell(x, y)
+            x += dx
+            y += dy
+
+    def use_object(self, line):
+        """usarObjeto: 5 1 x y (bomba 3x3), 5 2 x y (catalejo) o 5 3 x y orientación (torpedo)"""
+        values = scan_ints(line, 5)
+        object_id = values[1] if len(values) > 1 else 0
+        invalid = "Error: No se ingresaron parámetros válidos para el objeto"
+
+        if object_id == BOMB:
+            if len(values) < 4:
+                self.puts(invalid)
+                return
+            x, y = values[2], values[3]
+            for j in range(y - 1, y + 2):
+                for i in range(x - 1, x + 2):
+                    if 0 <= i < self.bot.width and 0 <= j < self.bot.height:
+                        self.apply_attack(i, j)
+
+        elif object_id == SPYGLASS:
+            if len(values) < 4:
+                self.puts(invalid)
+                return
+            self.report_cell(values[2], values[3])
+
+        elif object_id == TORPEDO:
+            if len(values) < 5:
+                self.puts(invalid)
+                return
+            self.torpedo(values[2], values[3], values[4])
+
+        else:
+            self.puts(f"ERROR: ID de objeto incorrecta: {object_id}")
+
+    def bot_decision(self):
+        """tomarDecision: rematar alrededor de un impacto, si no patrón en damero y si no la primera casilla libre"""
+        values = self.player.values
+        width, height = self.player.width, self.player.height
+        target = None
+
+        # 1. Junto a un impacto previo (derecha, izquierda, abajo, arriba); sin impactos no hay nada que buscar
+        for y in range(height if self.player.hit_cells else 0):
+            for x in range(width):
+                if values[y][x] < 0:
+                    for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                        if 0 <= nx < width and 0 <= ny < height and 0 <= values[ny][nx] != WATER_HIT:
+                            target = (nx, ny)
+                            break
+                if target:
+                    break
+            if target:
+                break
+
+        # 2. Patrón de búsqueda desde la última posición. Al pasar el borde main.c
+        # hace `*last_y++` (mueve el puntero, no el valor), así que la fila no avanza
+        if target is None:
+            for y in range(self.last_y, height):
+                for x in range(self.last_x if y == self.last_y else 0, width):
+                    if (x + y) % 2 == 0 and 0 <= values[y][x] != WATER_HIT:
+                        target = (x, y)
+                        self.last_x, self.last_y = x + 1, y
+                        if self.last_x >= width:
+                            self.last_x = 0
+                        break
+                if target:
+                    break
+
+        # 3. Cualquier casilla sin atacar
+        if target is None:
+            target = next(((x, y) for y in range(height) for x in range(width)
+                           if 0 <= values[y][x] != WATER_HIT), None)
+
+        if target is not None:
+            x, y = target
+            value = values[y][x]
+            if 0 < value != WATER_HIT:
+                value = -value
+            elif value == 0:
+                value = WATER_HIT
+            self.player.set(x, y, value)
+            self.messages.append(Attack(y, x))
+
+    def check_end(self):
+        """verificarFinalizacion: 1 si al jugador no le quedan barcos, 2 si al bot, 0 si sigue"""
+        for winner, board in enumerate((self.player, self.bot), start=1):
+            if not board.intact():
+                return winner
+        return 0
+
+    def player_score(self):
+        """calcularPuntajeJugador: 5 por casilla de barco del bot hundida, -2 por cada una propia, mínimo 0"""
+        return max(0, 5 * self.bot.hits() - 2 * self.player.hits())
+
+class ConfigScanner:
+    """Lectura de la configuración como los fscanf de leerConfiguracion ("%5s", "%255s", "%d")"""
+
+    def __init__(self, text):
+        self.text = text
+        self.position = 0
+
+    def skip_spaces(self):
+        while self.position < len(self.text) and self.text[self.position].isspace():
+            self.position += 1
+
+    def word(self, max_length):
+        self.skip_spaces()
+        start = self.position
+        while (self.position < len(self.text) and self.position - start < max_length
+               and not self.text[self.position].isspace()):
+            self.position += 1
+        return self.text[start:self.position] or None
+
+    def int(self):
+        match = SCAN_INT.match(self.text, self.position)
+        if match is None:
+            return None
+        self.position = match.end()
+        return int(match.group(1))
+
+# Herramienta: comparación contra main.exe
+
+BOAT_SIZES = (2, 3, 3, 4, 5)
+
+def random_layout(rng, size, boat_sizes=BOAT_SIZES):
+    """Tablero del jugador con los barcos en posiciones al azar, como lo deja SetupScene"""
+    while True:
+        grid = [[0] * size for _ in range(size)]
+        for boat_id, length in enumerate(boat_sizes, start=1):
+            for _ in range(100):
+                vertical = rng.random() < 0.5
+                x = rng.randrange(size - (0 if vertical else length - 1))
+                y = rng.randrange(size - (length - 1 if vertical else 0))
+                cells = [(x, y + i) if vertical else (x + i, y) for i in range(length)]
+                if all(grid[cy][cx] == 0 for cx, cy in cells):
+                    for cx, cy in cells:
+                        grid[cy][cx] = boat_id
+                    break
+            else:
+                break
+        else:
+            return grid
+
+def random_turn(rng, size, unknown):
+    """Ataque a una casilla todavía desconocida y, a veces, un objeto"""
+    messages = []
+    if unknown:
+        messages.append(Attack(*rng.choice(sorted(unknown))))
+    roll = rng.random()
+    x, y = rng.randrange(size), rng.randrange(size)
+    if roll < 0.1:
+        messages.append(UseObject(BOMB, x, y))
+    elif roll < 0.2:
+        messages.append(UseObject(SPYGLASS, x, y))
+    elif roll < 0.3:
+        # Desde el borde para recorrer la línea completa, o desde el medio hacia atrás
+        x = 0 if rng.random() < 0.5 else x
+        messages.append(UseObject(TORPEDO, x, y, rng.choice((HORIZONTAL, VERTICAL))))
+    return messages
+
+def play_scripted(root, config_name, seed, size, max_turns, rng):
+    """Jugar con el motor en Python; devuelve (stdin enviado, stdout recibido, turnos, segundos del motor)"""
+    start = time.perf_counter()
+    match = Match(config_name, root, CRandom(seed))
+    stdin, stdout = [], [match.take_output()]
+    elapsed = time.perf_counter() - start
+    unknown = {(x, y) for x in range(size) for y in range(size)}
+    turns = 0
+
+    while turns < max_turns and not match.finished:
+        data = encode_turn(random_turn(rng, size, unknown))
+        stdin.append(data)
+        start = time.perf_counter()
+        output = match.feed(data)
+        elapsed += time.perf_counter() - start
+        stdout.append(output)
+        turns += 1
+        for message in decode_turns(output)[-1]:
+            if message.code == CellState.code:
+                unknown.discard((message.x, message.y))
+
+    start = time.perf_counter()
+    stdout.append(match.close())
+    elapsed += time.perf_counter() - start
+    return b"".join(stdin), b"".join(stdout), turns, elapsed
+
+def read_files(root, match_id):
+    files = {}
+    for name in (f"cache/{match_id}.txt", f"data/{match_id}.txt", "data/list.txt"):
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                files[name] = f.read()
+    return files
+
+def first_difference(a, b):
+    lines_a, lines_b = a.splitlines(), b.splitlines()
+    for number, (line_a, line_b) in enumerate(zip(lines_a, lines_b), start=1):
+        if line_a != line_b:
+            return f"línea {number}: {line_b!r} (main.exe) != {line_a!r} (Python)"
+    return f"largo distinto: {len(lines_b)} líneas (main.exe) != {len(lines_a)} (Python)"
+
+def check(args):
+    """Jugar las mismas partidas con el motor y con main.exe y comparar stdout y archivos"""
+    from backend import BackendManager
+
+    executable = BackendManager(os.path.dirname(os.path.abspath(__file__))).build()
+    rng = random.Random(args.seed)
+    failures = 0
+    turns_total = 0
+    python_time = c_time = 0.0
+
+    for game in range(args.games):
+        seed = rng.randrange(1 << 32)
+        match_id = f"{game:05x}"[-ID_LENGTH:]
+        config = encode_config(match_id, "tester", random_layout(rng, args.size), [(BOMB, 1), (SPYGLASS, 1), (TORPEDO, 1)])
+
+        roots = [tempfile.mkdtemp(prefix="rules-"), tempfile.mkdtemp(prefix="rules-")]
+        try:
+            for root in roots:
+                os.makedirs(os.path.join(root, "cache"))
+                os.makedirs(os.path.join(root, "data"))
+                with open(os.path.join(root, "cache", f"{match_id}.txt"), "w", newline="") as f:
+                    f.write(config)
+
+            stdin, stdout, turns, elapsed = play_scripted(roots[0], f"{match_id}.txt", seed, args.size,
+                                                          args.turns, random.Random(seed))
+            python_time += elapsed
+            turns_total += turns
+
+            start = time.perf_counter()
+            env = dict(os.environ, SEMILLA=str(seed))
+            result = subprocess.run([executable, "iniciarJuego", f"{match_id}.txt"], input=stdin,
+                                    capture_output=True, cwd=roots[1], env=env)
+            c_time += time.perf_counter() - start
+
+            differences = []
+            if result.stdout != stdout:
+                differences.append(f"stdout, {first_difference(stdout, result.stdout)}")
+            files = read_files(roots[0], match_id), read_files(roots[1], match_id)
+            for name in sorted(set(files[0]) | set(files[1])):
+                if files[0].get(name) != files[1].get(name):
+                    differences.append(f"{name}, {first_difference(files[0].get(name, b''), files[1].get(name, b''))}")
+
+            if differences:
+                failures += 1
+                print(f"Partida {game} (semilla {seed}, {turns} turnos):")
+                for difference in differences:
+                    print(f"  {difference}")
+        finally:
+            for root in roots:
+                shutil.rmtree(root, ignore_errors=True)
+
+    print(f"{args.games} partidas, {turns_total} turnos, {failures} con diferencias")
+    if turns_total:
+        print(f"Python: {python_time / turns_total * 1e6:.1f} us/turno; "
+              f"main.exe: {c_time / turns_total * 1e6:.1f} us/turno (proceso completo)")
+    return 1 if failures else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Motor de reglas en Python")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check_parser = commands.add_parser("check", help="comparar contra main.exe partida a partida")
+    check_parser.add_argument("--games", type=int, default=50)
+    check_parser.add_argument("--seed", type=int, default=0)
+    check_parser.add_argument("--turns", type=int, default=200, help="máximo de turnos por partida")
+    check_parser.add_argument("--size", type=int, default=10, help="lado del tablero")
+
+    args = parser.parse_args()
+    return check(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
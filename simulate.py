@@ -0,0 +1,274 @@
+"""Partidas sin interfaz, en paralelo, para medir resultados y rendimiento.
+
+Cada partida se juega como en MatchScene: se escribe cache/<id>.txt con la
+configuración (protocol.encode_config, como save_config) y se maneja
+`main.exe iniciarJuego` turno a turno con un jugador automático. Las partidas
+se reparten en un pool de procesos; cada proceso trabaja en su propio
+directorio con su cache/ y su data/, así que no se pisan entre sí ni con los
+del juego. Cada partida fija la semilla del bot (SEMILLA) para poder repetirla.
+
+Uso:
+    python simulate.py [--games N] [--workers N] [--strategy hunt] [--engine c]
+                       [--layout random] [--output partidas.jsonl]
+
+Imprime en JSON el resumen: victorias, turnos hasta ganar, puntaje, tiempo
+por partida y partidas por minuto. Con --output guarda además una línea JSON
+por partida.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from backend import BackendClient, BackendError, BackendManager, EngineClient
+from protocol import (BOMB, END, HORIZONTAL, SPYGLASS, STATE, TORPEDO, VERTICAL, VICTORY, Attack, UseObject,
+                      encode_config, encode_turn, read_line)
+from rules import BOAT_SIZES, CRandom, random_layout
+
+class RandomPlayer:
+    """Ataca casillas desconocidas al azar y gasta sus objetos en los primeros turnos"""
+
+    def __init__(self, rng, size, objects):
+        self.rng = rng
+        self.size = size
+        self.objects = dict(objects)
+        self.unknown = {(x, y) for x in range(size) for y in range(size)}
+        self.ships = []  # Casillas de barco vistas con el catalejo, todavía sin atacar
+
+    def target(self):
+        if self.ships:
+            return self.ships.pop()
+        return self.rng.choice(tuple(self.unknown))
+
+    def use_object(self):
+        """Un objeto por turno mientras queden: bomba, torpedo y catalejo"""
+        rng = self.rng
+        if self.objects.get(BOMB):
+            self.objects[BOMB] -= 1
+            x, y = rng.choice(tuple(self.unknown))
+            return UseObject(BOMB, min(max(x, 1), self.size - 2), min(max(y, 1), self.size - 2))
+        if self.objects.get(TORPEDO):
+            self.objects[TORPEDO] -= 1
+            return UseObject(TORPEDO, 0, rng.randrange(self.size), HORIZONTAL) if rng.random() < 0.5 \
+                else UseObject(TORPEDO, rng.randrange(self.size), 0, VERTICAL)
+        if self.objects.get(SPYGLASS):
+            self.objects[SPYGLASS] -= 1
+            return UseObject(SPYGLASS, *rng.choice(tuple(self.unknown)))
+        return None
+
+    def turn(self):
+        messages = []
+        if self.unknown:
+            messages.append(Attack(*self.target()))
+            obj = self.use_object() if self.unknown else None
+            if obj is not None:
+                messages.append(obj)
+        return messages
+
+    def observe(self, messages):
+        for message in messages:
+            if message.code != STATE:
+                continue
+            cell = (message.x, message.y)
+            if message.value > 0 and message.value != 99:
+                # El catalejo mostró un barco: sigue sin atacar
+                if cell not in self.ships:
+                    self.ships.append(cell)
+                continue
+            self.unknown.discard(cell)
+            if message.value < 0:
+                self.hit(*cell)
+
+    def hit(self, x, y):
+        pass
+
+class HuntPlayer(RandomPlayer):
+    """Busca en damero y, al acertar, remata las casillas vecinas"""
+
+    def __init__(self, rng, size, objects):
+        super().__init__(rng, size, objects)
+        self.queue = []
+
+    def target(self):
+        if self.ships:
+            return self.ships.pop()
+        while self.queue:
+            cell = self.queue.pop()
+            if cell in self.unknown:
+                return cell
+        parity = [cell for cell in self.unknown if (cell[0] + cell[1]) % 2 == 0]
+        return self.rng.choice(parity or tuple(self.unknown))
+
+    def hit(self, x, y):
+        for cell in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if cell in self.unknown:
+                self.queue.append(cell)
+
+STRATEGIES = {"random": RandomPlayer, "hunt": HuntPlayer}
+
+def edge_layout(rng, size, boat_sizes=BOAT_SIZES):
+    """Barcos pegados a los bordes (para comparar contra el patrón en damero del bot)"""
+    while True:
+        grid = [[0] * size for _ in range(size)]
+        for boat_id, length in enumerate(boat_sizes, start=1):
+            for _ in range(100):
+                side, offset = rng.randrange(4), rng.randrange(size - length + 1)
+                edge = (0, size - 1)[side % 2]
+                cells = [(offset + i, edge) if side < 2 else (edge, offset + i) for i in range(length)]
+                if all(grid[y][x] == 0 for x, y in cells):
+                    for x, y in cells:
+                        grid[y][x] = boat_id
+                    break
+            else:
+                break
+        else:
+            return grid
+
+LAYOUTS = {"random": random_layout, "edge": edge_layout}
+
+# Estado de cada proceso del pool
+worker = {}
+
+def init_worker(base, executable, args):
+    """Directorio propio del proceso, con su cache/ y su data/"""
+    root = tempfile.mkdtemp(prefix=f"worker-{os.getpid()}-", dir=base)
+    os.makedirs(os.path.join(root, "cache"))
+    os.makedirs(os.path.join(root, "data"))
+    worker.update(root=root, executable=executable, args=args)
+
+def play_game(spec):
+    """Jugar la partida `spec` = (número, semilla); devuelve su resumen (dict)"""
+    game, seed = spec
+    args = worker["args"]
+    rng = random.Random(seed)
+    root = worker["root"]
+    match_id = f"{game:05x}"[-5:]
+    objects = [(BOMB, args.bombs), (SPYGLASS, args.spyglasses), (TORPEDO, args.torpedoes)]
+    objects = [(object_id, quantity) for object_id, quantity in objects if quantity > 0]
+
+    start = time.perf_counter()
+    with open(os.path.join(root, "cache", f"{match_id}.txt"), "w") as f:
+        f.write(encode_config(match_id, args.player, LAYOUTS[args.layout](rng, args.size), objects))
+
+    bot_seed = rng.randrange(1 << 32)
+    if args.engine == "python":
+        client = EngineClient(f"{match_id}.txt", args.timeout, cwd=root, rand=CRandom(bot_seed))
+    else:
+        env = dict(os.environ, SEMILLA=str(bot_seed))
+        client = BackendClient([worker["executable"], "iniciarJuego", f"{match_id}.txt"],
+                               args.timeout, cwd=root, env=env)
+
+    player = STRATEGIES[args.strategy](rng, args.size, objects)
+    summary = {"game": game, "seed": seed, "result": None, "turns": 0, "score": None, "error": None}
+    try:
+        client.submit(parser=read_line).result(args.timeout)
+        while summary["turns"] < args.max_turns:
+            messages = client.submit(encode_turn(player.turn())).result(args.timeout)
+            summary["turns"] += 1
+            player.observe(messages)
+            if messages and messages[-1].code == END:
+                summary["result"], summary["score"] = messages[-1].result, messages[-1].score
+                break
+    except (BackendError, TimeoutError) as e:
+        summary["error"] = str(e)
+    finally:
+        # Esperar a que termine: tras el 777 todavía mueve la partida a data/
+        client.close().result()
+
+    if not args.keep:
+        for folder in ("cache", "data"):
+            try:
+                os.remove(os.path.join(root, folder, f"{match_id}.txt"))
+            except OSError:
+                pass
+
+    summary["wall_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return summary
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def stats(values):
+    if not values:
+        return None
+    return {"mean": round(sum(values) / len(values), 2), "p50": percentile(values, 0.5),
+            "p90": percentile(values, 0.9), "min": min(values), "max": max(values)}
+
+def summarize(games, elapsed, args):
+    finished = [g for g in games if g["result"] is not None]
+    wins = [g for g in finished if g["result"] == VICTORY]
+    return {
+        "games": len(games),
+        "workers": args.workers,
+        "engine": args.engine,
+        "strategy": args.strategy,
+        "layout": args.layout,
+        "finished": len(finished),
+        "errors": sum(g["error"] is not None for g in games),
+        "wins": len(wins),
+        "win_rate": round(len(wins) / len(finished), 4) if finished else None,
+        "turns_to_win": stats([g["turns"] for g in wins]),
+        "turns": stats([g["turns"] for g in finished]),
+        "score": stats([g["score"] for g in finished]),
+        "wall_ms": stats([g["wall_ms"] for g in games]),
+        "elapsed_s": round(elapsed, 3),
+        "games_per_minute": round(len(games) / elapsed * 60, 1) if elapsed else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Partidas sin interfaz en paralelo")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos del pool")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="hunt", help="jugador automático")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="random", help="disposición de los barcos del jugador")
+    parser.add_argument("--engine", choices=("c", "python"), default="c", help="main.exe o el motor de rules.py")
+    parser.add_argument("--size", type=int, default=10, help="lado del tablero")
+    parser.add_argument("--bombs", type=int, default=1)
+    parser.add_argument("--spyglasses", type=int, default=1)
+    parser.add_argument("--torpedoes", type=int, default=1)
+    parser.add_argument("--max-turns", type=int, default=500)
+    parser.add_argument("--player", default="simulador")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=5.0, help="segundos por respuesta del backend")
+    parser.add_argument("--output", help="archivo JSONL con el resultado de cada partida")
+    parser.add_argument("--keep", help="directorio donde dejar cache/ y data/ de cada proceso")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    executable = BackendManager(root).build() if args.engine == "c" else None
+
+    base = args.keep or tempfile.mkdtemp(prefix="simulate-")
+    os.makedirs(base, exist_ok=True)
+    rng = random.Random(args.seed)
+    specs = [(game, rng.randrange(1 << 32)) for game in range(args.games)]
+
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(args.workers, initializer=init_worker,
+                                 initargs=(base, executable, args)) as pool:
+            chunksize = max(1, args.games // (args.workers * 16))
+            games = list(pool.map(play_game, specs, chunksize=chunksize))
+    finally:
+        if not args.keep:
+            shutil.rmtree(base, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for game in games:
+                f.write(json.dumps(game) + "\n")
+
+    print(json.dumps(summarize(games, elapsed, args), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
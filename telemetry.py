@@ -0,0 +1,220 @@
+"""Métricas de latencia de cada turno con el backend (IPC), en un JSONL rotativo.
+
+MatchScene anota cada turno al aplicar su respuesta: cuánto tardó en
+escribirse el "8 n" con sus mensajes, cuánto hasta la primera línea de
+respuesta, cuánto hasta leerla completa y hasta que la escena la aplicó
+(incluye la espera al próximo frame), cuántos mensajes llegaron de cada tipo
+(4, 9, 777) y una muestra de CPU y memoria (RSS) del proceso del backend.
+
+Cada `summary_every` turnos, y al terminar la partida, se agrega una línea
+con los percentiles de la ventana. Al pasar `max_bytes` el archivo rota como
+los logs: turnos.jsonl.1, .2, ... hasta `backups`.
+
+Uso:
+    python game.py <nombre_jugador> [--metrics=metrics/turnos.jsonl | --no-metrics]
+    python telemetry.py report [ARCHIVOS...] [--top 10]
+
+`report` junta los turnos de los archivos (por defecto el actual y sus
+rotados) y muestra en JSON los percentiles, por tipo de turno (solo ataque,
+con bomba, con torpedo...) y los turnos más lentos.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+try:
+    import psutil
+except ImportError:  # psutil es opcional: sin él la CPU y la memoria se leen de /proc (solo Linux)
+    psutil = None
+
+from protocol import OBJECT, OBJECT_NAMES
+
+DEFAULT_PATH = os.path.join("metrics", "turnos.jsonl")
+
+# Métricas de las que se resumen percentiles
+METRICS = ("write_ms", "first_line_ms", "read_ms", "total_ms", "applied_ms", "messages")
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def summarize(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {"p50": percentile(values, 0.5), "p90": percentile(values, 0.9), "p99": percentile(values, 0.99),
+            "max": max(values), "mean": round(sum(values) / len(values), 3)}
+
+def sample_process(pid):
+    """(CPU usada en ms, RSS en KB) del proceso `pid`, o None si no se puede medir"""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            cpu = process.cpu_times()
+            return (cpu.user + cpu.system) * 1000, process.memory_info().rss // 1024
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            statm = f.read().split()
+    except OSError:
+        return None
+    # Campos después del nombre entre paréntesis: utime y stime son el 14 y el 15 de stat
+    fields = stat.rsplit(b")", 1)[1].split()
+    ticks = int(fields[11]) + int(fields[12])
+    return ticks * 1000 / os.sysconf("SC_CLK_TCK"), int(statm[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+def turn_kind(sent):
+    """Nombre del tipo de turno según los mensajes enviados: "Ataque", "Ataque+Bomba", ..."""
+    parts = ["Ataque"] if "4" in sent else []
+    parts += sorted(name for code, name in OBJECT_NAMES.items() if sent.get(f"5.{code}"))
+    return "+".join(parts) or "vacío"
+
+class TurnMetrics:
+    """Registro rotativo de los turnos de las partidas (un solo archivo por juego)"""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=1 << 20, backups=3, summary_every=50):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.summary_every = summary_every
+        self.file = None  # Se abre con el primer turno
+        self.size = 0
+        self.failed = False
+        self.window = {metric: [] for metric in METRICS}
+        self.window_turns = 0
+        self.cpu = {}  # pid -> CPU acumulada en la muestra anterior (ms)
+
+    def write(self, record):
+        if self.failed:
+            return
+        line = (json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n").encode()
+        try:
+            if self.file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self.file = open(self.path, "ab")
+                self.size = self.file.tell()
+            if self.size and self.size + len(line) > self.max_bytes:
+                self.rotate()
+            self.file.write(line)
+            self.file.flush()
+            self.size += len(line)
+        except OSError as e:
+            # Sin dónde escribir las métricas el juego sigue igual
+            print(f"Aviso: no se pudieron guardar las métricas ({e})", file=sys.stderr)
+            self.failed = True
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def rotate(self):
+        self.file.close()
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self.file = open(self.path, "wb")
+        self.size = 0
+
+    def record_turn(self, match_id, turn, sent, future, messages, engine=None, pid=None, error=None):
+        """Anotar un turno ya respondido: `sent` los mensajes enviados y `future` el pedido (con su timing)"""
+        applied = time.perf_counter()
+        sent_counts = Counter(str(m.code) if m.code != OBJECT else f"5.{m.object_id}" for m in sent)
+        received = Counter(str(m.code) for m in messages)
+
+        record = {"type": "turn", "time": round(time.time(), 3), "match": match_id, "turn": turn,
+                  "engine": engine, "sent": dict(sent_counts), "kind": turn_kind(sent_counts),
+                  "received": dict(received), "messages": len(messages)}
+        timing = getattr(future, "timing", None)
+        if timing is not None:
+            record.update(timing.as_dict())
+            record["applied_ms"] = round((applied - timing.sent) * 1000, 3)
+
+        sample = sample_process(pid) if pid is not None else None
+        if sample is not None:
+            cpu_ms, rss_kb = sample
+            previous = self.cpu.get(pid)
+            record["cpu_ms"] = round(cpu_ms - previous, 3) if previous is not None else None
+            record["rss_kb"] = rss_kb
+            self.cpu[pid] = cpu_ms
+        if error is not None:
+            record["error"] = error
+        self.write(record)
+
+        for metric in METRICS:
+            self.window[metric].append(record.get(metric))
+        self.window_turns += 1
+        if self.window_turns >= self.summary_every:
+            self.summary(match_id)
+
+    def summary(self, match_id=None):
+        """Percentiles de los turnos anotados desde el resumen anterior"""
+        if not self.window_turns:
+            return
+        record = {"type": "summary", "time": round(time.time(), 3), "match": match_id, "turns": self.window_turns}
+        for metric, values in self.window.items():
+            record[metric] = summarize(values)
+            values.clear()
+        self.window_turns = 0
+        self.write(record)
+
+    def close(self):
+        """Resumir los últimos turnos y cerrar el archivo"""
+        self.summary()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+def read_records(paths):
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # Línea cortada por un cierre abrupto
+
+def report(args):
+    paths = args.files or sorted(glob.glob(DEFAULT_PATH + "*"))
+    turns = [record for record in read_records(paths) if record.get("type") == "turn"]
+    kinds = {}
+    for record in turns:
+        kinds.setdefault(record.get("kind"), []).append(record)
+
+    slowest = sorted((r for r in turns if r.get("total_ms") is not None), key=lambda r: r["total_ms"], reverse=True)
+    print(json.dumps({
+        "files": paths,
+        "turns": len(turns),
+        "errors": sum("error" in record for record in turns),
+        "all": {metric: summarize([r.get(metric) for r in turns]) for metric in METRICS},
+        "by_kind": {kind: {"turns": len(records),
+                           "total_ms": summarize([r.get("total_ms") for r in records]),
+                           "messages": summarize([r.get("messages") for r in records])}
+                    for kind, records in sorted(kinds.items(), key=lambda item: str(item[0]))},
+        "slowest": [{key: record.get(key) for key in ("match", "turn", "kind", "total_ms", "first_line_ms",
+                                                       "read_ms", "received", "cpu_ms")}
+                    for record in slowest[:args.top]],
+    }, indent=2))
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Métricas de latencia de los turnos con el backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="percentiles y turnos más lentos")
+    report_parser.add_argument("files", nargs="*", help=f"por defecto {DEFAULT_PATH} y sus rotados")
+    report_parser.add_argument("--top", type=int, default=10)
+    report_parser.set_defaults(handler=report)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())